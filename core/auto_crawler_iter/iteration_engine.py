@@ -7,6 +7,7 @@ from .variant_builder import build_variant, variant_hash
 from .sandbox_executor import SandboxExecutor
 from .evaluator import VariantEvaluator
 from .patch_store import PatchStore
+from .variant_search import VariantSearch
 from scrapers.logger import log_info, log_error
 
 class CrawlerIterationEngine:
@@ -16,7 +17,7 @@ class CrawlerIterationEngine:
         self.metrics_collector = MetricsCollector()
         self.issue_detector = IssueDetector()
         self.strategy_registry = StrategyRegistry(self.cfg)
-        self.sandbox = SandboxExecutor(self.cfg["sandbox_dir"])
+        self.sandbox = SandboxExecutor(self.cfg["sandbox_dir"], self.cfg.get("replay_corpus_dir", "data/corpus"))
         self.patch_store = PatchStore(self.cfg["patch_output_dir"])
         self.production_file = self.cfg["production_file"]
 
@@ -40,12 +41,28 @@ class CrawlerIterationEngine:
         issues = self.issue_detector.detect(base_metrics)
         log_info(f"[AUTO-ITER] Issues: {issues}")
 
+        evaluator = VariantEvaluator(
+            weights=self.cfg["weights"],
+            threshold=self.cfg["score_threshold"],
+            require_error_drop=self.cfg["require_error_drop"]
+        )
+        original_source = open(self.production_file, "r", encoding="utf-8").read()
+        replay = None
+        if self.cfg.get("sandbox_replay", False):
+            # 生产与变体回放同一份录制的页面, 差异只来自代码本身
+            prod_module = self.sandbox._dynamic_import(self.production_file)
+            self.sandbox.ensure_corpus(prod_module, self.cfg["test_urls"], self.cfg.get("replay_max_age_hours", 24))
+            replay = "replay"
+
+        search_cfg = self.cfg.get("search", {})
+        if search_cfg.get("population", 1) > 1:
+            return self._run_search(issues, original_source, evaluator, replay, search_cfg)
+
         # 2. 选策略 & 生成变体配置
         chosen_strategies = self.strategy_registry.pick_strategies(issues)
         patch_conf = self.strategy_registry.materialize(chosen_strategies)
 
-        # 3. 读取生产源码
-        original_source = open(self.production_file, "r", encoding="utf-8").read()
+        # 3. 生成变体源码
         variant_source = build_variant(patch_conf, original_source, chosen_strategies)
         tag = variant_hash(variant_source)
 
@@ -54,14 +71,10 @@ class CrawlerIterationEngine:
         prod_module = self.sandbox._dynamic_import(self.production_file)
         variant_module = self.sandbox._dynamic_import(variant_path)
 
-        base_stats = self.sandbox.run_test(prod_module, self.cfg["test_urls"])
-        new_stats = self.sandbox.run_test(variant_module, self.cfg["test_urls"])
+        base_stats = self.sandbox.run_test(prod_module, self.cfg["test_urls"], replay=replay)
+        new_stats = self.sandbox.run_test(variant_module, self.cfg["test_urls"], replay=replay)
+        self.sandbox.cleanup()
 
-        evaluator = VariantEvaluator(
-            weights=self.cfg["weights"],
-            threshold=self.cfg["score_threshold"],
-            require_error_drop=self.cfg["require_error_drop"]
-        )
         eval_result = evaluator.score(base_stats, new_stats)
         log_info(f"[AUTO-ITER] Eval result: {eval_result}")
 
@@ -87,6 +100,43 @@ class CrawlerIterationEngine:
                 "score": eval_result["raw_score"]
             }
 
+    def _run_search(self, issues, original_source: str, evaluator: VariantEvaluator, replay, search_cfg: Dict) -> Dict:
+        """多变体并行搜索 (variant_search.py): 生成一组变体, 逐步减半淘汰, 最优者按阈值决定是否生成补丁。"""
+        candidates: Dict[str, Dict] = {}
+        for strategies in self.strategy_registry.candidate_sets(issues, search_cfg.get("population", 6)):
+            patch_conf = self.strategy_registry.materialize(strategies)
+            variant_source = build_variant(patch_conf, original_source, strategies)
+            tag = variant_hash(variant_source)
+            if tag not in candidates:
+                candidates[tag] = {"path": self.sandbox.write_variant(variant_source, tag),
+                                   "source": variant_source, "strategies": strategies}
+        log_info(f"[AUTO-ITER] 搜索候选: {[(t, c['strategies']) for t, c in candidates.items()]}")
+
+        search = VariantSearch(
+            self.sandbox, evaluator, self.cfg["test_urls"],
+            workers=search_cfg.get("workers", 2),
+            eta=search_cfg.get("eta", 2),
+            replay=replay
+        )
+        outcome = search.run(self.production_file, candidates)
+        self.sandbox.cleanup()
+
+        best = candidates[outcome["best"]]
+        result = {
+            "strategies": best["strategies"],
+            "base_stats": outcome["base_stats"],
+            "new_stats": outcome["new_stats"],
+            "score": outcome["eval"]["raw_score"],
+            "search": {"candidates": len(candidates), "rounds": outcome["rounds"],
+                       "evaluations": outcome["evaluations"], "secs": outcome["secs"]},
+        }
+        if outcome["eval"]["passed"]:
+            patch_path = self.patch_store.build_patch(original_source, best["source"], outcome["best"])
+            result.update({"status": "candidate", "tag": outcome["best"], "patch_path": patch_path})
+        else:
+            result.update({"status": "rejected", "reason": "score_not_improved"})
+        return result
+
     def apply_patch(self, tag: str):
         patch_file = os.path.join(self.cfg["patch_output_dir"], f"{tag}.patch")
         variant_file = os.path.join(self.cfg["sandbox_dir"], f"amazon_scraper_{tag}.py")
@@ -1,66 +1,179 @@
-import os, json, re, time
-from typing import Dict, Any, List
+"""
+增量指标采集
+
+- 日志: 从持久化的字节偏移继续读取 scraper.jsonl (结构化日志), 只处理新增行;
+  日志轮转后先读完 .1 中的剩余部分再从新文件开头读取
+- 条目数: 读取 save_data 写入的 data/_manifest.jsonl (每次保存一行: 文件 / 条目数 / 时间),
+  不再逐个 json.load 数据文件; 首次运行 (无状态) 时对已有数据文件做一次性扫描作为初始值
+- 按分钟聚合, 提供 5m / 1h / 24h 滚动窗口; 顶层的 captcha_hits / error_lines / avg_list_time
+  取 24h 窗口, 文件类指标取最近 30 次保存
+- 拦截次数 (captcha_hits) 只统计带 blocked 字段的记录: 每次拦截恰好有一条 ([BLOCKED] 或列表页验证码),
+  其后的 "[CAPTCHA] 列表页被拦截"、含 captcha 字样的统计 / 限速日志都不计数
+状态保存在 data/state/metrics_state.json, collect() 的耗时只与新增日志量有关, 与日志总大小无关。
+"""
+import os, json, time
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+WINDOWS = {"5m": 5, "1h": 60, "24h": 1440}
+RECENT_FILES = 30
+_MAX_RECENT_ERRORS = 10
+
+
+def _tail(path: str, cursor: Dict[str, Any]) -> List[bytes]:
+    """返回 path 自 cursor 以来新增的完整行, 并原地更新 cursor (offset / inode)。"""
+    lines: List[bytes] = []
+    if not os.path.exists(path):
+        return lines
+    st = os.stat(path)
+    inode, offset = cursor.get("inode"), cursor.get("offset", 0)
+    if inode is not None and inode != st.st_ino:
+        rotated = path + ".1"
+        if os.path.exists(rotated) and os.stat(rotated).st_ino == inode:
+            lines.extend(_read_from(rotated, offset)[0])
+        offset = 0
+    elif st.st_size < offset:
+        offset = 0  # 被截断
+    new_lines, offset = _read_from(path, offset)
+    lines.extend(new_lines)
+    cursor["inode"], cursor["offset"] = st.st_ino, offset
+    return lines
+
+
+def _read_from(path: str, offset: int) -> Tuple[List[bytes], int]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read()
+    end = chunk.rfind(b"\n")
+    if end < 0:
+        return [], offset  # 只有写了一半的行, 下次再读
+    return chunk[:end].split(b"\n"), offset + end + 1
+
+
 class MetricsCollector:
-    def __init__(self, data_dir="data", log_file="scraper.log"):
+    def __init__(self, data_dir="data", log_file=None, state_file=None):
         self.data_dir = data_dir
-        self.log_file = log_file
+        self.log_file = log_file or os.getenv("LOG_JSON_FILE", "scraper.jsonl")
+        self.manifest_file = os.path.join(data_dir, "_manifest.jsonl")
+        self.state_file = state_file or os.path.join(data_dir, "state", "metrics_state.json")
+
+    # ---------- 状态 ----------
+    def _load_state(self) -> Optional[Dict[str, Any]]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return None
+
+    def _save_state(self, state: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp = self.state_file + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.state_file)
+
+    def _bootstrap_files(self) -> List[Dict[str, Any]]:
+        """无状态时对已有数据文件做一次扫描 (此后只读 manifest)。"""
+        recent = []
+        if not os.path.isdir(self.data_dir):
+            return recent
+        files = sorted([
+            f for f in os.listdir(self.data_dir) if f.endswith(".json")
+        ], key=lambda x: os.path.getmtime(os.path.join(self.data_dir, x)), reverse=True)[:RECENT_FILES]
+        for f in reversed(files):
+            path = os.path.join(self.data_dir, f)
+            try:
+                with open(path, "r", encoding="utf-8") as rf:
+                    data = json.load(rf)
+            except Exception:
+                continue
+            if isinstance(data, list):
+                recent.append({"file": path, "items": len(data), "ts": os.path.getmtime(path)})
+        return recent
+
+    # ---------- 聚合 ----------
+    @staticmethod
+    def _bucket(state: Dict[str, Any], ts: float) -> Dict[str, float]:
+        minute = str(int(ts // 60))
+        return state["buckets"].setdefault(minute, {"list_sum": 0.0, "list_n": 0, "captcha": 0, "errors": 0,
+                                                    "saves": 0, "items": 0})
+
+    def _ingest_log(self, state: Dict[str, Any], raw: bytes):
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            return
+        ts = rec.get("ts") or time.time()
+        msg = rec.get("msg", "")
+        low = msg.lower()
+        b = self._bucket(state, ts)
+        if rec.get("tag") == "LIST_TIME" and rec.get("duration") is not None:
+            b["list_sum"] += float(rec["duration"])
+            b["list_n"] += 1
+        if rec.get("blocked") or rec.get("tag") == "BLOCKED":
+            b["captcha"] += 1
+        if "[exception]" in low or "[error]" in low:
+            b["errors"] += 1
+            state["recent_errors"] = (state["recent_errors"] + [msg])[-_MAX_RECENT_ERRORS:]
+
+    def _ingest_manifest(self, state: Dict[str, Any], raw: bytes):
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            return
+        if rec.get("items") is None:
+            return
+        b = self._bucket(state, rec.get("ts") or time.time())
+        b["saves"] += 1
+        b["items"] += rec["items"]
+        state["recent_files"] = [r for r in state["recent_files"] if r["file"] != rec.get("file")]
+        state["recent_files"] = (state["recent_files"] + [rec])[-RECENT_FILES:]
+
+    @staticmethod
+    def _window(state: Dict[str, Any], now_minute: int, minutes: int) -> Dict[str, Any]:
+        agg = {"list_sum": 0.0, "list_n": 0, "captcha": 0, "errors": 0, "saves": 0, "items": 0}
+        for minute, b in state["buckets"].items():
+            if now_minute - int(minute) < minutes:
+                for k in agg:
+                    agg[k] += b[k]
+        return {
+            "list_pages": agg["list_n"],
+            "avg_list_time": round(agg["list_sum"] / agg["list_n"], 3) if agg["list_n"] else None,
+            "captcha_hits": agg["captcha"],
+            "error_lines": agg["errors"],
+            "saves": agg["saves"],
+            "items_saved": agg["items"],
+        }
 
     def collect(self) -> Dict[str, Any]:
-        metrics = {
+        state = self._load_state()
+        if state is None:
+            state = {"log": {}, "manifest": {}, "buckets": {}, "recent_errors": [],
+                     "recent_files": self._bootstrap_files()}
+
+        for raw in _tail(self.log_file, state["log"]):
+            self._ingest_log(state, raw)
+        for raw in _tail(self.manifest_file, state["manifest"]):
+            self._ingest_manifest(state, raw)
+
+        now_minute = int(time.time() // 60)
+        state["buckets"] = {m: b for m, b in state["buckets"].items() if now_minute - int(m) < WINDOWS["24h"]}
+        self._save_state(state)
+
+        windows = {name: self._window(state, now_minute, minutes) for name, minutes in WINDOWS.items()}
+        counts = [r["items"] for r in state["recent_files"]]
+        day = windows["24h"]
+        return {
             "timestamp": datetime.utcnow().isoformat(),
-            "total_items": 0,
-            "zero_files": 0,
-            "avg_items_per_file": 0.0,
-            "files_scanned": 0,
-            "captcha_hits": 0,
-            "error_lines": 0,
-            "avg_list_time": None,
-            "recent_errors": [],
+            "total_items": sum(counts),
+            "zero_files": sum(1 for c in counts if c == 0),
+            "avg_items_per_file": sum(counts) / len(counts) if counts else 0.0,
+            "files_scanned": len(counts),
+            "captcha_hits": day["captcha_hits"],
+            "error_lines": day["error_lines"],
+            "avg_list_time": day["avg_list_time"],
+            "recent_errors": list(state["recent_errors"]),
+            "windows": windows,
         }
-        items_acc = []
-        if os.path.isdir(self.data_dir):
-            files = sorted([
-                f for f in os.listdir(self.data_dir) if f.endswith(".json")
-            ], key=lambda x: os.path.getmtime(os.path.join(self.data_dir, x)), reverse=True)[:30]
-            for f in files:
-                path = os.path.join(self.data_dir, f)
-                try:
-                    data = json.load(open(path, "r", encoding="utf-8"))
-                    if isinstance(data, list):
-                        cnt = len(data)
-                        items_acc.append(cnt)
-                        if cnt == 0:
-                            metrics["zero_files"] += 1
-                except:
-                    continue
-            metrics["files_scanned"] = len(items_acc)
-            metrics["total_items"] = sum(items_acc)
-            if items_acc:
-                metrics["avg_items_per_file"] = metrics["total_items"] / len(items_acc)
-
-        # 日志解析
-        if os.path.exists(self.log_file):
-            list_times = []
-            err_capture = []
-            with open(self.log_file, "r", encoding="utf-8") as rf:
-                for line in rf:
-                    low = line.lower()
-                    if "captcha" in low:
-                        metrics["captcha_hits"] += 1
-                    if "[exception]" in low or "[error]" in low:
-                        metrics["error_lines"] += 1
-                        if len(err_capture) < 10:
-                            err_capture.append(line.strip())
-                    # 可在你的 amazon_scraper 中打印如 [LIST_TIME] secs=1.23
-                    mt = re.search(r"\[LIST_TIME\]\s+secs=(\d+\.\d+)", line)
-                    if mt:
-                        try:
-                            list_times.append(float(mt.group(1)))
-                        except:
-                            pass
-            if list_times:
-                metrics["avg_list_time"] = round(sum(list_times)/len(list_times), 3)
-            metrics["recent_errors"] = err_capture
-        return metrics
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os, importlib.util, time, shutil
-from typing import Dict, List
+from typing import Dict, List, Optional
 from scrapers.logger import log_info, log_error
+from scrapers.browser_pool import keep_browser_pool, close_browser_pool
+from scrapers.replay_corpus import ReplayCorpus, replay_session, REPLAY_CORPUS_DIR
 
 class SandboxExecutor:
-    def __init__(self, sandbox_dir="sandbox"):
+    def __init__(self, sandbox_dir="sandbox", corpus_dir=REPLAY_CORPUS_DIR):
         self.sandbox_dir = sandbox_dir
+        self.corpus_dir = corpus_dir
         os.makedirs(self.sandbox_dir, exist_ok=True)
 
     def write_variant(self, variant_code: str, tag: str) -> str:
@@ -14,12 +17,33 @@ class SandboxExecutor:
         return path
 
     def _dynamic_import(self, path: str):
-        spec = importlib.util.spec_from_file_location("amazon_variant", path)
+        # 挂在 scrapers 包下加载, 使变体中的相对导入 (.proxy_manager / .browser_pool 等)
+        # 指向同一组模块, 生产与变体共享同一个浏览器池
+        import scrapers
+        name = "scrapers._variant_" + os.path.splitext(os.path.basename(path))[0]
+        spec = importlib.util.spec_from_file_location(name, path)
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
         return module
 
-    def run_test(self, scraper_module, test_urls: List[str], max_items=20) -> Dict:
+    def ensure_corpus(self, scraper_module, test_urls: List[str], max_age_hours=24, max_items=20) -> List[str]:
+        """用生产模块联网录制语料库中缺失或超过 max_age_hours 的测试页, 返回本次录制的 URL。"""
+        corpus = ReplayCorpus(self.corpus_dir)
+        stale = [u for u in test_urls
+                 if corpus.age(u) is None or corpus.age(u) > max_age_hours * 3600]
+        if stale:
+            log_info(f"[SANDBOX] 录制语料: {stale}")
+            self.run_test(scraper_module, stale, max_items=max_items, replay="record")
+        return stale
+
+    def run_test(self, scraper_module, test_urls: List[str], max_items=20, replay: Optional[str] = None) -> Dict:
+        """replay: None 联网测试; "record" 联网并录制; "replay" 离线回放语料库 (输入固定, 不占用代理与限速配额)。"""
+        if replay:
+            with replay_session(replay, self.corpus_dir):
+                return self._run_urls(scraper_module, test_urls, max_items)
+        return self._run_urls(scraper_module, test_urls, max_items)
+
+    def _run_urls(self, scraper_module, test_urls: List[str], max_items: int) -> Dict:
         stats = {
             "items": 0,
             "zero_pages": 0,
@@ -28,31 +52,33 @@ class SandboxExecutor:
             "avg_time": None
         }
         times = []
-        for u in test_urls:
-            start = time.time()
-            try:
-                data = scraper_module.scrape_amazon(
-                    url=u,
-                    max_items=max_items,
-                    resume=False,
-                    use_proxy=False,
-                    deep_detail=False,
-                    storage_mode="local",
-                    headless=True,
-                    second_pass=True
-                )
-                if not data:
-                    stats["zero_pages"] += 1
-                else:
-                    stats["items"] += len(data)
-            except Exception as e:
-                stats["errors"] += 1
-            elapsed = time.time() - start
-            times.append(elapsed)
+        with keep_browser_pool() as pool:  # 多个测试 URL 共用同一浏览器, 结束时关闭
+            for u in test_urls:
+                start = time.time()
+                try:
+                    data = scraper_module.scrape_amazon(
+                        url=u,
+                        max_items=max_items,
+                        resume=False,
+                        use_proxy=False,
+                        deep_detail=False,
+                        storage_mode="local",
+                        headless=True,
+                        second_pass=True
+                    )
+                    if not data:
+                        stats["zero_pages"] += 1
+                    else:
+                        stats["items"] += len(data)
+                except Exception as e:
+                    stats["errors"] += 1
+                elapsed = time.time() - start
+                times.append(elapsed)
+            log_info(f"[SANDBOX] browser pool: {pool.stats()}")
         if times:
             stats["avg_time"] = round(sum(times)/len(times), 3)
         return stats
 
     def cleanup(self):
         # 可保留沙箱文件以供调试，也可在此实现自动清理
-        pass
\ No newline at end of file
+        close_browser_pool()
\ No newline at end of file
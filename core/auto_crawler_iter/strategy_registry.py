@@ -25,6 +25,28 @@ class StrategyRegistry:
             chosen.add(random.choice(enabled))
         return list(chosen)
 
+    def candidate_sets(self, issues: List[str], size: int, rng=None) -> List[List[str]]:
+        """
+        多变体搜索的候选策略组合: 第一个为 pick_strategies 的结果,
+        其余在其基础上随机增减一到两个已启用策略, 去重后最多 size 个。
+        """
+        rng = rng or random
+        enabled = self.cfg.get("strategies_enabled", [])
+        seed = sorted(self.pick_strategies(issues))
+        out = [seed]
+        seen = {tuple(seed)}
+        attempts = 0
+        while enabled and len(out) < size and attempts < size * 20:
+            attempts += 1
+            cand = set(seed) ^ {rng.choice(enabled)}
+            if rng.random() < 0.5:
+                cand ^= {rng.choice(enabled)}
+            key = tuple(sorted(cand))
+            if key and key not in seen:
+                seen.add(key)
+                out.append(list(key))
+        return out
+
     def materialize(self, strategy_list: List[str]) -> Dict:
         patch_conf = {}
         base = self.cfg.get("selector_bundles", {}).get("base", {})
@@ -52,6 +74,11 @@ class StrategyRegistry:
             patch_conf["wait_min"] = self.cfg.get("wait_time_base", {}).get("min", 1.0)
             patch_conf["wait_max"] = self.cfg.get("wait_time_base", {}).get("max", 1.6)
 
+        if "block_resources" in strategy_list:
+            patch_conf["fetch_profile"] = self.cfg.get("fetch_profile_extended", "minimal")
+        else:
+            patch_conf["fetch_profile"] = self.cfg.get("fetch_profile_base", "lean")
+
         patch_conf["enable_second_pass"] = ("add_second_pass" in strategy_list)
         patch_conf["enable_fallback_asin"] = ("fallback_data_asins" in strategy_list)
         return patch_conf
\ No newline at end of file
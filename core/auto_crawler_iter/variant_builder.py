@@ -24,6 +24,7 @@ WAIT_MIN = {patch_conf["wait_min"]}
 WAIT_MAX = {patch_conf["wait_max"]}
 ENABLE_SECOND_PASS = {patch_conf["enable_second_pass"]}
 ENABLE_FALLBACK_ASIN = {patch_conf["enable_fallback_asin"]}
+FETCH_PROFILE = "{patch_conf.get("fetch_profile", "lean")}"
 # === AUTO_TUNING_CONFIG_END ===
 '''
     if "# === AUTO_TUNING_CONFIG_START ===" in base_source:
@@ -0,0 +1,134 @@
+"""
+多变体并行搜索 (逐步减半, successive halving)
+
+每轮迭代不再只测试一个变体:
+- 由 StrategyRegistry.candidate_sets 生成一组策略组合, 各自构建变体 (按源码哈希去重)
+- 评估单元为 (模块, 测试 URL), 在 spawn 工作进程池中并行执行; 结果按 (tag, URL) 缓存,
+  预算增加时只补测新增的 URL
+- 第 r 轮每个存活候选测试前 budget_r 个 URL (预算按 eta 倍增长, 最后一轮为全部 URL),
+  与生产模块在同一组 URL 上的结果比较打分 (VariantEvaluator), 保留前 1/eta 进入下一轮
+- 最后一轮得分最高者作为补丁候选, 是否通过仍由评估阈值决定
+配合沙箱回放 (replay) 时各进程离线读取同一份语料, 结果可复现且不消耗代理 / 限速配额。
+"""
+import math
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from scrapers.logger import log_info, log_error, share_logging
+from core.job_runner import job_worker_cap
+
+_modules: Dict[str, Any] = {}
+
+
+def _evaluate(path: str, url: str, max_items: int, replay: Optional[str], sandbox_dir: str,
+              corpus_dir: str) -> Dict[str, Any]:
+    """工作进程入口: 加载 (并缓存) 模块, 对单个 URL 运行沙箱测试。"""
+    from .sandbox_executor import SandboxExecutor
+
+    sandbox = SandboxExecutor(sandbox_dir, corpus_dir)
+    module = _modules.get(path)
+    if module is None:
+        module = _modules[path] = sandbox._dynamic_import(path)
+    return sandbox.run_test(module, [url], max_items=max_items, replay=replay)
+
+
+def merge_stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把逐 URL 的 run_test 结果合并为与 run_test 相同结构的汇总。"""
+    times = [r["avg_time"] for r in rows if r.get("avg_time") is not None]
+    return {
+        "items": sum(r["items"] for r in rows),
+        "zero_pages": sum(r["zero_pages"] for r in rows),
+        "errors": sum(r["errors"] for r in rows),
+        "captcha_hits": sum(r.get("captcha_hits", 0) for r in rows),
+        "avg_time": round(sum(times) / len(times), 3) if times else None,
+    }
+
+
+class VariantSearch:
+    def __init__(self, sandbox, evaluator, test_urls: List[str], workers: int = 2, eta: int = 2,
+                 max_items: int = 20, replay: Optional[str] = None):
+        self.sandbox = sandbox
+        self.evaluator = evaluator
+        self.test_urls = list(test_urls)
+        self.workers = job_worker_cap(max(1, workers))  # 后台任务内不超过该任务的 worker 预算
+        self.eta = max(2, eta)
+        self.max_items = max_items
+        self.replay = replay
+        self._results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def _budgets(self, n_candidates: int) -> List[int]:
+        # 淘汰到不超过 eta 个候选后进入最后一轮 (全部 URL)
+        rounds, alive = 1, n_candidates
+        while alive > self.eta:
+            alive = math.ceil(alive / self.eta)
+            rounds += 1
+        total = len(self.test_urls)
+        return [max(1, math.ceil(total / self.eta ** (rounds - 1 - r))) for r in range(rounds)]
+
+    def _run_tasks(self, pool, tasks: List[Tuple[str, str, str]]):
+        futures = {
+            pool.submit(_evaluate, path, url, self.max_items, self.replay, self.sandbox.sandbox_dir,
+                        self.sandbox.corpus_dir): (tag, url)
+            for tag, path, url in tasks if (tag, url) not in self._results
+        }
+        for fut, (tag, url) in futures.items():
+            try:
+                self._results[(tag, url)] = fut.result()
+            except Exception as e:
+                log_error(f"[AUTO-ITER] 评估失败 tag={tag} url={url}: {repr(e)}")
+                self._results[(tag, url)] = {"items": 0, "zero_pages": 0, "errors": 1, "captcha_hits": 0,
+                                             "avg_time": None}
+
+    def _stats(self, tag: str, urls: List[str]) -> Dict[str, Any]:
+        return merge_stats([self._results[(tag, u)] for u in urls])
+
+    def run(self, baseline_path: str, candidates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        candidates: tag -> {"path": 变体文件, "strategies": [...]}
+        返回 best (tag) / base_stats / new_stats / score / eval / rounds (每轮排行)。
+        """
+        alive = list(candidates)
+        budgets = self._budgets(len(alive))
+        rounds: List[Dict[str, Any]] = []
+        ranked: List[Tuple[str, Dict[str, Any]]] = []
+        start = time.time()
+
+        share_logging()
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn")) as pool:
+            for r, budget in enumerate(budgets):
+                urls = self.test_urls[:budget]
+                tasks = [("__base__", baseline_path, u) for u in urls]
+                tasks += [(tag, candidates[tag]["path"], u) for tag in alive for u in urls]
+                self._run_tasks(pool, tasks)
+
+                base_stats = self._stats("__base__", urls)
+                scored = []
+                for tag in alive:
+                    ev = self.evaluator.score(base_stats, self._stats(tag, urls))
+                    scored.append((tag, ev))
+                scored.sort(key=lambda x: x[1]["raw_score"], reverse=True)
+                ranked = scored
+                rounds.append({"round": r, "urls": budget,
+                               "leaderboard": [(tag, ev["raw_score"]) for tag, ev in scored]})
+                log_info(f"[AUTO-ITER] 搜索第 {r + 1}/{len(budgets)} 轮 urls={budget} "
+                         f"排行={rounds[-1]['leaderboard']}", stage="search", items=len(alive))
+                if r < len(budgets) - 1:
+                    alive = [tag for tag, _ in scored[:max(1, math.ceil(len(alive) / self.eta))]]
+
+        best, best_eval = ranked[0]
+        evaluations = len(self._results)
+        secs = round(time.time() - start, 3)
+        log_info(f"[AUTO-ITER] 搜索完成 best={best} score={best_eval['raw_score']} "
+                 f"candidates={len(candidates)} evaluations={evaluations} secs={secs}",
+                 stage="search", duration=secs, items=evaluations)
+        return {
+            "best": best,
+            "eval": best_eval,
+            "base_stats": self._stats("__base__", self.test_urls),
+            "new_stats": self._stats(best, self.test_urls),
+            "rounds": rounds,
+            "evaluations": evaluations,
+            "secs": secs,
+        }
@@ -1,5 +1,23 @@
+"""
+市场趋势来源
+
+fetch_all_trends() 通过进程内共享的 stale-while-revalidate 缓存 (swr_cache.py) 读取各来源:
+每个来源独立 TTL (TREND_TTL_<来源>, 秒), 过期后先返回旧值并在后台刷新, 多个 Streamlit 会话共用一次上游请求。
+每条结果附带 cache 元数据 (age / fetched_at / stale / refreshing / error)。
+"""
+import os
 import datetime, requests
 
+from .swr_cache import SWRCache
+
+TREND_TTLS = {
+    "1688": float(os.getenv("TREND_TTL_1688", "900")),
+    "questmobile": float(os.getenv("TREND_TTL_QUESTMOBILE", "3600")),
+    "iresearch": float(os.getenv("TREND_TTL_IRESEARCH", "3600")),
+}
+
+_cache = SWRCache("trends")
+
 def fetch_1688_trend(keyword="家居"):
     url = "https://sycm.1688.com/trend"  # 占位链接
     try:
@@ -14,6 +32,19 @@ def fetch_questmobile_trend():
 def fetch_iresearch_trend():
     return {"source":"艾瑞咨询","metric":"广告ROI+3%","fetched_at":datetime.datetime.utcnow().isoformat(),"url":"https://www.iresearch.com.cn","credibility":0.88}
 
-def fetch_all_trends():
-    return [fetch_1688_trend(), fetch_questmobile_trend(), fetch_iresearch_trend()]
+_LOADERS = {
+    "1688": fetch_1688_trend,
+    "questmobile": fetch_questmobile_trend,
+    "iresearch": fetch_iresearch_trend,
+}
 
+def fetch_all_trends(force=False):
+    """force=True 时丢弃缓存重新加载 (仍与其它并发请求共用同一次加载)。"""
+    if force:
+        _cache.invalidate()
+    out = []
+    for value, meta in _cache.get_many([(key, loader, TREND_TTLS[key]) for key, loader in _LOADERS.items()]):
+        item = dict(value)
+        item["cache"] = meta
+        out.append(item)
+    return out
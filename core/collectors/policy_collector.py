@@ -1,6 +1,38 @@
-import json, os, requests, datetime
+"""
+政策来源采集 (并发 + 变更检测)
+
+- refresh_policies(): 用 SpiderEngine 并发抓取 config/policy_sources.json 中的全部来源,
+  带上次的 ETag / Last-Modified 做条件请求 (304 直接视为未变化)
+- 正文去掉脚本 / 样式 / 标签后按块分行, 计算内容哈希; 哈希变化才算真正的更新,
+  变更以 unified diff 追加到 data/policy_changes.jsonl
+- 每个来源的最新状态 (校验头 / 哈希 / 摘要 / 抓取与变更时间) 保存在 data/state/policy_snapshot.json
+- fetch_latest_policies(): 页面渲染只读取最近一次快照, 无快照时才抓取一次; 定时刷新由 scheduler 负责
+"""
+import os
+import re
+import json
+import time
+import hashlib
+import datetime
+import difflib
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from scrapers.logger import log_info, log_error
 
 CONFIG_PATH = "config/policy_sources.json"
+POLICY_SNAPSHOT_FILE = os.getenv("POLICY_SNAPSHOT_FILE", "data/state/policy_snapshot.json")
+POLICY_CHANGES_FILE = os.getenv("POLICY_CHANGES_FILE", "data/policy_changes.jsonl")
+POLICY_MAX_TEXT = int(os.getenv("POLICY_MAX_TEXT", "20000"))      # 快照中为 diff 保留的正文字符数
+POLICY_DIFF_LINES = int(os.getenv("POLICY_DIFF_LINES", "200"))    # 单次变更最多记录的 diff 行数
+
+_DROP_RE = re.compile(r"<(script|style|noscript|svg)\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+_BLOCK_RE = re.compile(r"<(?:br|/?(?:p|div|li|tr|h[1-6]|section|article|header|footer|ul|ol|table))\b[^>]*>", re.I)
+_TAG_RE = re.compile(r"<[^>]+>")
+_ENTITIES = {"&nbsp;": " ", "&amp;": "&", "&lt;": "<", "&gt;": ">", "&quot;": '"', "&#39;": "'"}
+_lock = threading.Lock()
+
 
 def load_policy_sources():
     if os.path.exists(CONFIG_PATH):
@@ -11,24 +43,141 @@ def load_policy_sources():
         {"country": "UK", "agency": "Department for International Trade", "endpoint": "https://www.gov.uk"}
     ]
 
+
+def _credibility(endpoint: str) -> float:
+    return 0.97 if "gov" in endpoint else 0.85
+
+
+def visible_text(html: str) -> str:
+    """去掉脚本 / 样式 / 标签, 按块级元素分行; 用于哈希与 diff (不受内联脚本中随机值影响)。"""
+    text = _BLOCK_RE.sub("\n", _DROP_RE.sub(" ", html))
+    text = _TAG_RE.sub(" ", text)
+    for k, v in _ENTITIES.items():
+        text = text.replace(k, v)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# ---------- 快照 ----------
+def load_snapshot() -> Dict[str, Any]:
+    if os.path.exists(POLICY_SNAPSHOT_FILE):
+        try:
+            with open(POLICY_SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log_error(f"[POLICY] 读取快照失败: {repr(e)}")
+    return {"scanned_at": None, "sources": {}}
+
+
+def _save_snapshot(snap: Dict[str, Any]):
+    os.makedirs(os.path.dirname(POLICY_SNAPSHOT_FILE), exist_ok=True)
+    tmp = POLICY_SNAPSHOT_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snap, f, ensure_ascii=False)
+    os.replace(tmp, POLICY_SNAPSHOT_FILE)
+
+
+def _append_changes(changes: List[Dict[str, Any]]):
+    if not changes:
+        return
+    os.makedirs(os.path.dirname(POLICY_CHANGES_FILE) or ".", exist_ok=True)
+    with open(POLICY_CHANGES_FILE, "a", encoding="utf-8") as f:
+        for c in changes:
+            f.write(json.dumps(c, ensure_ascii=False) + "\n")
+
+
+def _diff(old: str, new: str) -> List[str]:
+    lines = list(difflib.unified_diff(old.splitlines(), new.splitlines(), "before", "after", lineterm="", n=1))
+    if len(lines) > POLICY_DIFF_LINES:
+        lines = lines[:POLICY_DIFF_LINES] + [f"... ({len(lines) - POLICY_DIFF_LINES} more lines)"]
+    return lines
+
+
+# ---------- 抓取 ----------
+def refresh_policies(sources: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """并发扫描全部来源, 更新快照并记录真实变更; 返回本次扫描汇总。"""
+    from .spider_engine import get_spider_engine
+
+    sources = sources if sources is not None else load_policy_sources()
+    engine = get_spider_engine()
+    start = time.time()
+    with _lock:
+        snap = load_snapshot()
+        by_url = {src["endpoint"]: src for src in sources}
+        entries = {url: e for url, e in snap["sources"].items() if url in by_url}  # 已从配置移除的来源不再保留
+        snap["sources"] = entries
+        # 校验头只在本次调用中传给引擎, 不写入共享引擎 (其他调用方抓同一 URL 时不会收到 304)
+        validators = {url: {"etag": e.get("etag"), "last_modified": e.get("last_modified")}
+                      for url, e in entries.items() if e.get("etag") or e.get("last_modified")}
+
+        now = datetime.datetime.utcnow().isoformat()
+        changes: List[Dict[str, Any]] = []
+        summary = {"scanned": 0, "changed": 0, "unchanged": 0, "not_modified": 0, "errors": 0}
+        for res in engine.iter_collect(list(by_url), validators=validators):
+            src = by_url[res.url]
+            entry = entries.get(res.url) or {"first_seen": now}
+            entry.update({"source": src, "checked_at": now, "http_status": res.status,
+                          "credibility": _credibility(res.url), "elapsed": res.elapsed})
+            summary["scanned"] += 1
+            if not res.ok:
+                entry["error"] = res.error
+                entry["credibility"] = 0.4
+                summary["errors"] += 1
+            elif res.not_modified:
+                entry.pop("error", None)
+                summary["not_modified"] += 1
+            else:
+                entry.pop("error", None)
+                text = visible_text(res.text or "")
+                digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                entry.update({"etag": res.etag, "last_modified": res.last_modified, "fetched_at": now})
+                if digest == entry.get("hash"):
+                    summary["unchanged"] += 1
+                else:
+                    if entry.get("hash"):
+                        changes.append({"endpoint": res.url, "agency": src.get("agency"), "changed_at": now,
+                                        "old_hash": entry["hash"], "new_hash": digest,
+                                        "diff": _diff(entry.get("text", ""), text[:POLICY_MAX_TEXT])})
+                    summary["changed"] += 1
+                    entry.update({"hash": digest, "text": text[:POLICY_MAX_TEXT], "snippet": text[:600],
+                                  "changed_at": now})
+            entries[res.url] = entry
+
+        snap["scanned_at"] = now
+        _save_snapshot(snap)
+        _append_changes(changes)
+    summary["secs"] = round(time.time() - start, 3)
+    summary["changes"] = changes
+    log_info(f"[POLICY] scanned={summary['scanned']} changed={summary['changed']} "
+             f"not_modified={summary['not_modified']} unchanged={summary['unchanged']} "
+             f"errors={summary['errors']} secs={summary['secs']}",
+             stage="policy", items=summary["changed"], duration=summary["secs"])
+    return summary
+
+
 def fetch_latest_policies():
-    """获取全球政策更新并做来源权威验证"""
+    """返回最近一次快照中的各来源状态 (无快照时先扫描一次); 字段与旧版一致并附带变更时间。"""
+    snap = load_snapshot()
+    if not snap["sources"]:
+        refresh_policies()
+        snap = load_snapshot()
+    out = []
+    for entry in snap["sources"].values():
+        item = {k: v for k, v in entry.items() if k not in ("text", "etag", "last_modified", "hash")}
+        out.append(item)
+    return out
+
+
+def recent_changes(limit: int = 20) -> List[Dict[str, Any]]:
+    """最近的变更记录 (新到旧)。"""
+    if not os.path.exists(POLICY_CHANGES_FILE):
+        return []
+    with open(POLICY_CHANGES_FILE, "r", encoding="utf-8") as f:
+        lines = deque(f, maxlen=limit)
     out = []
-    for src in load_policy_sources():
+    for line in reversed(lines):
         try:
-            r = requests.get(src["endpoint"], timeout=10)
-            r.raise_for_status() # Raise an exception for bad status codes
-            out.append({
-                "source": src,
-                "http_status": r.status_code,
-                "credibility": 0.97 if "gov" in src["endpoint"] else 0.85,
-                "fetched_at": datetime.datetime.utcnow().isoformat(),
-                "snippet": r.text[:600]
-            })
-        except Exception as e:
-            out.append({
-                "source": src,
-                "error": str(e),
-                "credibility": 0.4
-            })
-    return out
\ No newline at end of file
+            out.append(json.loads(line))
+        except ValueError:
+            continue
+    return out
@@ -1,18 +1,289 @@
-import asyncio, aiohttp
+"""
+通用异步抓取引擎 (aiohttp)
+
+- 复用同一个 ClientSession / TCPConnector: 总连接数 SPIDER_CONCURRENCY, 每个主机 SPIDER_PER_HOST,
+  DNS 缓存 SPIDER_DNS_TTL 秒, keep-alive 复用连接; 同步接口 collect() 在引擎自有的后台事件循环中执行,
+  多次调用 (含 Streamlit 每次重跑) 共用连接池
+- 失败重试: 连接错误 / 超时 / 429 / 5xx 按指数退避 + 随机抖动重试 SPIDER_RETRIES 次, 遵守 Retry-After
+- 响应体上限 SPIDER_MAX_BYTES, 超出部分不再读取 (truncated=True)
+- 条件请求 (默认关闭): 调用方按次传入 validators (url -> {"etag", "last_modified"}), 请求带
+  If-None-Match / If-Modified-Since, 304 时 not_modified=True 且不传输正文; 引擎本身不记录校验头,
+  共享引擎的其他调用方 (原型测试页) 总能拿到正文; 新的校验头在 FetchResult.etag / last_modified 中返回
+- 返回 FetchResult (状态码 / 耗时 / 字节数 / 错误等), 不再返回裸字符串或异常对象
+- 流式接口 stream() (async) / iter_collect() (同步): 按完成顺序逐个产出, 在途请求数有上限,
+  URL 可以是惰性迭代器, 内存占用与 URL 总数无关; collect() 仍一次返回全部结果 (与 urls 顺序一致)
+"""
+import os
+import time
+import random
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional
+
+import aiohttp
+
+from scrapers.logger import log_info, log_error
+
+SPIDER_CONCURRENCY = int(os.getenv("SPIDER_CONCURRENCY", "16"))
+SPIDER_PER_HOST = int(os.getenv("SPIDER_PER_HOST", "4"))
+SPIDER_TIMEOUT = float(os.getenv("SPIDER_TIMEOUT", "15"))
+SPIDER_CONNECT_TIMEOUT = float(os.getenv("SPIDER_CONNECT_TIMEOUT", "5"))
+SPIDER_RETRIES = int(os.getenv("SPIDER_RETRIES", "2"))
+SPIDER_BACKOFF = float(os.getenv("SPIDER_BACKOFF", "0.5"))
+SPIDER_MAX_BACKOFF = float(os.getenv("SPIDER_MAX_BACKOFF", "10"))
+SPIDER_MAX_BYTES = int(os.getenv("SPIDER_MAX_BYTES", str(2 * 1024 * 1024)))
+SPIDER_DNS_TTL = int(os.getenv("SPIDER_DNS_TTL", "300"))
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/122.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9,zh-CN;q=0.8",
+}
+_RETRY_STATUS = (429, 500, 502, 503, 504)
+_CHUNK = 64 * 1024
+Validators = Mapping[str, Mapping[str, Optional[str]]]   # url -> {"etag", "last_modified"}
+
+
+class FetchResult:
+    """单个 URL 的抓取结果。ok 表示拿到 2xx 正文或 304 未变化。"""
+
+    __slots__ = ("url", "final_url", "status", "text", "bytes", "elapsed", "attempts", "error",
+                 "truncated", "not_modified", "etag", "last_modified", "content_type")
+
+    def __init__(self, url: str):
+        self.url = url
+        self.final_url = url
+        self.status: Optional[int] = None
+        self.text: Optional[str] = None
+        self.bytes = 0
+        self.elapsed = 0.0
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.truncated = False
+        self.not_modified = False
+        self.etag: Optional[str] = None
+        self.last_modified: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status is not None and (200 <= self.status < 300 or self.not_modified)
+
+    def to_dict(self, with_text: bool = False) -> Dict[str, Any]:
+        doc = {k: getattr(self, k) for k in self.__slots__ if k != "text"}
+        doc["ok"] = self.ok
+        if with_text:
+            doc["text"] = self.text
+        return doc
+
+    def __repr__(self):
+        return (f"FetchResult(url={self.url!r}, status={self.status}, bytes={self.bytes}, "
+                f"elapsed={self.elapsed}, error={self.error!r})")
+
+
+def _retry_after(headers) -> Optional[float]:
+    value = headers.get("Retry-After")
+    if value and value.strip().isdigit():
+        return min(float(value), SPIDER_MAX_BACKOFF)
+    return None
+
+
+def _backoff(attempt: int) -> float:
+    # 指数退避 + 抖动, 避免大量失败请求同时重试
+    return min(SPIDER_MAX_BACKOFF, SPIDER_BACKOFF * (2 ** attempt)) * random.uniform(0.5, 1.5)
+
 
 class SpiderEngine:
-    def __init__(self, concurrency=4):
-        self.semaphore = asyncio.Semaphore(concurrency)
+    def __init__(self, concurrency: int = SPIDER_CONCURRENCY, per_host: int = SPIDER_PER_HOST,
+                 timeout: float = SPIDER_TIMEOUT, retries: int = SPIDER_RETRIES, max_bytes: int = SPIDER_MAX_BYTES,
+                 headers: Optional[Dict[str, str]] = None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=SPIDER_CONNECT_TIMEOUT)
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    # ---------- 会话 ----------
+    async def _get_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency,
+                limit_per_host=self.per_host,
+                ttl_dns_cache=SPIDER_DNS_TTL,
+                keepalive_timeout=30,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout, headers=self.headers)
+            self._session_loop = loop
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    # ---------- 抓取 ----------
+    @staticmethod
+    def _conditional_headers(url: str, validators: Optional[Validators]) -> Dict[str, str]:
+        v = validators.get(url) if validators else None
+        headers = {}
+        if v:
+            if v.get("etag"):
+                headers["If-None-Match"] = v["etag"]
+            if v.get("last_modified"):
+                headers["If-Modified-Since"] = v["last_modified"]
+        return headers
+
+    async def _read_capped(self, r: aiohttp.ClientResponse, res: FetchResult) -> bytes:
+        chunks, size = [], 0
+        async for chunk in r.content.iter_chunked(_CHUNK):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                res.truncated = True
+                break
+        return b"".join(chunks)[:self.max_bytes]
+
+    async def fetch(self, url: str, validators: Optional[Validators] = None) -> FetchResult:
+        """抓取单个 URL, 不抛出异常 (错误记录在 FetchResult.error)。validators 中有该 URL 时发条件请求。"""
+        session = await self._get_session()
+        res = FetchResult(url)
+        start = time.perf_counter()
+        for attempt in range(self.retries + 1):
+            res.attempts = attempt + 1
+            res.error = None
+            wait = None
+            try:
+                async with session.get(url, headers=self._conditional_headers(url, validators)) as r:
+                    res.status = r.status
+                    res.final_url = str(r.url)
+                    res.content_type = r.headers.get("Content-Type")
+                    if r.status == 304:
+                        res.not_modified = True
+                    elif r.status in _RETRY_STATUS and attempt < self.retries:
+                        wait = _retry_after(r.headers)
+                        wait = _backoff(attempt) if wait is None else wait
+                    else:
+                        body = await self._read_capped(r, res)
+                        res.bytes = len(body)
+                        res.text = body.decode(r.get_encoding() if r.charset else "utf-8", errors="replace")
+                        if 200 <= r.status < 300:
+                            res.etag = r.headers.get("ETag")
+                            res.last_modified = r.headers.get("Last-Modified")
+                        else:
+                            res.error = f"status={r.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                res.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                if attempt < self.retries:
+                    wait = _backoff(attempt)
+            except Exception as e:
+                res.error = repr(e)
+            if wait is None:
+                break
+            await asyncio.sleep(wait)
+        res.elapsed = round(time.perf_counter() - start, 3)
+        if res.error:
+            log_error(f"[SPIDER] {url} error={res.error} attempts={res.attempts}",
+                      url=url, stage="spider", duration=res.elapsed, status=res.status)
+        else:
+            log_info(f"[SPIDER] {url} status={res.status} bytes={res.bytes} secs={res.elapsed}",
+                     url=url, stage="spider", duration=res.elapsed, status=res.status, bytes=res.bytes)
+        return res
+
+    async def run(self, urls: List[str], validators: Optional[Validators] = None) -> List[FetchResult]:
+        """并发抓取 (并发度由连接池限制), 结果顺序与 urls 一致。"""
+        return list(await asyncio.gather(*(self.fetch(u, validators) for u in urls)))
+
+    async def stream(self, urls: Iterable[str], validators: Optional[Validators] = None,
+                     max_in_flight: Optional[int] = None) -> AsyncIterator[FetchResult]:
+        """
+        按完成顺序产出结果。同时在途的请求不超过 max_in_flight (默认为连接池大小),
+        消费方取走一个结果后才补充下一个 URL, 未取走的结果最多 max_in_flight 个。
+        """
+        limit = max(1, max_in_flight or self.concurrency)
+        it = iter(urls)
+        pending = set()
+
+        def fill():
+            while len(pending) < limit:
+                url = next(it, None)
+                if url is None:
+                    return
+                pending.add(asyncio.ensure_future(self.fetch(url, validators)))
+
+        fill()
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+                fill()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    # ---------- 同步接口 ----------
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="spider-loop", daemon=True).start()
+            return self._loop
+
+    def call(self, coro):
+        """在引擎的后台事件循环中执行协程并等待结果 (可在 Streamlit 等已有事件循环的线程中调用)。"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    def collect(self, urls: List[str], validators: Optional[Validators] = None) -> List[FetchResult]:
+        start = time.time()
+        results = self.call(self.run(urls, validators))
+        ok = sum(1 for r in results if r.ok)
+        log_info(f"[SPIDER] collect urls={len(urls)} ok={ok} secs={round(time.time() - start, 3)}",
+                 stage="spider", items=ok, duration=round(time.time() - start, 3))
+        return results
+
+    def iter_collect(self, urls: Iterable[str], validators: Optional[Validators] = None,
+                     max_in_flight: Optional[int] = None) -> Iterator[FetchResult]:
+        """stream() 的同步版本 (Streamlit 用): 逐个取结果, 提前结束迭代时取消剩余请求。"""
+        loop = self._ensure_loop()
+        agen = self.stream(urls, validators, max_in_flight)
+        start, count, ok = time.time(), 0, 0
+        try:
+            while True:
+                try:
+                    res = asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    break
+                count += 1
+                ok += res.ok
+                yield res
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+            secs = round(time.time() - start, 3)
+            log_info(f"[SPIDER] stream urls={count} ok={ok} secs={secs}", stage="spider", items=ok, duration=secs)
+
+    def close(self):
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+
 
-    async def fetch_one(self, session, url):
-        async with self.semaphore:
-            async with session.get(url, timeout=15) as r:
-                return await r.text()
+_engine: Optional[SpiderEngine] = None
+_engine_lock = threading.Lock()
 
-    async def run(self, urls):
-        async with aiohttp.ClientSession() as s:
-            tasks = [self.fetch_one(s,u) for u in urls]
-            return await asyncio.gather(*tasks, return_exceptions=True)
 
-    def collect(self, urls):
-        return asyncio.run(self.run(urls))
+def get_spider_engine() -> SpiderEngine:
+    """进程内共享的引擎 (连接池跨调用复用)。"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SpiderEngine()
+        return _engine
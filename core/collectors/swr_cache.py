@@ -0,0 +1,107 @@
+"""
+进程内共享的 stale-while-revalidate 缓存
+
+- 每个 key 独立 TTL; 新鲜时直接返回缓存
+- 过期后仍立即返回旧值, 同时在后台线程刷新 (同一 key 同时最多一个刷新任务)
+- 无缓存时同步加载; 多个会话 / 线程同时请求同一 key 时共用一次上游请求 (single-flight)
+- 刷新失败时保留旧值, 并在元数据中记录错误
+每个返回值附带元数据: key / fetched_at / age (秒) / ttl / stale / refreshing / error。
+"""
+import time
+import datetime
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from scrapers.logger import log_info, log_error
+
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "error")
+
+    def __init__(self, value: Any, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.error: Optional[str] = None
+
+
+class SWRCache:
+    def __init__(self, name: str = "swr", max_workers: int = 4):
+        self.name = name
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-refresh")
+
+    def _load(self, key: str, loader: Callable[[], Any]):
+        start = time.time()
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.error = repr(e)
+                self._inflight.pop(key, None)
+            log_error(f"[CACHE] {self.name}/{key} 刷新失败: {repr(e)}")
+            raise
+        with self._lock:
+            # 先写入新值再移除刷新标记, 期间的读取不会重复触发加载
+            self._entries[key] = _Entry(value, time.time())
+            self._inflight.pop(key, None)
+        log_info(f"[CACHE] {self.name}/{key} refreshed secs={round(time.time() - start, 3)}",
+                 stage="cache", duration=round(time.time() - start, 3))
+        return value
+
+    def _refresh(self, key: str, loader: Callable[[], Any]) -> Future:
+        """提交刷新任务; 已有刷新在进行时返回同一个 Future。调用方需持有 self._lock。"""
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = self._inflight[key] = self._pool.submit(self._load, key, loader)
+        return fut
+
+    def _meta(self, key: str, ttl: float, entry: _Entry) -> Dict[str, Any]:
+        age = time.time() - entry.fetched_at
+        return {
+            "key": key,
+            "fetched_at": datetime.datetime.utcfromtimestamp(entry.fetched_at).isoformat(),
+            "age": round(age, 1),
+            "ttl": ttl,
+            "stale": age > ttl,
+            "refreshing": key in self._inflight,
+            "error": entry.error,
+        }
+
+    def get_many(self, specs: List[Tuple[str, Callable[[], Any], float]],
+                 timeout: Optional[float] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+        """
+        specs: [(key, loader, ttl_seconds)]。返回 [(value, meta)], 顺序与 specs 一致。
+        缺失的 key 并行加载并等待; 过期的 key 立即返回旧值并在后台刷新。
+        """
+        waits: Dict[str, Future] = {}
+        with self._lock:
+            for key, loader, ttl in specs:
+                entry = self._entries.get(key)
+                if entry is None:
+                    waits[key] = self._refresh(key, loader)
+                elif time.time() - entry.fetched_at > ttl:
+                    self._refresh(key, loader)
+        for key, fut in waits.items():
+            fut.result(timeout)  # 首次加载失败时抛出
+        out = []
+        with self._lock:
+            for key, _, ttl in specs:
+                entry = self._entries[key]
+                out.append((entry.value, self._meta(key, ttl, entry)))
+        return out
+
+    def get(self, key: str, loader: Callable[[], Any], ttl: float,
+            timeout: Optional[float] = None) -> Tuple[Any, Dict[str, Any]]:
+        return self.get_many([(key, loader, ttl)], timeout)[0]
+
+    def invalidate(self, key: Optional[str] = None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,212 @@
+"""
+批量采集调度器
+
+把 URL 列表分发到多进程 scrape_amazon worker:
+- 共享任务队列, worker 空闲时才分派下一个 URL (长短任务自动均衡, 主进程始终知道每个 URL 在哪个 worker)
+- 每个 worker 进程内复用同一个浏览器池 (keep_browser_pool), 整批任务每个 worker 只启动一次 Chromium:
+  列表页用的 sync 浏览器与详情页并发用的 async 浏览器各一个 (按代理区分), 跨 URL 复用
+- 单 URL 超时 (per_url_timeout): 主进程监控, 超时的 worker 连同其浏览器进程树被终止并替换, 该 URL 记为 timeout
+- worker 异常退出同样会被替换, 不影响剩余任务
+- 每个 worker 独占一条结果管道: 被强制终止的 worker 可能停在写入中途, 共享 Queue 的写锁会随之永久占用并卡住其它 worker
+- 在后台任务进程内运行时 worker 数不超过该任务分到的预算 (core.job_runner.job_worker_cap)
+- 按域名限速由各 worker 共用同一个跨进程令牌桶 (rate_limiter 的 RATE_SHARED_DB), 整批的请求速率与单进程一致
+- 返回汇总: 成功 / 失败 / 超时数量、采集条数、吞吐量与每个 URL 的明细
+
+使用 spawn 启动 (Windows 与 Playwright 均要求), 调用方需位于 if __name__ == "__main__" 保护下。
+"""
+import os
+import time
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from scrapers.logger import log_info, log_error, share_logging
+from .process_tree import kill_tree
+from core.job_runner import job_worker_cap
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))              # 0 = 按 CPU 核数
+BATCH_URL_TIMEOUT = float(os.getenv("BATCH_URL_TIMEOUT", "900"))  # 单个 URL 最长耗时 (秒)
+
+
+def _worker_main(worker_id: int, inbox, result_conn, scrape_kwargs: Dict[str, Any],
+                 scraper: str = "scrapers.amazon_scraper:scrape_amazon"):
+    import importlib
+    from scrapers.browser_pool import keep_browser_pool
+
+    module, _, func = scraper.partition(":")
+    scrape_amazon = getattr(importlib.import_module(module), func)
+
+    with keep_browser_pool():
+        result_conn.send(("ready", worker_id, None, None))
+        while True:
+            task = inbox.get()
+            if task is None:
+                break
+            idx, url = task
+            start = time.time()
+            try:
+                data = scrape_amazon(url, **scrape_kwargs)
+                outcome = {"items": len(data), "error": None if data else "empty"}
+            except Exception as e:
+                outcome = {"items": 0, "error": repr(e)}
+            outcome["secs"] = round(time.time() - start, 3)
+            result_conn.send(("done", worker_id, idx, outcome))
+
+
+def _default_workers(n_urls: int) -> int:
+    n = BATCH_WORKERS or (os.cpu_count() or 1)
+    return max(1, min(n, n_urls))
+
+
+def run_batch(
+    urls: List[str],
+    storage_mode: str = "local",
+    workers: Optional[int] = None,
+    per_url_timeout: Optional[float] = None,
+    on_result: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+    scraper: str = "scrapers.amazon_scraper:scrape_amazon",
+    **scrape_kwargs
+) -> Dict[str, Any]:
+    """
+    并行采集 urls; scrape_kwargs 透传给 scrape_amazon (max_items / deep_detail / use_proxy / headless ...)。
+    scraper: worker 内调用的采集函数 ("模块:函数", 签名同 scrape_amazon)。
+    on_result(outcome, done, total): 每个 URL 完成 (含失败 / 超时) 时回调, 供后台任务汇报进度。
+    """
+    urls = [u for u in dict.fromkeys(u.strip() for u in urls) if u]
+    if not urls:
+        return {"urls": 0, "ok": 0, "failed": 0, "timeouts": 0, "items": 0, "secs": 0.0, "results": []}
+
+    workers = job_worker_cap(min(workers or _default_workers(len(urls)), len(urls)))
+    per_url_timeout = per_url_timeout or BATCH_URL_TIMEOUT
+    scrape_kwargs["storage_mode"] = storage_mode
+
+    share_logging()                       # worker 日志转发给主进程写文件
+    ctx = mp.get_context("spawn")
+    pending = deque(range(len(urls)))     # 共享任务队列: 由主进程按 worker 的 ready/done 消息分派
+    procs: Dict[int, Any] = {}
+    inboxes: Dict[int, Any] = {}
+    conns: Dict[int, Any] = {}            # worker_id -> 结果管道读端
+    running: Dict[int, tuple] = {}        # worker_id -> (idx, dispatched_at)
+    results: Dict[int, Dict[str, Any]] = {}
+    next_id = 0
+
+    def spawn():
+        nonlocal next_id
+        wid = next_id
+        next_id += 1
+        inboxes[wid] = ctx.Queue()
+        reader, writer = ctx.Pipe(duplex=False)
+        p = ctx.Process(target=_worker_main, args=(wid, inboxes[wid], writer, scrape_kwargs, scraper),
+                        name=f"crawl-worker-{wid}", daemon=True)
+        p.start()
+        writer.close()  # 主进程不保留写端, worker 退出后读端即可收到 EOF
+        procs[wid] = p
+        conns[wid] = reader
+
+    def dispatch(wid: int):
+        if wid not in procs:
+            return
+        if pending:
+            idx = pending.popleft()
+            running[wid] = (idx, time.time())
+            inboxes[wid].put((idx, urls[idx]))
+        else:
+            inboxes[wid].put(None)
+
+    def finish(idx: int, wid: int, outcome: Dict[str, Any]):
+        if idx in results:
+            return
+        outcome.update({"url": urls[idx], "worker": wid})
+        results[idx] = outcome
+        status = "OK" if not outcome.get("error") else outcome["error"]
+        log_info(f"[BATCH] ({len(results)}/{len(urls)}) {urls[idx]} items={outcome['items']} "
+                 f"secs={outcome.get('secs')} {status}",
+                 url=urls[idx], stage="batch", duration=outcome.get("secs"), items=outcome["items"],
+                 error=outcome.get("error"))
+        if on_result is not None:
+            on_result(outcome, len(results), len(urls))
+
+    def _close_conn(wid: int):
+        conn = conns.pop(wid, None)
+        if conn is not None:
+            conn.close()
+
+    def replace(wid: int, reason: str):
+        p = procs.pop(wid)
+        if p.is_alive():
+            kill_tree(p.pid)  # 连同该 worker 启动的 Chromium 一起终止, 避免孤儿浏览器
+        p.join(5)
+        inboxes.pop(wid, None)
+        _close_conn(wid)
+        task = running.pop(wid, None)
+        if task is not None:
+            idx, started = task
+            finish(idx, wid, {"items": 0, "error": reason, "secs": round(time.time() - started, 3)})
+        if pending:
+            spawn()
+
+    batch_start = time.time()
+    log_info(f"[BATCH] 开始: urls={len(urls)} workers={workers} timeout={per_url_timeout}s")
+    for _ in range(workers):
+        spawn()
+
+    try:
+        while len(results) < len(urls):
+            owners = {conn: wid for wid, conn in conns.items()}
+            for conn in wait(list(owners), timeout=1.0):
+                try:
+                    kind, wid, idx, payload = conn.recv()
+                except (EOFError, OSError):
+                    _close_conn(owners[conn])  # worker 已退出, 由下方存活检查处理
+                    continue
+                if kind == "done":
+                    running.pop(wid, None)
+                    finish(idx, wid, payload)
+                dispatch(wid)
+
+            now = time.time()
+            for wid, (idx, started) in list(running.items()):
+                if now - started > per_url_timeout:
+                    log_error(f"[BATCH] 超时 {urls[idx]} ({round(now - started)}s), 替换 worker-{wid}")
+                    replace(wid, "timeout")
+            for wid, p in list(procs.items()):
+                if not p.is_alive():
+                    if wid in running or p.exitcode != 0:
+                        log_error(f"[BATCH] worker-{wid} 异常退出 exitcode={p.exitcode}")
+                        replace(wid, f"worker_crash exitcode={p.exitcode}")
+                    else:
+                        procs.pop(wid)  # 收到结束标记后正常退出
+                        _close_conn(wid)
+            if not procs and pending:
+                spawn()
+    finally:
+        for wid in list(procs):
+            if wid in inboxes:
+                inboxes[wid].put(None)
+        for p in procs.values():
+            p.join(10)
+            if p.is_alive():
+                kill_tree(p.pid)
+                p.join(5)
+        for wid in list(conns):
+            _close_conn(wid)
+
+    elapsed = time.time() - batch_start
+    rows = [results[i] for i in range(len(urls))]
+    items = sum(r["items"] for r in rows)
+    summary = {
+        "urls": len(urls),
+        "workers": workers,
+        "ok": sum(1 for r in rows if not r.get("error")),
+        "failed": sum(1 for r in rows if r.get("error") and r["error"] != "timeout"),
+        "timeouts": sum(1 for r in rows if r.get("error") == "timeout"),
+        "items": items,
+        "secs": round(elapsed, 3),
+        "items_per_sec": round(items / elapsed, 3) if elapsed else None,
+        "urls_per_min": round(len(urls) * 60 / elapsed, 2) if elapsed else None,
+        "results": rows,
+    }
+    log_info(f"[BATCH] 完成: ok={summary['ok']} failed={summary['failed']} timeouts={summary['timeouts']} "
+             f"items={items} secs={summary['secs']} items/s={summary['items_per_sec']}")
+    return summary
@@ -0,0 +1,101 @@
+"""
+进程树终止
+
+Process.terminate() 只结束目标进程本身, 它启动的 Chromium / Playwright 驱动 / 批量 worker 会成为孤儿进程。
+kill_tree(pid) 先收集全部后代进程 (父进程退出后子进程会被重新挂到 init, 必须在终止前收集),
+再依次 terminate → 等待 grace 秒 → kill 仍存活的进程。
+
+后代进程的查找顺序: psutil (可选依赖) → Windows taskkill /T → Linux /proc。
+"""
+import os
+import sys
+import time
+import signal
+import subprocess
+from typing import Dict, List
+
+from scrapers.logger import log_info, log_error
+
+try:
+    import psutil  # 可选: 跨平台枚举子进程
+except ImportError:
+    psutil = None
+
+
+def _children_from_proc() -> Dict[int, List[int]]:
+    """Linux: 从 /proc/<pid>/stat 读取父进程号, 返回 ppid -> [pid]。"""
+    tree: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "rb") as f:
+                stat = f.read().decode("utf-8", errors="replace")
+            ppid = int(stat.rsplit(")", 1)[1].split()[1])  # 进程名可能包含空格与括号
+        except (OSError, IndexError, ValueError):
+            continue
+        tree.setdefault(ppid, []).append(int(name))
+    return tree
+
+
+def descendants(pid: int) -> List[int]:
+    """pid 的全部后代进程号 (不含 pid 本身)。"""
+    if psutil is not None:
+        try:
+            return [c.pid for c in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir("/proc"):
+        return []
+    tree = _children_from_proc()
+    out, stack = [], list(tree.get(pid, []))
+    while stack:
+        child = stack.pop()
+        out.append(child)
+        stack.extend(tree.get(child, []))
+    return out
+
+
+def _alive(pid: int) -> bool:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:  # 已退出但未被回收的僵尸进程视为不存活
+            return f.read().rsplit(b")", 1)[1].split()[0] != b"Z"
+    except (OSError, IndexError):
+        return True
+
+
+def _signal(pid: int, sig):
+    try:
+        os.kill(pid, sig)
+    except OSError:
+        pass
+
+
+def kill_tree(pid: int, grace: float = 5.0) -> int:
+    """终止 pid 及其全部后代进程, 返回被终止的进程数。"""
+    if sys.platform == "win32" and psutil is None:
+        # taskkill /T 按进程树终止 (Chromium 的 GPU / 渲染子进程一并结束)
+        result = subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+        if result.returncode not in (0, 128):
+            log_error(f"[PROC] taskkill {pid} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return 1
+    pids = [pid] + descendants(pid)
+    for p in pids:
+        _signal(p, signal.SIGTERM)
+    deadline = time.time() + grace
+    while time.time() < deadline and any(_alive(p) for p in pids):
+        time.sleep(0.1)
+    survivors = [p for p in pids if _alive(p)]
+    for p in survivors:
+        _signal(p, getattr(signal, "SIGKILL", signal.SIGTERM))
+    log_info(f"[PROC] 终止进程树 pid={pid} procs={len(pids)} killed={len(survivors)}")
+    return len(pids)
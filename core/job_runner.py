@@ -0,0 +1,301 @@
+"""
+后台任务 (Job) 运行器
+
+Streamlit 页面不再在脚本内直接执行采集 / 迭代:
+- submit(target, **params) 立即返回 job_id; 任务在独立的 spawn 子进程中执行, 页面交互 / 重跑不会中断任务
+- 全局并发上限 JOB_MAX_CONCURRENT (进程内共享, Streamlit 所有会话共用同一个运行器), 超出的任务排队
+- 全局 worker 预算 JOB_WORKER_BUDGET (默认 CPU 核数) 按并发槽位均分: 每个任务进程通过环境变量 JOB_WORKERS
+  得到 budget // JOB_MAX_CONCURRENT 个 worker, 批量采集 / 变体搜索据此限制自己创建的子进程数 (job_worker_cap)
+- 取消任务时终止整棵进程树 (任务进程 + 批量 worker + Chromium), 不留孤儿进程
+- 任务目录 data/jobs/<job_id>/:
+    status.json    状态 queued / running / done / failed / cancelled、进度、结果摘要、错误 (原子替换写入)
+    log.txt        任务进程内 scrapers 日志与 ctx.log() 输出
+    partial.jsonl  任务执行中逐条产出的部分结果 (ctx.partial)
+- get_job / read_log(job_id, offset) / read_partial 可随时轮询, 也可在其它会话中查看同一任务
+target 为 "模块:函数", 函数签名 fn(ctx, **params), 返回值需可 JSON 序列化; 内置 crawl_single / crawl_batch / iterate_once。
+"""
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import traceback
+import multiprocessing as mp
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from scrapers.logger import log_info, log_error, share_logging
+from core.crawl.process_tree import kill_tree
+
+JOB_DIR = os.getenv("JOB_DIR", "data/jobs")
+JOB_MAX_CONCURRENT = int(os.getenv("JOB_MAX_CONCURRENT", "2"))
+JOB_KEEP = int(os.getenv("JOB_KEEP", "50"))          # 保留最近多少个任务目录
+JOB_WORKER_BUDGET = int(os.getenv("JOB_WORKER_BUDGET", "0"))   # 所有任务子进程总数上限, 0 = 按 CPU 核数
+
+TERMINAL = ("done", "failed", "cancelled")
+
+
+def _job_path(job_id: str, name: str = "") -> str:
+    return os.path.join(JOB_DIR, job_id, name)
+
+
+def _write_status(job_id: str, status: Dict[str, Any]):
+    path = _job_path(job_id, "status.json")
+    tmp = path + f".{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(status, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_job_path(job_id, "status.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_jobs(limit: int = 20) -> List[Dict[str, Any]]:
+    if not os.path.isdir(JOB_DIR):
+        return []
+    ids = sorted(os.listdir(JOB_DIR), reverse=True)[:limit]
+    return [s for s in (get_job(i) for i in ids) if s]
+
+
+def read_log(job_id: str, offset: int = 0, max_bytes: int = 64 * 1024) -> Tuple[str, int]:
+    """从 offset 开始读取任务日志, 返回 (新增文本, 新 offset); 用于增量轮询。"""
+    path = _job_path(job_id, "log.txt")
+    if not os.path.exists(path):
+        return "", offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        chunk = f.read(max_bytes)
+    return chunk.decode("utf-8", errors="replace"), offset + len(chunk)
+
+
+def read_partial(job_id: str, limit: int = 200) -> List[Any]:
+    """最近 limit 条部分结果。"""
+    path = _job_path(job_id, "partial.jsonl")
+    if not os.path.exists(path):
+        return []
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in deque(f, maxlen=limit):
+            try:
+                out.append(json.loads(line))
+            except ValueError:
+                continue
+    return out
+
+
+# ---------- 任务进程 ----------
+class JobContext:
+    """传给任务函数, 用于汇报进度 / 部分结果 / 日志。"""
+
+    def __init__(self, job_id: str, status: Dict[str, Any]):
+        self.job_id = job_id
+        self.status = status
+        self._last_write = 0.0
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None):
+        self.status["progress"] = {"done": done, "total": total, "message": message}
+        now = time.time()
+        if now - self._last_write >= 0.5 or (total is not None and done >= total):
+            self._last_write = now
+            _write_status(self.job_id, self.status)
+
+    def partial(self, item: Any):
+        with open(_job_path(self.job_id, "partial.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(item, ensure_ascii=False, default=str) + "\n")
+
+    def log(self, message: str):
+        log_info(f"[JOB] {message}", stage="job")
+
+
+def job_worker_cap(n: int) -> int:
+    """在任务进程内把子进程数 n 限制在该任务分到的 worker 预算内; 非任务进程原样返回。"""
+    cap = int(os.getenv("JOB_WORKERS", "0"))
+    return max(1, min(n, cap)) if cap else n
+
+
+def _resolve(target: str):
+    import importlib
+    module, _, func = target.partition(":")
+    return getattr(importlib.import_module(module), func)
+
+
+def _job_main(job_id: str, target: str, params: Dict[str, Any], status: Dict[str, Any], workers: int = 0):
+    if workers:
+        os.environ["JOB_WORKERS"] = str(workers)  # 任务函数及其创建的子进程按此限制并行度
+    # 任务进程内的 scrapers 日志同时写入任务目录
+    handler = logging.FileHandler(_job_path(job_id, "log.txt"), encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logging.getLogger("scrapers").addHandler(handler)
+
+    status.update({"state": "running", "pid": os.getpid(), "started_at": time.time()})
+    _write_status(job_id, status)
+    ctx = JobContext(job_id, status)
+    try:
+        result = _resolve(target)(ctx, **params)
+        status.update({"state": "done", "result": result})
+    except Exception as e:
+        log_error(f"[JOB] {job_id} 失败: {traceback.format_exc()}", stage="job")
+        status.update({"state": "failed", "error": repr(e)})
+    status["finished_at"] = time.time()
+    _write_status(job_id, status)
+    logging.getLogger("scrapers").removeHandler(handler)
+    handler.close()
+
+
+# ---------- 运行器 ----------
+class JobRunner:
+    def __init__(self, max_concurrent: int = JOB_MAX_CONCURRENT, worker_budget: int = JOB_WORKER_BUDGET):
+        self.max_concurrent = max(1, max_concurrent)
+        self.worker_budget = max(1, worker_budget or (os.cpu_count() or 1))
+        # 按槽位静态均分: 同时运行的任务最多 max_concurrent 个, 子进程总数不超过预算
+        self.job_workers = max(1, self.worker_budget // self.max_concurrent)
+        self._ctx = mp.get_context("spawn")
+        self._queue: deque = deque()                  # 排队中的 (job_id, target, params, status)
+        self._procs: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+
+    def submit(self, target: str, label: Optional[str] = None, **params) -> str:
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        os.makedirs(_job_path(job_id), exist_ok=True)
+        status = {"id": job_id, "target": target, "label": label or target, "params": params, "state": "queued",
+                  "created_at": time.time(), "progress": None, "result": None, "error": None}
+        _write_status(job_id, status)
+        with self._lock:
+            self._queue.append((job_id, target, params, status))
+            queued = len(self._queue)
+        log_info(f"[JOB] 提交 {job_id} target={target} queued={queued}", stage="job")
+        self._ensure_monitor()
+        self._schedule()
+        return job_id
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            for task in list(self._queue):
+                if task[0] == job_id:
+                    self._queue.remove(task)
+                    break
+            proc = self._procs.pop(job_id, None)
+        if proc is not None and proc.is_alive():
+            kill_tree(proc.pid)  # terminate() 只结束任务进程, 批量 worker 与 Chromium 会成为孤儿
+            proc.join(5)
+        status = get_job(job_id)
+        if status and status["state"] not in TERMINAL:
+            status.update({"state": "cancelled", "finished_at": time.time()})
+            _write_status(job_id, status)
+            log_info(f"[JOB] 已取消 {job_id}", stage="job")
+            return True
+        return False
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"running": len(self._procs), "queued": len(self._queue), "max_concurrent": self.max_concurrent,
+                    "worker_budget": self.worker_budget, "job_workers": self.job_workers}
+
+    def _schedule(self):
+        with self._lock:
+            while self._queue and len(self._procs) < self.max_concurrent:
+                job_id, target, params, status = self._queue.popleft()
+                share_logging()   # 任务进程 (及其 worker) 的日志转发给本进程写 scraper.log
+                # 非 daemon: 批量采集 / 变体搜索需要在任务进程内再创建子进程
+                proc = self._ctx.Process(target=_job_main, args=(job_id, target, params, status, self.job_workers),
+                                         name=f"job-{job_id}")
+                proc.start()
+                self._procs[job_id] = proc
+                log_info(f"[JOB] 启动 {job_id} pid={proc.pid} running={len(self._procs)} workers={self.job_workers}",
+                         stage="job")
+
+    def _reap(self):
+        with self._lock:
+            finished = [(jid, p) for jid, p in self._procs.items() if not p.is_alive()]
+            for jid, _ in finished:
+                self._procs.pop(jid)
+        for jid, proc in finished:
+            proc.join(1)
+            status = get_job(jid)
+            if status and status["state"] not in TERMINAL:
+                # 进程崩溃 / 被杀死, 未能写入最终状态
+                status.update({"state": "failed", "error": f"exitcode={proc.exitcode}", "finished_at": time.time()})
+                _write_status(jid, status)
+                log_error(f"[JOB] {jid} 异常退出 exitcode={proc.exitcode}", stage="job")
+
+    def _ensure_monitor(self):
+        with self._lock:
+            if self._monitor is not None and self._monitor.is_alive():
+                return
+            self._monitor = threading.Thread(target=self._monitor_loop, name="job-monitor", daemon=True)
+            self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            self._reap()
+            self._schedule()
+            time.sleep(0.5)
+
+
+_runner: Optional[JobRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+            _prune_old_jobs()
+        return _runner
+
+
+def submit_job(target: str, label: Optional[str] = None, **params) -> str:
+    return get_job_runner().submit(target, label, **params)
+
+
+def _prune_old_jobs():
+    if not os.path.isdir(JOB_DIR):
+        return
+    import shutil
+    for job_id in sorted(os.listdir(JOB_DIR), reverse=True)[JOB_KEEP:]:
+        status = get_job(job_id)
+        if status is None or status["state"] in TERMINAL:
+            shutil.rmtree(_job_path(job_id), ignore_errors=True)
+
+
+# ---------- 内置任务 ----------
+def crawl_single(ctx: JobContext, **kwargs):
+    """单页采集 (get_platform_data)。"""
+    from core.data_fetcher import get_platform_data
+
+    ctx.progress(0, 1, "采集中")
+    data = get_platform_data(**kwargs) or []
+    for item in data:
+        ctx.partial(item)
+    ctx.progress(1, 1, f"采集 {len(data)} 条")
+    return {"items": len(data), "preview": data[:10]}
+
+
+def crawl_batch(ctx: JobContext, urls: List[str], **kwargs):
+    """批量采集 (run_batch), 每个 URL 完成即更新进度并写入部分结果。"""
+    from core.crawl.dispatcher import run_batch
+
+    def on_result(outcome, done, total):
+        ctx.partial(outcome)
+        ctx.progress(done, total, f"{outcome['url']} items={outcome['items']}")
+
+    ctx.progress(0, len(urls), "调度中")
+    return run_batch(urls, on_result=on_result, **kwargs)
+
+
+def iterate_once(ctx: JobContext, cfg_path: str = "config/crawler_iter_config.yaml"):
+    """执行一轮爬虫自迭代。"""
+    from core.auto_crawler_iter.iteration_engine import CrawlerIterationEngine
+
+    ctx.progress(0, 1, "迭代中")
+    result = CrawlerIterationEngine(cfg_path).run_once()
+    ctx.progress(1, 1, result.get("status"))
+    return result
@@ -12,10 +12,8 @@ import platform
 # ===== 2. 其他导入 =====
 # =========================================================================
 import streamlit as st
-from datetime import datetime
 import os
 import json
-import socket
 from dotenv import load_dotenv
 
 # 分发相关
@@ -25,18 +23,8 @@ from distribution.telemetry import TelemetrySystem
 # 加载环境变量
 load_dotenv()
 
-# UI 与核心模块
-from ui.dashboard import render_dashboard
-from ui.analytics import render_analytics
-from ui.prototype_view import render_prototype
-from core.collectors.market_collector import fetch_all_trends
-from core.collectors.youtube_collector import fetch_channel_stats
-from core.collectors.policy_collector import fetch_latest_policies
-from ui.api_admin import render_api_admin
-from ui.auto_evolution import render_auto_evolution
-from ui.auto_patch_view import render_auto_patch
-from ui.ai_learning_center import render_ai_learning_center
-from ui.source_attribution import render_sources
+# UI 页面按需导入（见 ui/page_registry.py）
+from ui.page_registry import PAGES, IMPORT_PROFILE, import_stats, load_page
 
 telemetry = None
 
@@ -91,80 +79,21 @@ def main():
     st.title("京盛传媒 企业版智能体")
 
     # ===== 侧边栏菜单 =====
-    menu = st.sidebar.selectbox(
-        "导航",
-        [
-            "主页", "智能分析", "原型测试",
-            "权威数据中心", "数据来源追踪", "YouTube", "TikTok",
-            "Amazon采集工具", "爬虫自迭代",
-            "AI 学习中心", "AI 自主迭代", "AI 自动修复",
-            "API 管理", "政策中心", "系统概览", "日志与设置"
-        ]
-    )
+    menu = st.sidebar.selectbox("导航", list(PAGES))
 
     # 功能使用跟踪
     if telemetry:
         telemetry.track_feature_usage(menu)
 
     # ===== 路由逻辑 =====
-    if menu == "主页":
-        render_dashboard()
-    elif menu == "系统概览":
-        st.header("系统概览")
-        st.metric("主机", socket.gethostname())
-        st.metric("系统", platform.platform())
-        st.metric("时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    elif menu == "智能分析":
-        render_analytics()
-    elif menu == "原型测试":
-        render_prototype()
-    elif menu == "权威数据中心":
-        st.header("权威数据中心")
-        st.info("数据来自：1688 / QuestMobile / 艾瑞 / 易观 等（示例）")
-        for d in fetch_all_trends():
-            st.markdown(
-                f"**来源**：[{d.get('source')}]({d.get('url')})  \n"
-                f"- 时间：{d.get('fetched_at')}  \n"
-                f"- 内容：{d.get('metric', d.get('data',''))}  \n"
-                f"- 权威度：{d.get('credibility','N/A')}"
-            )
-    elif menu == "数据来源追踪":
-        render_sources()
-    elif menu == "YouTube":
-        st.header("YouTube 频道查询")
-        cid = st.text_input("频道 ID")
-        if st.button("获取频道统计"):
-            try:
-                res = fetch_channel_stats(cid)
-                st.json(res)
-            except Exception as e:
-                st.error(str(e))
-    elif menu == "TikTok":
-        st.header("TikTok 趋势（占位）")
-        st.write("当前使用公共占位源，正式接入请在 API 管理中添加接口。")
-    elif menu == "Amazon采集工具":
-        import ui.amazon_crawl_options
-    elif menu == "爬虫自迭代":
-        import ui.auto_evolution_crawler
-    elif menu == "AI 学习中心":
-        render_ai_learning_center()
-    elif menu == "AI 自主迭代":
-        render_auto_evolution()
-    elif menu == "AI 自动修复":
-        render_auto_patch()
-    elif menu == "API 管理":
-        render_api_admin()
-    elif menu == "政策中心":
-        st.header("政策中心")
-        lst = fetch_latest_policies()
-        for p in lst:
-            st.markdown(
-                f"**{p.get('source',{}).get('agency','未知')}** - {p.get('fetched_at')}  \n"
-                f"{p.get('snippet','')}"
-            )
-    elif menu == "日志与设置":
-        st.header("日志与设置")
-        st.write("请在 config/config.json 中管理邮箱、调度等设置。")
+    try:
+        render = load_page(menu)
+    except Exception as e:
+        st.error(f"页面「{menu}」加载失败：{e!r}")
+        return
+    if IMPORT_PROFILE:
+        st.sidebar.caption("页面导入耗时：" + "，".join(f"{k} {v[0]}ms/{v[1]}模块" for k, v in import_stats.items()))
+    render()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
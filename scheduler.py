@@ -3,6 +3,7 @@ import time, json, os
 from apscheduler.schedulers.background import BackgroundScheduler
 from core.collectors.spider_engine import SpiderEngine
 from core.collectors.market_collector import fetch_all_trends
+from core.collectors.policy_collector import refresh_policies
 from core.processing.recommender import ai_recommendation
 from publishers.mail_sender import send_email
 from core.ai.evolution_engine import analyze_logs_with_gpt
@@ -26,6 +27,11 @@ def job_collect_and_update():
     # 这里可插入保存到 DB 的逻辑
     print("[Job] 权威数据采集结果：", trends)
 
+def job_refresh_policies():
+    print("[Job] 扫描政策来源变更")
+    summary = refresh_policies()
+    print(f"[Job] 政策来源: 扫描 {summary['scanned']} 变更 {summary['changed']} 失败 {summary['errors']}")
+
 def job_daily_report():
     print("[Job] 生成并发送每日报告")
     # 模拟摘要，真实应从DB与指标计算
@@ -50,6 +56,8 @@ def start_scheduler():
     sched = BackgroundScheduler()
     # 每小时抓取一次数据
     sched.add_job(job_collect_and_update, 'interval', minutes=cfg.get("poll_interval_minutes",60))
+    # 政策来源变更扫描 (页面只读快照)
+    sched.add_job(job_refresh_policies, 'interval', minutes=cfg.get("policy_interval_minutes",60))
     # 每日固定时刻发送日报（config内report_time 格式 HH:MM）
     hh, mm = cfg.get("report_time","08:00").split(":")
     sched.add_job(job_daily_report, 'cron', hour=int(hh), minute=int(mm))
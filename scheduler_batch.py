@@ -6,4 +6,5 @@ if __name__ == "__main__":
         "https://www.amazon.com/s?k=mouse",
         "https://www.amazon.com/s?k=keyboard",
     ]
-    run_batch(urls, storage_mode="local")
\ No newline at end of file
+    summary = run_batch(urls, storage_mode="local")
+    print({k: v for k, v in summary.items() if k != "results"})
\ No newline at end of file
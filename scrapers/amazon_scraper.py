@@ -5,16 +5,26 @@ Amazon Scraper (Unified Enhanced Version)
 - 可自迭代配置区块 (# === AUTO_TUNING_CONFIG_START/END ===) 供迭代引擎替换
 - 多结构列表选择器 (搜索 / Bestseller / data-asin 兜底)
 - 动态 User-Agent (桌面 / 移动 / 混合) 由 UA_MODE 控制
-- 滚动次数 / 等待时间参数化 (SCROLL_CYCLES, WAIT_MIN, WAIT_MAX)
+- 列表页就绪判定 (page_readiness): 商品数达到目标或不再增长且网络空闲即停止滚动, SCROLL_CYCLES / WAIT_MIN / WAIT_MAX 为上限
 - 二次重试 ENABLE_SECOND_PASS
 - data-asin 兜底 ENABLE_FALLBACK_ASIN
-- 验证码 / 反机器人简单检测 (_looks_like_captcha)
-- 断点续爬 (checkpoint) 与本地数据保存 (data/)
+- 验证码 / 反机器人检测 (block_detector): 导航收到主文档响应即按状态码 / 重定向 / 文档头判定, 被拦截时 1 秒内结束
+- 断点续爬 (checkpoint, 快照 + 追加日志) 与本地数据保存 (data/, 逐条流式写入压缩 NDJSON, 见 result_stream.py)
 - 详情页采集 (标题 / 价格 / 描述) 与缺失字段回填
 - 调试 HTML 保存 (debug_*.html)
 - 统一异常日志 (类型 / repr / traceback)
 - Fallback requests 抓取(可选)避免完全空洞 (在 Playwright失败时)
 - 迭代可注入 metrics: 列表页耗时 [LIST_TIME] secs=...
+- 代理池 (proxy_manager): 按成功率 / 验证码率 / 导航耗时加权选择代理, 连续失败的代理指数退避隔离
+- 常驻浏览器池 (browser_pool): 列表页与详情页共享已启动的 Chromium, 不再逐页启动
+- 详情页并发采集 (async Playwright, MAX_CONCURRENT_DETAIL / DETAIL_RETRY), 完成即写 checkpoint;
+  async Chromium 同样由浏览器池常驻复用 (BrowserPool.run_async), 不再每次 scrape_amazon 启动一次
+- 按域名自适应限速 (rate_limiter): 令牌桶 + AIMD, 验证码 / 空列表时降速, 正常时逐步加速; 独立于渲染等待
+- 资源过滤抓取 FETCH_PROFILE (full / lean / minimal), 拦截图片/字体/广告等请求并统计节省的字节与耗时
+- 分层抓取 (tiered_fetcher): 先用连接池 HTTP, 内容过短/被拦截/缺少选择器时才升级 Playwright, 按 URL 模式学习
+- 解析后端 (selector_engine): 默认 lxml + 预编译 XPath, 与 BeautifulSoup 实现输出一致 (PARSER_BACKEND=bs4 可切回)
+- 详情页缓存 (detail_cache): 按 ASIN 缓存详情字段, TTL 内跳过详情请求, 过期后重新验证内容哈希
+- 录制 / 回放 (replay_corpus): REPLAY_MODE=record 保存抓取到的 HTML, replay 时离线从语料库读取 (沙箱评估)
 """
 
 import time
@@ -24,14 +34,23 @@ import os
 from typing import List, Dict, Any, Optional
 import platform
 import asyncio
+from urllib.parse import urlparse
 
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeout
-from bs4 import BeautifulSoup
-import requests
-
-from .proxy_manager import get_random_proxy
-from .storage_manager import save_checkpoint, load_checkpoint, save_data
+from playwright.sync_api import TimeoutError as PlaywrightTimeout
+from .proxy_manager import get_random_proxy, get_proxy_pool, report_proxy
+from .storage_manager import (load_checkpoint, append_checkpoint, compact_checkpoint, save_data,
+                              open_result_writer, commit_results, RESULT_FORMAT)
 from .logger import log_info, log_error
+from .browser_pool import get_browser_pool, release_browser_pool
+from .fetch_profiles import get_profile, install_sync, install_async, fetch_stats
+from .tiered_fetcher import fetch_tiered, fetch_http_tier, http_get, tier_learner, url_pattern, browser_allowed
+from .selector_engine import get_engine
+from .detail_cache import get_detail_cache, FRESH
+from .page_readiness import scroll_until_ready, track_inflight
+from .rate_limiter import rate_limiter
+from .block_detector import (PageBlocked, is_block_page, inspect_navigation, inspect_document,
+                             inspect_document_async)
+from .replay_corpus import replaying, replay_page, record_page
 
 # ===== Windows 事件循环修复（确保使用 Proactor，避免 NotImplementedError）=====
 if platform.system() == "Windows":
@@ -64,11 +83,12 @@ PRICE_SELECTORS = [
 ]
 
 UA_MODE = "desktop"            # 可为: desktop / hybrid
-SCROLL_CYCLES = 3              # 列表页初次滚动次数
-WAIT_MIN = 1.0                 # 滚动后最小随机等待
-WAIT_MAX = 1.6                 # 滚动后最大随机等待
+SCROLL_CYCLES = 3              # 列表页最多滚动次数 (达到目标条数或不再增长时提前停止)
+WAIT_MIN = 1.0                 # 滚动后无新增且网络空闲时的观察时长 (秒)
+WAIT_MAX = 1.6                 # 单次滚动最长等待 (秒)
 ENABLE_SECOND_PASS = True      # 是否允许二次重试
 ENABLE_FALLBACK_ASIN = True    # 是否使用 data-asin 兜底解析
+FETCH_PROFILE = "lean"         # 资源过滤: full / lean / minimal (见 fetch_profiles.py)
 # === AUTO_TUNING_CONFIG_END ===
 
 # User-Agent 集合
@@ -82,13 +102,33 @@ MOBILE_UA_LIST = [
     "Mozilla/5.0 (Linux; Android 13; SM-S9060) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0 Mobile Safari/537.36",
 ]
 
+# 详情页并发采集 (环境变量见 config/_scraper_config.md)
+MAX_CONCURRENT_DETAIL = int(os.getenv("MAX_CONCURRENT_DETAIL", "4"))   # <=1 时退回串行
+DETAIL_RETRY = int(os.getenv("DETAIL_RETRY", "2"))                     # 单个详情页失败后的重试次数
+
+DETAIL_TITLE_SELECTORS = ["#productTitle", "#title", "h1"]
+DETAIL_PRICE_SELECTORS = ["span.a-price-whole", "span.a-offscreen"]
+DETAIL_DESC_SELECTORS = ["#productDescription", "#featurebullets_feature_div"]
+LINK_SELECTORS = ["a.a-link-normal[href*='/dp/']", "a.a-link-normal"]
+
 # ================== 工具函数 ==================
-def _safe_text(node) -> str:
-    if not node:
-        return ""
-    if getattr(node, "name", "") == "img":
-        return node.get("alt", "").strip()
-    return node.get_text(strip=True)
+def _engine():
+    """当前配置区块对应的解析后端 (选择器首次使用时预编译)。"""
+    return get_engine(
+        list_selectors=LIST_SELECTORS + ["div[data-asin]", ", ".join(LIST_SELECTORS), "#productTitle, #title"]
+                       + DETAIL_TITLE_SELECTORS + DETAIL_PRICE_SELECTORS + DETAIL_DESC_SELECTORS,
+        node_selectors=LINK_SELECTORS + TITLE_SELECTORS + PRICE_SELECTORS
+    )
+
+def _first_text(engine, node, selectors: List[str]) -> str:
+    """按顺序尝试选择器, 返回第一个非空文本。"""
+    for sel in selectors:
+        cand = engine.select_one(node, sel)
+        if cand is not None:
+            text = engine.text(cand)
+            if text:
+                return text
+    return ""
 
 def _choose_user_agent(mode: str) -> str:
     if mode == "hybrid":
@@ -96,11 +136,58 @@ def _choose_user_agent(mode: str) -> str:
     return random.choice(DESKTOP_UA_LIST)
 
 def _looks_like_captcha(html: str) -> bool:
-    if not html:
-        return False
-    marks = ["captcha", "verify you are a human", "/errors/validatecaptcha", "enter the characters", "robot check"]
-    low = html.lower()
-    return any(m in low for m in marks)
+    return is_block_page(html)
+
+def _on_blocked(outcome, url: str, proxy: Optional[str]):
+    """导航阶段判定被拦截: 上报代理与限速器后抛出 PageBlocked。"""
+    report_proxy(proxy, outcome.captcha, outcome.secs, captcha=outcome.captcha)
+    rate_limiter.feedback(url, False, outcome.kind)
+    log_error(f"[BLOCKED] kind={outcome.kind} status={outcome.status} marker={outcome.marker} "
+              f"secs={outcome.secs} url={outcome.url or url}",
+              url=url, stage="nav", proxy=proxy, duration=outcome.secs, kind=outcome.kind, status=outcome.status,
+              blocked=True)  # 每次拦截只有这一条 (或列表页验证码那一条) 带 blocked, 供指标计数
+    raise PageBlocked(outcome)
+
+def _navigate(page, url: str, proxy: Optional[str]) -> float:
+    """
+    导航到收到主文档响应 (commit) 即按状态码 / URL / 响应头检查是否被拦截, 正常时等待 DOMContentLoaded
+    后再检查文档开头的验证码关键词。返回导航耗时 (秒, 用于代理延迟统计)。
+    goto 失败只在这里上报代理一次, 调用方不再重复上报。
+    """
+    start = time.time()
+    try:
+        response = page.goto(url, timeout=90000, wait_until="commit")
+    except Exception:
+        report_proxy(proxy, False)
+        raise
+    outcome = inspect_navigation(response, start)
+    if outcome.blocked:
+        _on_blocked(outcome, url, proxy)
+    try:
+        page.wait_for_load_state("domcontentloaded", timeout=90000)
+    except PlaywrightTimeout:
+        log_error(f"[NAV] DOMContentLoaded 等待超时: {url}")
+    outcome = inspect_document(page, outcome)
+    if outcome.blocked:
+        _on_blocked(outcome, url, proxy)
+    return outcome.secs
+
+async def _navigate_async(page, url: str, proxy: Optional[str]) -> float:
+    """async Playwright 版本的 _navigate。"""
+    start = time.time()
+    try:
+        response = await page.goto(url, timeout=90000, wait_until="commit")
+    except Exception:
+        report_proxy(proxy, False)
+        raise
+    outcome = inspect_navigation(response, start)
+    if outcome.blocked:
+        _on_blocked(outcome, url, proxy)
+    await page.wait_for_load_state("domcontentloaded", timeout=90000)
+    outcome = await inspect_document_async(page, outcome)
+    if outcome.blocked:
+        _on_blocked(outcome, url, proxy)
+    return outcome.secs
 
 def _dump_html(fname: str, html: str):
     try:
@@ -110,16 +197,26 @@ def _dump_html(fname: str, html: str):
     except Exception as e:
         log_error(f"[DEBUG] Save HTML failed: {e}")
 
+def _list_validator(target: int):
+    """
+    HTTP 层列表页的验收条件: 服务端渲染的商品数需达到滚动目标。
+    只含首屏商品的页面交给浏览器滚动加载, 否则 max_items 会被静默截断为首屏数量。
+    """
+    def _validate(html: str) -> bool:
+        engine = _engine()
+        return len(_select_list_nodes(engine, engine.parse(html), None)) >= max(1, target)
+    return _validate
+
+def _has_detail_title(html: str) -> bool:
+    engine = _engine()
+    return bool(engine.select(engine.parse(html), "#productTitle, #title"))
+
 def _fallback_fetch(url: str) -> str:
     """
     Fallback: 在 Playwright 无法启动时使用 requests 简单获取页面 (可能被反爬裁剪，效果有限)。
     """
-    headers = {
-        "User-Agent": random.choice(DESKTOP_UA_LIST),
-        "Accept-Language": "en-US,en;q=0.9",
-    }
     try:
-        r = requests.get(url, headers=headers, timeout=15)
+        r = http_get(url, random.choice(DESKTOP_UA_LIST))
         if r.status_code == 200 and len(r.text) > 5000:
             return r.text
         log_error(f"[FALLBACK] 状态码={r.status_code} 内容长度={len(r.text)}")
@@ -136,13 +233,17 @@ def scrape_amazon(
     deep_detail: bool = True,
     storage_mode: str = "local",
     headless: bool = True,
-    second_pass: bool = True
+    second_pass: bool = True,
+    fetch_profile: Optional[str] = None
 ) -> List[Dict[str, Any]]:
     """
     列表页爬取的统一入口。
     second_pass 参数与 ENABLE_SECOND_PASS 联合作用。
+    storage_mode: local 写 data/<key>.ndjson.gz (RESULT_FORMAT=json 时为旧的 data/*.json); sqlite 批量 upsert 到 product_store 数据库。
+    fetch_profile 为空时使用配置区块中的 FETCH_PROFILE。
     """
     second_pass = second_pass and ENABLE_SECOND_PASS
+    fetch_profile = fetch_profile or FETCH_PROFILE
 
     checkpoint = load_checkpoint(url) if (resume and storage_mode == "local") else None
     scraped = set(checkpoint["scraped"]) if checkpoint else set()
@@ -150,60 +251,137 @@ def scrape_amazon(
 
     proxy = get_random_proxy() if use_proxy else None
     ua = _choose_user_agent(UA_MODE)
-    log_info(f"[INIT] URL={url} proxy={proxy} ua={ua} scraped={len(scraped)}")
+    log_info(f"[INIT] URL={url} proxy={proxy} ua={ua} scraped={len(scraped)} fetch_profile={fetch_profile}",
+             url=url, stage="init", proxy=proxy)
+
+    # 列表中可能包含已采集过的条目, 滚动目标按此放宽
+    target = max_items + len(scraped)
+    writer = None
+    store = None
 
     try:
         list_start = time.time()
-        html = _load_page(url, proxy, ua, headless)
+        html, tier = fetch_tiered(
+            url, ua, proxy,
+            browser_fetch=lambda: _load_page(url, proxy, ua, headless, fetch_profile, target),
+            validate=_list_validator(target)
+        )
         list_elapsed = time.time() - list_start
-        log_info(f"[LIST_TIME] secs={round(list_elapsed,3)}")
+        log_info(f"[LIST_TIME] secs={round(list_elapsed,3)} tier={tier}",
+                 url=url, stage="list", duration=round(list_elapsed, 3), tier=tier, proxy=proxy)
 
         if _looks_like_captcha(html):
-            log_error("[CAPTCHA] 检测到验证码/人机验证页面。请启用 headless=False 或更换代理。")
+            rate_limiter.feedback(url, False, "captcha")
+            log_error("[CAPTCHA] 检测到验证码/人机验证页面。请启用 headless=False 或更换代理。",
+                      url=url, stage="list", proxy=proxy, blocked=True)
             _dump_html("debug_captcha.html", html)
             raise RuntimeError("CAPTCHA detected")
 
-        items = _parse_list(html, url, proxy, ua, headless, second_pass)
+        items = _parse_list(html, url, proxy, ua, headless, second_pass, fetch_profile, target)
         if not items:
+            rate_limiter.feedback(url, False, "empty_list")
             _dump_html("debug_list_empty.html", html)
             raise RuntimeError("No items parsed from list page")
+        rate_limiter.feedback(url, True)
 
+        pending: List[Dict[str, Any]] = []
+        queued = set()
         for raw in items:
-            if len(results) >= max_items:
+            if len(results) + len(pending) >= max_items:
                 break
             detail_url = raw["detail_url"]
-            if detail_url in scraped:
+            if detail_url in scraped or detail_url in queued:
                 continue
-
-            if deep_detail:
-                detail_data = scrape_detail_page(
-                    detail_url,
-                    proxy=proxy if use_proxy else None,
-                    headless=headless
-                )
-                if not detail_data.get("title"):
-                    detail_data["title"] = raw.get("title", "")
-                if not detail_data.get("price"):
-                    detail_data["price"] = raw.get("price", "")
-                product = detail_data
-            else:
-                product = {
-                    "title": raw.get("title", ""),
-                    "url": detail_url,
-                    "price": raw.get("price", "")
-                }
-
+            queued.add(detail_url)
+            pending.append(raw)
+
+        if storage_mode == "sqlite":
+            from .product_store import get_product_store  # 可选依赖 (SQLAlchemy), 仅数据库模式需要
+            store = get_product_store()
+        elif storage_mode == "local" and RESULT_FORMAT != "json":
+            # 结果按完成顺序流式写入 (续爬时先写入 checkpoint 中已有的结果)
+            writer = open_result_writer(url)
+            writer.write_many(results)
+
+        def _collect(product: Dict[str, Any], detail_url: str):
+            # 详情并发时按完成顺序回调, 每条完成即落 checkpoint
             results.append(product)
             scraped.add(detail_url)
             if resume and storage_mode == "local":
-                save_checkpoint(url, {"scraped": list(scraped), "results": results})
-            log_info(f"[COLLECT] {product.get('title','(no-title)')} (total={len(results)})")
-
-        if storage_mode == "local":
+                append_checkpoint(url, detail_url, product)
+            if store is not None:
+                store.add(url, product)
+            if writer is not None:
+                writer.write(product)
+            log_info(f"[COLLECT] {product.get('title','(no-title)')} (total={len(results)})",
+                     url=detail_url, stage="collect", items=len(results))
+
+        if deep_detail:
+            cache = get_detail_cache()
+            stale: Dict[str, Dict[str, Any]] = {}
+            to_fetch = pending
+            if cache is not None:
+                to_fetch = []
+                for raw in pending:
+                    state, cached = cache.lookup(raw["detail_url"])
+                    if state == FRESH:
+                        _collect(_merge_list_row(cached, raw), raw["detail_url"])
+                        continue
+                    if cached is not None:
+                        stale[raw["detail_url"]] = cached
+                    to_fetch.append(raw)
+                hits = len(pending) - len(to_fetch)
+                log_info(f"[DETAIL_CACHE] run hits={hits} stale={len(stale)} "
+                         f"misses={len(to_fetch) - len(stale)} hit_rate={round(hits / len(pending), 3) if pending else None}")
+
+            def _on_detail(raw: Dict[str, Any], detail_data: Dict[str, Any]):
+                detail_url = raw["detail_url"]
+                previous = stale.get(detail_url)
+                if cache is not None:
+                    if detail_data.get("error") or not detail_data.get("title"):
+                        if previous is not None:
+                            # 重新验证失败时沿用过期缓存, 优于只有列表行的残缺记录
+                            cache.served_stale()
+                            detail_data = previous
+                    else:
+                        cache.store(detail_url, detail_data, previous)
+                _collect(_merge_list_row(detail_data, raw), detail_url)
+
+            _scrape_details(to_fetch, proxy, headless, _on_detail, fetch_profile)
+            if cache is not None:
+                cache.flush()
+                log_info(f"[DETAIL_CACHE] total={cache.report()}")
+        else:
+            for raw in pending:
+                _collect({
+                    "title": raw.get("title", ""),
+                    "url": raw["detail_url"],
+                    "price": raw.get("price", "")
+                }, raw["detail_url"])
+
+        if resume and storage_mode == "local" and pending:
+            compact_checkpoint(url)
+        if writer is not None:
+            commit_results(url, writer)
+            writer = None
+        elif storage_mode == "local":
             save_data(url, results)
-        log_info(f"[DONE] Collected={len(results)} (max_items={max_items})")
+        log_info(f"[DONE] Collected={len(results)} (max_items={max_items}) pool={get_browser_pool().stats()}",
+                 url=url, stage="done", items=len(results), proxy=proxy)
+        log_info(f"[FETCH_STATS] {fetch_stats.report()}")
+        tier_learner.flush()
+        rate_limiter.flush()
+        log_info(f"[RATE_STATS] {rate_limiter.stats()}")
+        if proxy:
+            get_proxy_pool().flush()
+            log_info(f"[PROXY_STATS] {proxy} {get_proxy_pool().stats().get(proxy)}")
         return results
 
+    except PageBlocked as pb:
+        # 导航阶段已判定被拦截, fallback 请求同样会被拦截
+        log_error(f"[CAPTCHA] 列表页被拦截 ({pb.outcome.kind})。请启用 headless=False 或更换代理。",
+                  url=url, stage="list", proxy=proxy)
+        return []
     except RuntimeError as re:
         # 尝试 fallback
         log_error(f"[RUNTIME] {re}")
@@ -216,25 +394,39 @@ def scrape_amazon(
         log_error(f"[EXCEPTION] scrape_amazon失败: type={type(e)} repr={repr(e)}")
         log_error(traceback.format_exc())
         return []
+    finally:
+        if writer is not None:
+            writer.abort()  # 中途失败: 丢弃未完成的 .part, 已采集条目仍在 checkpoint 中
+        if store is not None:
+            try:
+                store.flush()  # 数据库模式没有 checkpoint, 中途失败时也要写入已采集的缓冲条目
+            except Exception as e:
+                log_error(f"[PRODUCT_DB] 结束时写入缓冲失败: {repr(e)}")
+        release_browser_pool()  # 交互式单次采集结束即释放 Chromium; 批量 / 沙箱在 keep_browser_pool 内复用
 
 # ================== 页面加载 ==================
-def _load_page(url: str, proxy: Optional[str], ua: str, headless: bool) -> str:
+def _load_page(url: str, proxy: Optional[str], ua: str, headless: bool, fetch_profile: Optional[str] = None,
+               target: Optional[int] = None) -> str:
+    """target: 页面上已有这么多条商品时停止滚动 (None 表示直到不再增长)。"""
+    replayed = replay_page(url)
+    if replayed is not None:
+        return replayed
+    profile = get_profile(fetch_profile or FETCH_PROFILE)
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=headless,
-                proxy={"server": proxy} if proxy else None
-            )
-            context = browser.new_context(user_agent=ua)
-            page = context.new_page()
-            page.goto(url, timeout=90000)
-
-            # 同意 Cookie / 地区弹窗
+        with get_browser_pool().lease_page(proxy, ua, headless) as page:
+            counter = install_sync(page, profile)
+            tracker = track_inflight(page)  # 导航前挂上, 首屏请求也计入进行中请求
+            rate_limiter.wait(url)
+            start = time.time()
+            nav_secs = _navigate(page, url, proxy)
+
+            # 同意 Cookie / 地区弹窗 (只点击已存在的按钮, 不逐个等待超时)
             for sel in ['input#sp-cc-accept', 'button[name="accept"]', 'input[name="accept"]']:
                 try:
-                    page.click(sel, timeout=3000)
-                    log_info(f"[CONSENT] Clicked {sel}")
-                    break
+                    if page.query_selector(sel) is not None:
+                        page.click(sel, timeout=3000)
+                        log_info(f"[CONSENT] Clicked {sel}")
+                        break
                 except Exception:
                     pass
 
@@ -244,127 +436,162 @@ def _load_page(url: str, proxy: Optional[str], ua: str, headless: bool) -> str:
             except PlaywrightTimeout:
                 log_error("[WAIT] 列表选择器等待超时，进入滚动阶段。")
 
-            for _ in range(SCROLL_CYCLES):
-                page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
-                time.sleep(random.uniform(WAIT_MIN, WAIT_MAX))
+            ready = scroll_until_ready(page, LIST_SELECTORS, LINK_SELECTORS, target,
+                                       max_scrolls=SCROLL_CYCLES, quiet_secs=WAIT_MIN, max_wait_secs=WAIT_MAX,
+                                       tracker=tracker)
+            log_info(f"[READY] items={ready['items']} scrolls={ready['scrolls']} "
+                     f"reason={ready['reason']} secs={ready['secs']}",
+                     url=url, stage="ready", duration=ready["secs"], items=ready["items"])
 
             html = page.content()
+            fetch_stats.record(profile.name, "list", counter, time.time() - start)
             log_info(f"[PAGE] title={page.title()} final_url={page.url}")
-            browser.close()
+        captcha = _looks_like_captcha(html)
+        report_proxy(proxy, True, nav_secs, captcha=captcha)
+        if not captcha:
+            record_page(url, html, "list")
         return html
     except NotImplementedError as ne:
         raise RuntimeError(
             "NotImplementedError: 可能是 Windows 上事件循环策略错误 (SelectorEventLoopPolicy)。"
             "请确保使用 ProactorEventLoopPolicy 并已安装 Playwright 浏览器组件。"
         ) from ne
+    except PageBlocked:
+        raise
     except Exception as e:
+        # 导航失败已由 _navigate 上报代理, 此处不再重复计数
         raise RuntimeError(f"Playwright 启动失败: {repr(e)}") from e
 
 # ================== 列表解析 ==================
-def _parse_list(html: str, url: str, proxy: Optional[str], ua: str, headless: bool, second_pass: bool) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "lxml")
+def _select_list_nodes(engine, doc, tag: Optional[str] = "PARSE") -> List[Any]:
     nodes: List[Any] = []
     for sel in LIST_SELECTORS:
-        found = soup.select(sel)
+        found = engine.select(doc, sel)
         if found:
-            log_info(f"[PARSE] {sel} -> {len(found)}")
+            if tag:
+                log_info(f"[{tag}] {sel} -> {len(found)}")
             nodes.extend(found)
-    nodes = list(dict.fromkeys(nodes))
-
-    if not nodes and second_pass:
-        log_info("[PARSE] 首次为空，触发二次重试。")
-        html2 = _load_page(url, proxy, ua, headless)
-        soup2 = BeautifulSoup(html2, "lxml")
-        for sel in LIST_SELECTORS:
-            found2 = soup2.select(sel)
-            if found2:
-                log_info(f"[PARSE-2] {sel} -> {len(found2)}")
-                nodes.extend(found2)
-        nodes = list(dict.fromkeys(nodes))
-
-        if not nodes and ENABLE_FALLBACK_ASIN:
-            fb_nodes = soup2.select("div[data-asin]")
-            if fb_nodes:
-                log_info(f"[FALLBACK] data-asin 兜底 -> {len(fb_nodes)}")
-                nodes.extend(fb_nodes)
-        nodes = list(dict.fromkeys(nodes))
+    return engine.dedupe(nodes)
 
-        if not nodes:
-            _dump_html("debug_second_pass_empty.html", html2)
-            return []
+def _site_origin(url: str) -> str:
+    """列表页所在站点 (scheme://host), 详情链接按同一站点拼接。"""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else "https://www.amazon.com"
 
+def _rows_from_nodes(engine, nodes: List[Any], origin: str = "https://www.amazon.com") -> List[Dict[str, Any]]:
     parsed: List[Dict[str, Any]] = []
     for node in nodes:
-        link = node.select_one("a.a-link-normal[href*='/dp/']") or node.select_one("a.a-link-normal")
-        if not link or not link.has_attr("href"):
+        link = None
+        for lsel in LINK_SELECTORS:
+            link = engine.select_one(node, lsel)
+            if link is not None:
+                break
+        href = engine.attr(link, "href") if link is not None else None
+        if href is None:
             continue
-        href = link["href"]
         if not href.startswith("/"):
             continue
-        detail_url = "https://www.amazon.com" + href.split("?", 1)[0]
-
-        # 标题
-        title_text = ""
-        for tsel in TITLE_SELECTORS:
-            cand = node.select_one(tsel)
-            if cand:
-                title_text = _safe_text(cand)
-                if title_text:
-                    break
-
-        # 价格
-        price_text = ""
-        for psel in PRICE_SELECTORS:
-            candp = node.select_one(psel)
-            if candp:
-                price_text = _safe_text(candp)
-                if price_text:
-                    break
+        detail_url = origin + href.split("?", 1)[0]
 
         parsed.append({
             "detail_url": detail_url,
-            "title": title_text,
-            "price": price_text
+            "title": _first_text(engine, node, TITLE_SELECTORS),
+            "price": _first_text(engine, node, PRICE_SELECTORS)
         })
+    return parsed
 
+def _parse_list(html: str, url: str, proxy: Optional[str], ua: str, headless: bool, second_pass: bool,
+                fetch_profile: Optional[str] = None, target: Optional[int] = None) -> List[Dict[str, Any]]:
+    engine = _engine()
+    nodes = _select_list_nodes(engine, engine.parse(html))
+
+    if not nodes and second_pass and browser_allowed():
+        log_info("[PARSE] 首次为空，触发二次重试。")
+        html2 = _load_page(url, proxy, ua, headless, fetch_profile, target)
+        doc2 = engine.parse(html2)
+        nodes = _select_list_nodes(engine, doc2, "PARSE-2")
+
+        if not nodes and ENABLE_FALLBACK_ASIN:
+            fb_nodes = engine.select(doc2, "div[data-asin]")
+            if fb_nodes:
+                log_info(f"[FALLBACK] data-asin 兜底 -> {len(fb_nodes)}")
+                nodes = engine.dedupe(fb_nodes)
+
+        if not nodes:
+            _dump_html("debug_second_pass_empty.html", html2)
+            return []
+
+    parsed = _rows_from_nodes(engine, nodes, _site_origin(url))
     log_info(f"[PARSE] Parsed items={len(parsed)}")
     return parsed
 
 # ================== 详情页采集 ==================
-def scrape_detail_page(detail_url: str, proxy: Optional[str] = None, headless: bool = True) -> Dict[str, Any]:
+def _extract_detail_fields(engine, html: str, detail_url: str) -> Dict[str, Any]:
+    doc = engine.parse(html)
+
+    def first_node(selectors):
+        for sel in selectors:
+            found = engine.select(doc, sel)
+            if found:
+                return found[0]
+        return None
+
+    return {
+        "title": engine.text(first_node(DETAIL_TITLE_SELECTORS)),
+        "url": detail_url,
+        "price": engine.text(first_node(DETAIL_PRICE_SELECTORS)),
+        "desc": engine.text(first_node(DETAIL_DESC_SELECTORS)),
+    }
+
+def _parse_detail_html(html: str, detail_url: str) -> Dict[str, Any]:
+    data = _extract_detail_fields(_engine(), html, detail_url)
+    if not data["title"]:
+        _dump_html("debug_detail_no_title.html", html)
+    log_info(f"[DETAIL] Parsed: {data.get('title','(no-title)')}")
+    return data
+
+def _merge_list_row(detail_data: Dict[str, Any], raw: Dict[str, Any]) -> Dict[str, Any]:
+    """详情页缺失标题/价格时使用列表行回填。"""
+    if not detail_data.get("title"):
+        detail_data["title"] = raw.get("title", "")
+    if not detail_data.get("price"):
+        detail_data["price"] = raw.get("price", "")
+    return detail_data
+
+def _load_detail_page(detail_url: str, proxy: Optional[str], ua: str, headless: bool,
+                      fetch_profile: Optional[str] = None) -> str:
+    profile = get_profile(fetch_profile or FETCH_PROFILE)
+    with get_browser_pool().lease_page(proxy, ua, headless) as page:
+        counter = install_sync(page, profile)
+        rate_limiter.wait(detail_url)
+        start = time.time()
+        nav_secs = _navigate(page, detail_url, proxy)
+        # 标题 / 价格 / 描述均在服务端 HTML 中, 标题出现即可读取, 不再额外等待
+        try:
+            page.wait_for_selector("#productTitle, #title, h1", timeout=45000)
+        except PlaywrightTimeout:
+            log_error(f"[DETAIL] 标题等待超时: {detail_url}")
+        html = page.content()
+        fetch_stats.record(profile.name, "detail", counter, time.time() - start)
+    captcha = _looks_like_captcha(html)
+    report_proxy(proxy, True, nav_secs, captcha=captcha)
+    rate_limiter.feedback(detail_url, not captcha, "captcha")
+    if not captcha:
+        record_page(detail_url, html, "detail")
+    return html
+
+def scrape_detail_page(detail_url: str, proxy: Optional[str] = None, headless: bool = True,
+                       fetch_profile: Optional[str] = None) -> Dict[str, Any]:
     try:
         ua = _choose_user_agent(UA_MODE)
-        with sync_playwright() as p:
-            browser = p.chromium.launch(
-                headless=headless,
-                proxy={"server": proxy} if proxy else None
-            )
-            context = browser.new_context(user_agent=ua)
-            page = context.new_page()
-            page.goto(detail_url, timeout=90000)
-            try:
-                page.wait_for_selector("#productTitle, #title, h1", timeout=45000)
-            except PlaywrightTimeout:
-                log_error(f"[DETAIL] 标题等待超时: {detail_url}")
-            time.sleep(random.uniform(WAIT_MIN, WAIT_MAX))
-            html = page.content()
-            browser.close()
-
-        soup = BeautifulSoup(html, "lxml")
-        title = soup.select_one("#productTitle") or soup.select_one("#title") or soup.select_one("h1")
-        price = soup.select_one("span.a-price-whole") or soup.select_one("span.a-offscreen")
-        desc = soup.select_one("#productDescription") or soup.select_one("#featurebullets_feature_div")
-
-        data = {
-            "title": _safe_text(title),
-            "url": detail_url,
-            "price": _safe_text(price),
-            "desc": _safe_text(desc),
-        }
-        if not data["title"]:
-            _dump_html("debug_detail_no_title.html", html)
-        log_info(f"[DETAIL] Parsed: {data.get('title','(no-title)')}")
-        return data
+        html, _ = fetch_tiered(
+            detail_url, ua, proxy,
+            browser_fetch=lambda: _load_detail_page(detail_url, proxy, ua, headless, fetch_profile),
+            validate=_has_detail_title
+        )
+        return _parse_detail_html(html, detail_url)
+    except PageBlocked as pb:
+        return {"url": detail_url, "error": f"blocked:{pb.outcome.kind}"}
     except NotImplementedError as ne:
         log_error(f"[DETAIL-LOOP] NotImplementedError: {repr(ne)}")
         return {"url": detail_url, "error": "LoopPolicy/Playwright Issue"}
@@ -373,6 +600,111 @@ def scrape_detail_page(detail_url: str, proxy: Optional[str] = None, headless: b
         log_error(traceback.format_exc())
         return {"url": detail_url, "error": repr(e)}
 
+# ================== 详情页并发采集 ==================
+async def _fetch_detail_async(browser, detail_url: str, profile, proxy: Optional[str] = None) -> Dict[str, Any]:
+    from playwright.async_api import TimeoutError as AsyncPlaywrightTimeout
+
+    pattern = url_pattern(detail_url)
+    if tier_learner.choose(pattern) == "http":
+        html = await asyncio.to_thread(
+            fetch_http_tier, detail_url, _choose_user_agent(UA_MODE), proxy, _has_detail_title
+        )
+        if html is not None:
+            return _parse_detail_html(html, detail_url)
+        if not browser_allowed():
+            return {"url": detail_url, "error": "http_tier_unusable"}
+
+    data: Dict[str, Any] = {"url": detail_url, "error": "not fetched"}
+    for attempt in range(DETAIL_RETRY + 1):
+        await rate_limiter.wait_async(detail_url)
+        context = await browser.new_context(user_agent=_choose_user_agent(UA_MODE))
+        try:
+            page = await context.new_page()
+            counter = await install_async(page, profile)
+            start = time.time()
+            nav_secs = await _navigate_async(page, detail_url, proxy)
+            try:
+                await page.wait_for_selector("#productTitle, #title, h1", timeout=45000)
+            except AsyncPlaywrightTimeout:
+                log_error(f"[DETAIL] 标题等待超时: {detail_url} (attempt={attempt + 1})")
+            html = await page.content()
+            fetch_stats.record(profile.name, "detail", counter, time.time() - start)
+            captcha = _looks_like_captcha(html)
+            report_proxy(proxy, True, nav_secs, captcha=captcha)
+            rate_limiter.feedback(detail_url, not captcha, "captcha")
+            if not captcha:
+                record_page(detail_url, html, "detail")
+            data = _parse_detail_html(html, detail_url)
+            tier_learner.record(pattern, "browser", bool(data.get("title")))
+            if data.get("title"):
+                return data
+        except PageBlocked as pb:
+            # 同一代理立即重试只会再次命中验证码, 交给限速器降速后由下一轮处理
+            data = {"url": detail_url, "error": f"blocked:{pb.outcome.kind}"}
+            break
+        except Exception as e:
+            log_error(f"[DETAIL-EXCEPTION] {detail_url} attempt={attempt + 1} type={type(e)} repr={repr(e)}")
+            data = {"url": detail_url, "error": repr(e)}
+        finally:
+            try:
+                await context.close()
+            except Exception:
+                pass
+    return data
+
+async def _scrape_details_async(browser, rows: List[Dict[str, Any]], proxy: Optional[str], on_item,
+                                fetch_profile: Optional[str] = None):
+    """browser 为浏览器池中常驻的 async Chromium (BrowserPool.run_async), 这里不启动 / 关闭浏览器。"""
+    profile = get_profile(fetch_profile or FETCH_PROFILE)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DETAIL)
+
+    async def worker(raw):
+        async with semaphore:
+            return raw, await _fetch_detail_async(browser, raw["detail_url"], profile, proxy)
+
+    tasks = [asyncio.create_task(worker(raw)) for raw in rows]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            raw, data = await fut
+            on_item(raw, data)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+def _scrape_details(rows: List[Dict[str, Any]], proxy: Optional[str], headless: bool, on_item,
+                    fetch_profile: Optional[str] = None):
+    """
+    详情阶段: MAX_CONCURRENT_DETAIL > 1 时使用 async Playwright 并发采集,
+    否则 (或并发阶段整体失败时) 对剩余条目退回串行 scrape_detail_page。
+    on_item(raw, detail_data) 按完成顺序调用, detail_data 尚未用列表行回填。
+    """
+    done = set()
+
+    def _on_item(raw, detail_data):
+        done.add(raw["detail_url"])
+        on_item(raw, detail_data)
+
+    # 回放 / 仅 HTTP 模式时串行读取即可, 无需启动浏览器
+    if MAX_CONCURRENT_DETAIL > 1 and len(rows) > 1 and not replaying() and browser_allowed():
+        start = time.time()
+        try:
+            # async Chromium 由当前线程的浏览器池持有: 批量 worker 在 keep_browser_pool 内整批只启动一次
+            get_browser_pool().run_async(
+                lambda browser: _scrape_details_async(browser, rows, proxy, _on_item, fetch_profile),
+                proxy, headless, pages=len(rows))
+            secs = round(time.time() - start, 3)
+            log_info(f"[DETAIL_TIME] secs={secs} items={len(rows)} concurrency={MAX_CONCURRENT_DETAIL}",
+                     stage="detail", duration=secs, items=len(rows), proxy=proxy)
+            return
+        except Exception as e:
+            log_error(f"[DETAIL-ASYNC] 并发详情阶段失败, 剩余条目退回串行: type={type(e)} repr={repr(e)}")
+
+    for raw in rows:
+        if raw["detail_url"] in done:
+            continue
+        detail_data = scrape_detail_page(raw["detail_url"], proxy=proxy, headless=headless, fetch_profile=fetch_profile)
+        _on_item(raw, detail_data)
+
 # ================== 兼容旧入口 ==================
 def scrape_amazon_bestsellers(**kwargs) -> List[Dict[str, Any]]:
     return scrape_amazon(url="https://www.amazon.com/bestsellers", **kwargs)
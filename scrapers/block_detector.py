@@ -0,0 +1,136 @@
+"""
+验证码 / 反机器人拦截检测
+
+- 单次扫描的关键词匹配 (预编译、忽略大小写的正则, 不再 lower() 整页后逐个 in):
+  captcha_solver.detect_captcha、amazon_scraper._looks_like_captcha 与 tiered_fetcher 共用
+- 导航阶段提前判定, 被拦截时抛出 PageBlocked, 不再经历同意弹窗、60 秒选择器等待与滚动:
+  inspect_navigation   page.goto(wait_until="commit") 拿到主文档响应后只看状态码 / 最终 URL
+                       (重定向到 /errors/validateCaptcha) / 响应头 (x-amzn-waf-action), 不读取正文
+                       (response.body() 要等整个文档下载完并整体缓冲, 谈不上提前)
+  inspect_document     DOMContentLoaded 后在浏览器内截取文档前 BLOCK_SNIFF_BYTES 个字符做关键词匹配,
+                       只传回这一段, 不经 response.body() 缓冲整页
+
+结果以 BlockOutcome 表示, kind 取值:
+    ok                正常
+    captcha           文档内容命中验证码关键词
+    captcha_redirect  重定向到验证码页
+    http_blocked      403 / 429 / 503 等拦截状态码
+"""
+
+import os
+import re
+import time
+from typing import Dict, Optional, Union
+
+BLOCK_MARKERS = ["captcha", "verify you are a human", "enter the characters", "robot check", "/errors/validatecaptcha"]
+BLOCK_STATUSES = (403, 429, 503)
+BLOCK_SNIFF_BYTES = int(os.getenv("BLOCK_SNIFF_BYTES", "32768"))
+BLOCK_WAF_ACTIONS = ("captcha", "challenge")   # AWS WAF 在 x-amzn-waf-action 响应头中标明的拦截动作
+
+_MARKER_RE = re.compile("|".join(re.escape(m) for m in BLOCK_MARKERS), re.IGNORECASE)
+_CAPTCHA_PATH = "/errors/validatecaptcha"
+_WAF_HEADER = "x-amzn-waf-action"
+_SNIFF_JS = "n => document.documentElement ? document.documentElement.outerHTML.slice(0, n) : ''"
+
+OK, CAPTCHA, CAPTCHA_REDIRECT, HTTP_BLOCKED = "ok", "captcha", "captcha_redirect", "http_blocked"
+
+
+def find_block_marker(text: Union[str, bytes, None]) -> Optional[str]:
+    """返回命中的第一个拦截关键词 (小写), 未命中返回 None。"""
+    if not text:
+        return None
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", "ignore")
+    m = _MARKER_RE.search(text)
+    return m.group(0).lower() if m else None
+
+
+def is_block_page(html: Union[str, bytes, None]) -> bool:
+    return find_block_marker(html) is not None
+
+
+class BlockOutcome:
+    __slots__ = ("kind", "status", "url", "marker", "secs")
+
+    def __init__(self, kind: str, status: Optional[int] = None, url: str = "",
+                 marker: Optional[str] = None, secs: Optional[float] = None):
+        self.kind = kind
+        self.status = status
+        self.url = url
+        self.marker = marker
+        self.secs = secs
+
+    @property
+    def blocked(self) -> bool:
+        return self.kind != OK
+
+    @property
+    def captcha(self) -> bool:
+        return self.kind in (CAPTCHA, CAPTCHA_REDIRECT)
+
+    def __repr__(self):
+        return (f"BlockOutcome(kind={self.kind}, status={self.status}, url={self.url}, "
+                f"marker={self.marker}, secs={self.secs})")
+
+
+class PageBlocked(RuntimeError):
+    """导航阶段判定为拦截页面; outcome 为 BlockOutcome。"""
+
+    def __init__(self, outcome: BlockOutcome):
+        super().__init__(f"Page blocked: {outcome.kind} status={outcome.status} url={outcome.url}")
+        self.outcome = outcome
+
+
+def classify(status: Optional[int], url: str, head: Union[str, bytes, None] = None,
+             secs: Optional[float] = None, headers: Optional[Dict[str, str]] = None) -> BlockOutcome:
+    if _CAPTCHA_PATH in (url or "").lower():
+        return BlockOutcome(CAPTCHA_REDIRECT, status, url, _CAPTCHA_PATH, secs)
+    waf = ((headers or {}).get(_WAF_HEADER) or "").lower()
+    if waf in BLOCK_WAF_ACTIONS:
+        return BlockOutcome(CAPTCHA, status, url, f"{_WAF_HEADER}={waf}", secs)
+    marker = find_block_marker(head)
+    if marker:
+        return BlockOutcome(CAPTCHA, status, url, marker, secs)
+    if status in BLOCK_STATUSES:
+        return BlockOutcome(HTTP_BLOCKED, status, url, None, secs)
+    return BlockOutcome(OK, status, url, None, secs)
+
+
+def inspect_navigation(response, started: float) -> BlockOutcome:
+    """检查 page.goto 返回的主文档响应 (None 表示同文档导航, 视为正常); sync / async Playwright 通用。"""
+    if response is None:
+        return BlockOutcome(OK, secs=round(time.time() - started, 3))
+    try:
+        headers = response.headers
+    except Exception:
+        headers = None
+    return classify(response.status, response.url, None, round(time.time() - started, 3), headers)
+
+
+def _sniffed(head, page_url: str, outcome: BlockOutcome) -> BlockOutcome:
+    marker = find_block_marker(head)
+    if marker is None:
+        return outcome
+    return BlockOutcome(CAPTCHA, outcome.status, page_url or outcome.url, marker, outcome.secs)
+
+
+def inspect_document(page, outcome: BlockOutcome) -> BlockOutcome:
+    """sync Playwright: DOMContentLoaded 后检查文档开头; 导航阶段已判定为拦截时原样返回。"""
+    if outcome.blocked:
+        return outcome
+    try:
+        head = page.evaluate(_SNIFF_JS, BLOCK_SNIFF_BYTES)
+    except Exception:
+        return outcome
+    return _sniffed(head, page.url, outcome)
+
+
+async def inspect_document_async(page, outcome: BlockOutcome) -> BlockOutcome:
+    """async Playwright 版本的 inspect_document。"""
+    if outcome.blocked:
+        return outcome
+    try:
+        head = await page.evaluate(_SNIFF_JS, BLOCK_SNIFF_BYTES)
+    except Exception:
+        return outcome
+    return _sniffed(head, page.url, outcome)
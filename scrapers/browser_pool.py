@@ -0,0 +1,339 @@
+"""
+Chromium 浏览器池
+
+- 常驻 sync_playwright 实例, 按 (proxy, headless) 复用已启动的 Chromium
+- 每次租用新建独立 context (UA / Cookie 隔离), 关闭 context 的代价远小于重启浏览器
+- 浏览器在服务 BROWSER_MAX_PAGES 个页面或进程内存超过 BROWSER_MAX_RSS_MB 后回收重启
+- 池大小 BROWSER_POOL_SIZE: 同时保留的浏览器数量 (不同代理各占一个), 超出时淘汰最久未用
+- Playwright sync API 绑定创建线程, 因此每个线程持有独立的池 (get_browser_pool)
+- 单次 scrape_amazon 结束即关闭池 (release_browser_pool): Streamlit 每次重跑使用新线程, 线程级池不会被复用;
+  批量 worker / 沙箱在 keep_browser_pool() 范围内连续采集多个 URL, 共用同一个浏览器, 退出范围时关闭
+- 详情页并发采集用的 async Chromium 同样归池管理 (run_async): 池内一个后台线程常驻事件循环与
+  async_playwright, 浏览器按 (proxy, headless) 复用, 与 sync 浏览器同样按页面数回收、随池一起关闭;
+  因此批量 worker 内整批任务的详情阶段也只启动一次 async Chromium
+
+配置可通过环境变量覆盖 (见 config/_scraper_config.md)。
+"""
+
+import os
+import time
+import atexit
+import asyncio
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from .logger import log_info, log_error
+
+try:
+    import psutil  # 可选: 用于按内存阈值回收浏览器
+except ImportError:
+    psutil = None
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "200"))
+BROWSER_MAX_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", "1500"))
+
+
+class _BrowserSlot:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages_served = 0
+        self.launched_at = time.time()
+        self.last_used = time.time()
+        self.broken = False
+
+    def rss_mb(self) -> Optional[float]:
+        """浏览器进程树的常驻内存 (MB); 未安装 psutil 时返回 None。"""
+        if psutil is None:
+            return None
+        try:
+            pid = self.browser.process.pid if getattr(self.browser, "process", None) else None
+        except Exception:
+            pid = None
+        if not pid:
+            return None
+        try:
+            proc = psutil.Process(pid)
+            total = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    def should_recycle(self, max_pages: int, max_rss_mb: float) -> bool:
+        if self.broken:
+            return True
+        if max_pages and self.pages_served >= max_pages:
+            return True
+        if max_rss_mb:
+            rss = self.rss_mb()
+            if rss is not None and rss >= max_rss_mb:
+                log_info(f"[POOL] 浏览器内存 {round(rss,1)}MB 超过阈值 {max_rss_mb}MB")
+                return True
+        return False
+
+
+class BrowserPool:
+    """
+    单线程使用的 Chromium 池。用法:
+
+        with pool.lease_page(proxy, ua, headless) as page:
+            page.goto(url)
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES,
+                 max_rss_mb: float = BROWSER_MAX_RSS_MB):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._pw = None
+        self._slots: "OrderedDict[Tuple[Optional[str], bool], _BrowserSlot]" = OrderedDict()
+        self.launches = 0
+        self.owner = threading.get_ident()   # sync API 只能在创建线程中使用 / 关闭
+        # async 浏览器: 只在后台事件循环线程中创建 / 使用 / 关闭
+        self._aloop: Optional[asyncio.AbstractEventLoop] = None
+        self._athread: Optional[threading.Thread] = None
+        self._apw = None
+        self._aslots: "OrderedDict[Tuple[Optional[str], bool], _BrowserSlot]" = OrderedDict()
+        self.async_launches = 0
+
+    # ---------- 生命周期 ----------
+    def _playwright(self):
+        if self._pw is None:
+            from playwright.sync_api import sync_playwright
+            self._pw = sync_playwright().start()
+        return self._pw
+
+    def _launch(self, proxy: Optional[str], headless: bool):
+        browser = self._playwright().chromium.launch(
+            headless=headless,
+            proxy={"server": proxy} if proxy else None
+        )
+        self.launches += 1
+        log_info(f"[POOL] 启动浏览器 proxy={proxy} headless={headless} (launches={self.launches})")
+        return browser
+
+    def _close_slot(self, key, slot: _BrowserSlot):
+        try:
+            slot.browser.close()
+        except Exception as e:
+            log_error(f"[POOL] 关闭浏览器失败: {repr(e)}")
+        log_info(f"[POOL] 回收浏览器 proxy={key[0]} pages={slot.pages_served}")
+
+    def _acquire_slot(self, proxy: Optional[str], headless: bool) -> _BrowserSlot:
+        key = (proxy, headless)
+        slot = self._slots.get(key)
+        if slot is not None and (slot.should_recycle(self.max_pages, self.max_rss_mb)
+                                 or not slot.browser.is_connected()):
+            self._slots.pop(key)
+            self._close_slot(key, slot)
+            slot = None
+        if slot is None:
+            while len(self._slots) >= self.size:
+                old_key, old_slot = self._slots.popitem(last=False)
+                self._close_slot(old_key, old_slot)
+            slot = _BrowserSlot(self._launch(proxy, headless))
+            self._slots[key] = slot
+        self._slots.move_to_end(key)
+        return slot
+
+    @contextmanager
+    def lease_page(self, proxy: Optional[str], ua: str, headless: bool = True, **context_kwargs):
+        """
+        租用一个新页面 (位于独立 context 中), 退出时关闭 context, 浏览器保留复用。
+        页面使用过程中抛出的异常会让该浏览器在下次租用时被回收。
+        """
+        slot = self._acquire_slot(proxy, headless)
+        context = slot.browser.new_context(user_agent=ua, **context_kwargs)
+        try:
+            page = context.new_page()
+            yield page
+        except Exception:
+            slot.broken = not slot.browser.is_connected()
+            raise
+        finally:
+            slot.pages_served += 1
+            slot.last_used = time.time()
+            try:
+                context.close()
+            except Exception:
+                slot.broken = True
+
+    # ---------- async 浏览器 (详情页并发) ----------
+    def _async_loop(self) -> asyncio.AbstractEventLoop:
+        if self._aloop is None:
+            self._aloop = asyncio.new_event_loop()
+            self._athread = threading.Thread(target=self._aloop.run_forever, name="browser-pool-async", daemon=True)
+            self._athread.start()
+        return self._aloop
+
+    async def _launch_async(self, proxy: Optional[str], headless: bool):
+        if self._apw is None:
+            from playwright.async_api import async_playwright
+            self._apw = await async_playwright().start()
+        browser = await self._apw.chromium.launch(
+            headless=headless,
+            proxy={"server": proxy} if proxy else None
+        )
+        self.async_launches += 1
+        log_info(f"[POOL] 启动 async 浏览器 proxy={proxy} headless={headless} (launches={self.async_launches})")
+        return browser
+
+    async def _close_async_slot(self, key, slot: _BrowserSlot):
+        try:
+            await slot.browser.close()
+        except Exception as e:
+            log_error(f"[POOL] 关闭 async 浏览器失败: {repr(e)}")
+        log_info(f"[POOL] 回收 async 浏览器 proxy={key[0]} pages={slot.pages_served}")
+
+    async def _acquire_async_slot(self, proxy: Optional[str], headless: bool) -> _BrowserSlot:
+        key = (proxy, headless)
+        slot = self._aslots.get(key)
+        if slot is not None and (slot.should_recycle(self.max_pages, self.max_rss_mb)
+                                 or not slot.browser.is_connected()):
+            self._aslots.pop(key)
+            await self._close_async_slot(key, slot)
+            slot = None
+        if slot is None:
+            while len(self._aslots) >= self.size:
+                old_key, old_slot = self._aslots.popitem(last=False)
+                await self._close_async_slot(old_key, old_slot)
+            slot = _BrowserSlot(await self._launch_async(proxy, headless))
+            self._aslots[key] = slot
+        self._aslots.move_to_end(key)
+        return slot
+
+    def run_async(self, fn, proxy: Optional[str], headless: bool = True, pages: int = 1):
+        """
+        在池的后台事件循环中执行 fn(browser) 返回的协程并等待结果; browser 为按 (proxy, headless) 复用的
+        async Chromium。pages 为本次大约服务的页面数, 计入回收阈值。
+        """
+        async def main():
+            slot = await self._acquire_async_slot(proxy, headless)
+            try:
+                return await fn(slot.browser)
+            except Exception:
+                slot.broken = not slot.browser.is_connected()
+                raise
+            finally:
+                slot.pages_served += pages
+                slot.last_used = time.time()
+
+        return asyncio.run_coroutine_threadsafe(main(), self._async_loop()).result()
+
+    def _close_async(self):
+        loop, self._aloop = self._aloop, None
+        if loop is None:
+            return
+
+        async def shutdown():
+            while self._aslots:
+                key, slot = self._aslots.popitem(last=False)
+                await self._close_async_slot(key, slot)
+            if self._apw is not None:
+                try:
+                    await self._apw.stop()
+                except Exception as e:
+                    log_error(f"[POOL] 停止 async Playwright 失败: {repr(e)}")
+                self._apw = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(shutdown(), loop).result(timeout=60)
+        except Exception as e:
+            log_error(f"[POOL] 关闭 async 浏览器超时或失败: {repr(e)}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._athread is not None:
+            self._athread.join(5)
+            self._athread = None
+        if not loop.is_running():
+            loop.close()
+
+    def stats(self) -> dict:
+        return {
+            "browsers": len(self._slots),
+            "launches": self.launches,
+            "pages_served": sum(s.pages_served for s in self._slots.values()),
+            "async_browsers": len(self._aslots),
+            "async_launches": self.async_launches,
+        }
+
+    def close(self):
+        self._close_async()
+        while self._slots:
+            key, slot = self._slots.popitem(last=False)
+            self._close_slot(key, slot)
+        if self._pw is not None:
+            try:
+                self._pw.stop()
+            except Exception as e:
+                log_error(f"[POOL] 停止 Playwright 失败: {repr(e)}")
+            self._pw = None
+
+
+# ================== 线程级单例 ==================
+_local = threading.local()
+_all_pools = []
+_all_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """返回当前线程的浏览器池 (首次调用时创建)。"""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool()
+        _local.pool = pool
+        with _all_lock:
+            _all_pools.append(pool)
+    return pool
+
+
+@contextmanager
+def keep_browser_pool():
+    """范围内多次采集共用当前线程的浏览器池 (可嵌套), 最外层退出时关闭。"""
+    _local.keep = getattr(_local, "keep", 0) + 1
+    try:
+        yield get_browser_pool()
+    finally:
+        _local.keep -= 1
+        if not _local.keep:
+            close_browser_pool()
+
+
+def release_browser_pool():
+    """单次采集结束时调用: 不在 keep_browser_pool 范围内则关闭当前线程的池。"""
+    if not getattr(_local, "keep", 0):
+        close_browser_pool()
+
+
+def close_browser_pool():
+    """关闭当前线程的浏览器池 (批量任务/沙箱测试结束时调用)。"""
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
+        with _all_lock:
+            if pool in _all_pools:
+                _all_pools.remove(pool)
+
+
+@atexit.register
+def _close_all():
+    # sync API 对象只能在创建线程中关闭; 其它线程遗留的池随进程退出由 Playwright 驱动进程清理
+    current = threading.get_ident()
+    with _all_lock:
+        pools = [p for p in _all_pools if p.owner == current]
+        leaked = len(_all_pools) - len(pools)
+        _all_pools.clear()
+    if leaked:
+        log_error(f"[POOL] 进程退出时仍有 {leaked} 个其它线程的浏览器池未释放")
+    for pool in pools:
+        try:
+            pool.close()
+        except Exception:
+            pass
@@ -1,19 +1,13 @@
 import time
 from .logger import log_info, log_error
+from .block_detector import is_block_page
 
 def detect_captcha(html: str) -> bool:
     """
     简单检测页面是否可能是验证码/反机器人页面。
-    可根据实际 Amazon 返回的 HTML 再补关键词。
+    关键词统一维护在 block_detector.BLOCK_MARKERS。
     """
-    if not html:
-        return False
-    markers = [
-        "captcha", "verify you are a human", "enter the characters",
-        "/errors/validateCaptcha", "robot check"
-    ]
-    low = html.lower()
-    return any(m in low for m in markers)
+    return is_block_page(html)
 
 def solve_captcha_manual(page) -> bool:
     """
@@ -0,0 +1,163 @@
+"""
+详情页缓存 (按 ASIN / 规范化 detail_url)
+
+定时任务反复抓同一批 Bestseller / 搜索页, 其中大部分商品的详情几小时前刚采过。
+缓存保存解析后的详情字段与内容哈希, 存放在 SQLite (data/state/detail_cache.sqlite):
+
+- 新鲜 (< DETAIL_CACHE_TTL_HOURS)          直接复用, 不再请求详情页
+- 过期但 < DETAIL_CACHE_MAX_AGE_HOURS       重新抓取 (分层抓取优先走 HTTP, 代价低), 比较内容哈希
+                                             判断是否变化; 抓取失败时退回缓存内容
+- 更旧                                      视为未命中
+条目数超过 DETAIL_CACHE_MAX_ENTRIES 时按最近访问时间 (LRU) 淘汰。
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from .logger import log_info, log_error
+
+DETAIL_CACHE_ENABLED = os.getenv("DETAIL_CACHE_ENABLED", "1") == "1"
+DETAIL_CACHE_PATH = os.getenv("DETAIL_CACHE_PATH", "data/state/detail_cache.sqlite")
+DETAIL_CACHE_TTL_HOURS = float(os.getenv("DETAIL_CACHE_TTL_HOURS", "12"))
+DETAIL_CACHE_MAX_AGE_HOURS = float(os.getenv("DETAIL_CACHE_MAX_AGE_HOURS", "72"))
+DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("DETAIL_CACHE_MAX_ENTRIES", "20000"))
+
+_ASIN_RE = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})(?:[/?]|$)")
+_HASH_FIELDS = ("title", "price", "desc")
+
+FRESH, STALE, MISS = "fresh", "stale", "miss"
+
+
+def asin_of(detail_url: str) -> Optional[str]:
+    m = _ASIN_RE.search(detail_url or "")
+    return m.group(1) if m else None
+
+
+def cache_key(detail_url: str) -> str:
+    m = _ASIN_RE.search(detail_url)
+    if m:
+        return "asin:" + m.group(1)
+    parsed = urlparse(detail_url)
+    return "url:" + parsed.netloc.lower() + parsed.path.rstrip("/")
+
+
+def content_hash(fields: Dict[str, Any]) -> str:
+    payload = json.dumps({k: fields.get(k, "") for k in _HASH_FIELDS}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class DetailCache:
+    def __init__(self, path: str = DETAIL_CACHE_PATH, ttl_hours: float = DETAIL_CACHE_TTL_HOURS,
+                 max_age_hours: float = DETAIL_CACHE_MAX_AGE_HOURS, max_entries: int = DETAIL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.max_age = max(max_age_hours, ttl_hours) * 3600
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts = 0
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "unchanged": 0, "changed": 0, "served_stale": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # 详情并发阶段在独立线程回调写入, 连接跨线程共享并由锁串行化
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS detail_cache ("
+            " key TEXT PRIMARY KEY, fields TEXT NOT NULL, hash TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL, validated_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_detail_cache_access ON detail_cache(last_access)")
+        self._conn.commit()
+
+    def lookup(self, detail_url: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """返回 (fresh|stale|miss, 缓存字段)。"""
+        key = cache_key(detail_url)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fields, validated_at FROM detail_cache WHERE key=?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.stats[MISS] += 1
+                return MISS, None
+            self._conn.execute("UPDATE detail_cache SET last_access=? WHERE key=?", (now, key))
+            state = FRESH if now - row[1] <= self.ttl else STALE
+            self.stats[state] += 1
+        fields = json.loads(row[0])
+        fields["url"] = detail_url
+        return state, fields
+
+    def store(self, detail_url: str, fields: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+        """写入成功解析的详情; previous 为过期缓存内容时记录是否变化。"""
+        if fields.get("error") or not fields.get("title"):
+            return
+        key = cache_key(detail_url)
+        digest = content_hash(fields)
+        now = time.time()
+        with self._lock:
+            if previous is not None:
+                self.stats["unchanged" if content_hash(previous) == digest else "changed"] += 1
+            self._conn.execute(
+                "INSERT INTO detail_cache(key, fields, hash, fetched_at, validated_at, last_access)"
+                " VALUES(?,?,?,?,?,?)"
+                " ON CONFLICT(key) DO UPDATE SET fields=excluded.fields, validated_at=excluded.validated_at,"
+                " last_access=excluded.last_access,"
+                " fetched_at=CASE WHEN detail_cache.hash=excluded.hash THEN detail_cache.fetched_at"
+                " ELSE excluded.fetched_at END, hash=excluded.hash",
+                (key, json.dumps(fields, ensure_ascii=False), digest, now, now, now)
+            )
+            self._puts += 1
+            if self._puts % 100 == 0:
+                self._evict()
+            self._conn.commit()
+
+    def served_stale(self):
+        with self._lock:
+            self.stats["served_stale"] += 1
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM detail_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM detail_cache WHERE key IN "
+                "(SELECT key FROM detail_cache ORDER BY last_access ASC LIMIT ?)", (excess,)
+            )
+            log_info(f"[DETAIL_CACHE] LRU 淘汰 {excess} 条")
+
+    def flush(self):
+        with self._lock:
+            self._evict()
+            self._conn.commit()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            st = dict(self.stats)
+        lookups = st["fresh"] + st["stale"] + st["miss"]
+        st["hit_rate"] = round(st["fresh"] / lookups, 3) if lookups else None
+        return st
+
+
+_cache: Optional[DetailCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_detail_cache() -> Optional[DetailCache]:
+    """进程内单例; DETAIL_CACHE_ENABLED=0 或无法打开数据库时返回 None。"""
+    global _cache
+    if not DETAIL_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = DetailCache()
+            except Exception as e:
+                log_error(f"[DETAIL_CACHE] 打开缓存失败: {repr(e)}")
+                return None
+        return _cache
@@ -0,0 +1,241 @@
+"""
+页面抓取资源过滤 (fetch profile)
+
+通过 page.route 拦截请求, 按资源类型与域名 allow/deny 列表中止不需要的下载
+(图片 / 字体 / 视频 / 广告与统计脚本), 我们只读取少量 DOM 节点, 这些资源只会浪费代理流量与加载时间。
+
+内置 profile:
+- full     不拦截 (对照基线)
+- lean     拦截 image / media / font 以及广告、统计域名 (默认)
+- minimal  在 lean 基础上再拦截 stylesheet 与非 Amazon 域名的第三方脚本
+
+额外域名可通过环境变量追加 (逗号分隔): FETCH_DENY_DOMAINS / FETCH_ALLOW_DOMAINS。
+allow 优先于 deny; 主文档请求 (document) 永不拦截。
+
+FetchStats 按 (profile, 页面类型) 记录传输字节与加载耗时, 以及按资源类型统计的拦截次数。
+节省量估算不依赖同一进程内跑过 full 基线: 拦截次数 x 该类型资源的典型大小, 典型大小优先取本进程
+实际放行的同类型响应均值, 没有样本时用 FETCH_TYPICAL_BYTES (可用环境变量覆盖, 如 "image=40000,font=30000")。
+同一进程内有 full 基线时另给出实测差值。
+字节数取自响应头 Content-Length, 分块传输的响应不计入, 因此为保守估计。
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .logger import log_info
+
+AD_DOMAINS = [
+    "amazon-adsystem.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "google-analytics.com",
+    "googletagmanager.com",
+    "fls-na.amazon.com",
+    "unagi.amazon.com",
+    "unagi-na.amazon.com",
+    "aax-us-east.amazon-adsystem.com",
+]
+
+FIRST_PARTY_DOMAINS = [
+    "amazon.com",
+    "media-amazon.com",
+    "ssl-images-amazon.com",
+    "images-amazon.com",
+]
+
+
+def _env_list(name: str):
+    return [d.strip().lower() for d in os.getenv(name, "").split(",") if d.strip()]
+
+
+def _env_sizes(name: str, defaults: Dict[str, int]) -> Dict[str, int]:
+    sizes = dict(defaults)
+    for item in _env_list(name):
+        key, _, value = item.partition("=")
+        try:
+            sizes[key.strip()] = int(value)
+        except ValueError:
+            pass
+    return sizes
+
+
+# 被拦截资源的典型传输大小 (字节), 只在本进程没有同类型放行样本时使用
+FETCH_TYPICAL_BYTES = _env_sizes("FETCH_TYPICAL_BYTES", {
+    "image": 25000, "media": 300000, "font": 40000, "stylesheet": 30000, "script": 45000, "other": 5000,
+})
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class FetchProfile:
+    def __init__(self, name: str, block_types: Iterable[str] = (), deny_domains: Iterable[str] = (),
+                 allow_domains: Iterable[str] = (), third_party_scripts: bool = True):
+        self.name = name
+        self.block_types = set(block_types)
+        self.deny_domains = [d.lower() for d in deny_domains] + _env_list("FETCH_DENY_DOMAINS")
+        self.allow_domains = [d.lower() for d in allow_domains] + _env_list("FETCH_ALLOW_DOMAINS")
+        self.third_party_scripts = third_party_scripts
+
+    @property
+    def intercepts(self) -> bool:
+        return bool(self.block_types or self.deny_domains or not self.third_party_scripts)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type == "document":
+            return False
+        host = (urlparse(url).hostname or "").lower()
+        if self.allow_domains and _host_matches(host, self.allow_domains):
+            return False
+        if _host_matches(host, self.deny_domains):
+            return True
+        if resource_type in self.block_types:
+            return True
+        if (not self.third_party_scripts and resource_type == "script"
+                and not _host_matches(host, FIRST_PARTY_DOMAINS)):
+            return True
+        return False
+
+
+FETCH_PROFILES: Dict[str, FetchProfile] = {
+    "full": FetchProfile("full"),
+    "lean": FetchProfile("lean", block_types=["image", "media", "font"], deny_domains=AD_DOMAINS),
+    "minimal": FetchProfile("minimal", block_types=["image", "media", "font", "stylesheet"],
+                            deny_domains=AD_DOMAINS, third_party_scripts=False),
+}
+
+
+def get_profile(name: Optional[str]) -> FetchProfile:
+    return FETCH_PROFILES.get(name or "full", FETCH_PROFILES["full"])
+
+
+# ================== 统计 ==================
+class _PageCounter:
+    """单个页面的请求计数, 由 route / response 回调累加。"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.blocked = 0
+        self.requests = 0
+        self.blocked_types: Dict[str, int] = {}
+        self.type_bytes: Dict[str, List[int]] = {}   # resource_type -> [字节数, 响应数]
+
+    def on_block(self, resource_type: str):
+        self.blocked += 1
+        self.blocked_types[resource_type] = self.blocked_types.get(resource_type, 0) + 1
+
+    def on_response(self, response):
+        try:
+            size = int(response.headers.get("content-length", 0) or 0)
+        except (TypeError, ValueError):
+            return
+        self.bytes += size
+        if size:
+            try:
+                acc = self.type_bytes.setdefault(response.request.resource_type, [0, 0])
+            except Exception:
+                return
+            acc[0] += size
+            acc[1] += 1
+
+
+class FetchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._acc: Dict[Tuple[str, str], Dict] = {}
+        self._sizes: Dict[str, List[int]] = {}   # 放行响应按资源类型累计的 [字节数, 响应数]
+
+    def record(self, profile: str, kind: str, counter: _PageCounter, secs: float):
+        with self._lock:
+            acc = self._acc.setdefault((profile, kind), {"pages": 0, "bytes": 0, "secs": 0.0, "blocked": 0,
+                                                         "blocked_types": {}})
+            acc["pages"] += 1
+            acc["bytes"] += counter.bytes
+            acc["secs"] += secs
+            acc["blocked"] += counter.blocked
+            for rtype, n in counter.blocked_types.items():
+                acc["blocked_types"][rtype] = acc["blocked_types"].get(rtype, 0) + n
+            for rtype, (size, n) in counter.type_bytes.items():
+                total = self._sizes.setdefault(rtype, [0, 0])
+                total[0] += size
+                total[1] += n
+        log_info(f"[FETCH] profile={profile} kind={kind} bytes={counter.bytes} "
+                 f"blocked={counter.blocked} secs={round(secs, 3)}",
+                 stage=kind, duration=round(secs, 3), bytes=counter.bytes, profile=profile)
+
+    def typical_bytes(self, resource_type: str) -> int:
+        """该类型资源的典型大小: 本进程放行响应的均值, 无样本时取 FETCH_TYPICAL_BYTES。"""
+        with self._lock:
+            size, n = self._sizes.get(resource_type, (0, 0))
+        if n:
+            return int(size / n)
+        return FETCH_TYPICAL_BYTES.get(resource_type, FETCH_TYPICAL_BYTES.get("other", 0))
+
+    def report(self) -> Dict[str, Dict]:
+        """
+        每个 (profile, kind) 的平均字节 / 耗时与拦截情况:
+        est_bytes_saved_per_page   按资源类型的拦截次数 x 典型大小估算, 不需要 full 基线
+        bytes_saved_per_page / load_time_delta_secs (负数表示更快)   同类页面在本进程有 full 基线时的实测差值
+        """
+        out = {}
+        with self._lock:
+            snapshot = {k: dict(v, blocked_types=dict(v["blocked_types"])) for k, v in self._acc.items()}
+        for (profile, kind), acc in snapshot.items():
+            pages = acc["pages"] or 1
+            row = {
+                "pages": acc["pages"],
+                "avg_bytes": int(acc["bytes"] / pages),
+                "avg_secs": round(acc["secs"] / pages, 3),
+                "blocked": acc["blocked"],
+            }
+            if acc["blocked_types"]:
+                row["blocked_types"] = acc["blocked_types"]
+                est = sum(n * self.typical_bytes(rtype) for rtype, n in acc["blocked_types"].items())
+                row["est_bytes_saved_per_page"] = int(est / pages)
+            base = snapshot.get(("full", kind))
+            if base and profile != "full" and base["pages"]:
+                row["bytes_saved_per_page"] = int(base["bytes"] / base["pages"] - acc["bytes"] / pages)
+                row["load_time_delta_secs"] = round(acc["secs"] / pages - base["secs"] / base["pages"], 3)
+            out[f"{profile}/{kind}"] = row
+        return out
+
+
+fetch_stats = FetchStats()
+
+
+# ================== 安装拦截 ==================
+def install_sync(page, profile: FetchProfile) -> _PageCounter:
+    """在 sync Playwright 页面上安装拦截与字节统计, 返回计数器。"""
+    counter = _PageCounter()
+    page.on("response", counter.on_response)
+    if profile.intercepts:
+        def _handler(route):
+            req = route.request
+            counter.requests += 1
+            if profile.should_block(req.resource_type, req.url):
+                counter.on_block(req.resource_type)
+                route.abort()
+            else:
+                route.continue_()
+        page.route("**/*", _handler)
+    return counter
+
+
+async def install_async(page, profile: FetchProfile) -> _PageCounter:
+    """async Playwright 版本的 install_sync。"""
+    counter = _PageCounter()
+    page.on("response", counter.on_response)
+    if profile.intercepts:
+        async def _handler(route):
+            req = route.request
+            counter.requests += 1
+            if profile.should_block(req.resource_type, req.url):
+                counter.on_block(req.resource_type)
+                await route.abort()
+            else:
+                await route.continue_()
+        await page.route("**/*", _handler)
+    return counter
@@ -1,15 +1,262 @@
+"""
+爬虫日志 (队列 + 后台写线程)
+
+log_info / log_error 只把记录放入内存队列, 由后台 QueueListener 线程统一输出, 采集热路径不再同步写文件:
+- 控制台          原样打印消息 (LOG_CONSOLE=0 关闭)
+- scraper.log     文本格式 "时间 级别 消息", 与旧格式一致
+- scraper.jsonl   每行一个 JSON 记录, 含类型化字段:
+                  ts / level / tag (消息开头的 [TAG]) / msg / pid 以及调用方传入的
+                  url / stage / duration / items / proxy 等
+两个文件均按大小 (LOG_MAX_BYTES) 或时间 (LOG_ROTATE_HOURS) 轮转, 保留 LOG_BACKUPS 份。
+
+多进程: 只有主进程 (Streamlit / 命令行) 打开并轮转日志文件。创建子进程前调用 share_logging():
+主进程在 127.0.0.1 上启动带 authkey 的 multiprocessing.connection 日志服务, 地址与密钥写入环境变量
+LOG_SERVER / LOG_SERVER_KEY, spawn 出的批量 worker / 后台任务 / 变体搜索进程继承后把记录转发给它,
+自己不再打开 scraper.log, 避免多个进程同时轮转同一文件 (Windows 上文件被其它进程占用时重命名会失败)。
+导入本模块没有副作用: 后台写线程在第一条日志时启动, 日志服务在第一次创建子进程时才启动。
+日志服务不可达时子进程退回写入带 pid 后缀的独立文件。
+
+兼容旧调用: log_info("[TAG] ...") 不变; 需要结构化字段时追加关键字参数:
+    log_info(f"[LIST_TIME] secs={secs}", url=url, stage="list", duration=secs)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import atexit
 import logging
+import threading
+import logging.handlers
+import secrets
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from typing import Any, Dict, Optional
+
+LOG_FILE = os.getenv("LOG_FILE", "scraper.log")
+LOG_JSON_FILE = os.getenv("LOG_JSON_FILE", "scraper.jsonl")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024)))
+LOG_ROTATE_HOURS = float(os.getenv("LOG_ROTATE_HOURS", "24"))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_CONSOLE = os.getenv("LOG_CONSOLE", "1") == "1"
+
+_TAG_RE = re.compile(r"^\[([\w\-]+)\]")
+
+
+class _RotatingHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler 增加按时间轮转: 当前文件写入超过 LOG_ROTATE_HOURS 后也轮转。"""
+
+    def __init__(self, filename: str):
+        super().__init__(filename, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8", delay=True)
+        self._opened_at = self._file_birth()
+
+    def _file_birth(self) -> float:
+        try:
+            return os.path.getmtime(self.baseFilename) if os.path.getsize(self.baseFilename) else time.time()
+        except OSError:
+            return time.time()
+
+    def shouldRollover(self, record) -> bool:
+        if LOG_ROTATE_HOURS > 0 and time.time() - self._opened_at >= LOG_ROTATE_HOURS * 3600:
+            return os.path.exists(self.baseFilename) and os.path.getsize(self.baseFilename) > 0
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record) -> str:
+        msg = record.getMessage()
+        m = _TAG_RE.match(msg)
+        doc: Dict[str, Any] = {
+            "ts": round(record.created, 3),
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "tag": m.group(1) if m else None,
+            "msg": msg,
+            "pid": record.process,
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            doc.update(fields)
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class _ForwardHandler(logging.Handler):
+    """子进程: 把记录发送给主进程的日志服务, 由主进程统一写文件与轮转。"""
+
+    def __init__(self, conn):
+        super().__init__()
+        self._conn = conn
+
+    def emit(self, record):
+        try:
+            doc = dict(record.__dict__)
+            doc.update(msg=record.getMessage(), args=None, exc_info=None, exc_text=None)
+            doc.pop("message", None)
+            self._conn.send(doc)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            super().close()
+
+
+class _LogServer:
+    """主进程: 接收子进程转发的记录, 放入本进程的日志队列。"""
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord]"):
+        self._q = q
+        self.authkey = secrets.token_bytes(16)
+        self._listener = Listener(("127.0.0.1", 0), authkey=self.authkey)
+        host, port = self._listener.address
+        self.address = f"{host}:{port}"
+        threading.Thread(target=self._accept_loop, name="log-server", daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                return  # 监听已关闭
+            except Exception:
+                continue  # 认证失败等
+            threading.Thread(target=self._recv_loop, args=(conn,), name="log-server-conn", daemon=True).start()
+
+    def _recv_loop(self, conn):
+        with conn:
+            while True:
+                try:
+                    self._q.put_nowait(logging.makeLogRecord(conn.recv()))
+                except (EOFError, OSError):
+                    return
+                except Exception as e:
+                    # 单条记录无法解析 (反序列化失败 / 不是 dict) 时丢弃该条, 继续接收该子进程的后续记录
+                    self._q.put_nowait(logging.makeLogRecord({
+                        "name": _logger.name, "levelno": logging.ERROR, "levelname": "ERROR",
+                        "msg": f"[LOG] 丢弃无法解析的子进程日志记录: {repr(e)}"}))
+
+    def close(self):
+        self._listener.close()
+
+
+_logger = logging.getLogger("scrapers")
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue: Optional["queue.Queue[logging.LogRecord]"] = None
+_server: Optional[_LogServer] = None
+_init_lock = threading.Lock()
+
+
+def _connect_parent() -> Optional[logging.Handler]:
+    address = os.getenv("LOG_SERVER")
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    try:
+        conn = Client((host, int(port)), authkey=bytes.fromhex(os.getenv("LOG_SERVER_KEY", "")))
+    except Exception as e:
+        print(f"[LOG] 无法连接主进程日志服务 {address}: {repr(e)}, 改写本进程独立文件", file=sys.stderr)
+        return None
+    return _ForwardHandler(conn)
+
+
+def _pid_file(path: str) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{os.getpid()}{ext}"
+
+
+def _ensure_started():
+    global _listener, _queue
+    if _listener is not None:
+        return
+    with _init_lock:
+        if _listener is not None:
+            return
+        q: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        forward = _connect_parent()
+        if forward is not None:
+            handlers = [forward]
+        else:
+            # 主进程 (或日志服务不可达的子进程) 自己写文件
+            child = bool(os.getenv("LOG_SERVER"))
+            handlers = []
+            text = _RotatingHandler(_pid_file(LOG_FILE) if child else LOG_FILE)
+            text.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            handlers.append(text)
+            if LOG_JSON_FILE:
+                jsonl = _RotatingHandler(_pid_file(LOG_JSON_FILE) if child else LOG_JSON_FILE)
+                jsonl.setFormatter(_JsonFormatter())
+                handlers.append(jsonl)
+            if LOG_CONSOLE:
+                console = logging.StreamHandler(sys.stdout)
+                console.setFormatter(logging.Formatter("%(message)s"))
+                handlers.append(console)
+
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        _logger.addHandler(logging.handlers.QueueHandler(q))
+        _listener = logging.handlers.QueueListener(q, *handlers, respect_handler_level=False)
+        _listener.start()
+        _queue = q
+        atexit.register(shutdown_logging)
+
+
+def share_logging():
+    """
+    创建子进程前调用: 主进程启动日志服务并发布 LOG_SERVER / LOG_SERVER_KEY, 子进程继承后把日志转发回来。
+    子进程内 (已继承 LOG_SERVER) 或服务已启动时不做任何事, 可重复调用。
+    """
+    global _server
+    _ensure_started()
+    if _server is not None or os.getenv("LOG_SERVER"):
+        return
+    with _init_lock:
+        if _server is not None or _queue is None:
+            return
+        try:
+            _server = _LogServer(_queue)
+        except OSError as e:
+            print(f"[LOG] 日志服务启动失败, 子进程将各自写文件: {repr(e)}", file=sys.stderr)
+            return
+        os.environ["LOG_SERVER"] = _server.address
+        os.environ["LOG_SERVER_KEY"] = _server.authkey.hex()
+
+
+def shutdown_logging():
+    """停止后台线程并写出队列中剩余记录 (进程退出时自动调用)。"""
+    global _listener, _queue, _server
+    with _init_lock:
+        listener, _listener = _listener, None
+        server, _server = _server, None
+        _queue = None
+    if server is not None:
+        server.close()
+        os.environ.pop("LOG_SERVER", None)
+        os.environ.pop("LOG_SERVER_KEY", None)
+    if listener is not None:
+        listener.stop()
+        for h in listener.handlers:
+            h.close()
+        for h in list(_logger.handlers):
+            _logger.removeHandler(h)
+
+
+def _emit(level: int, msg: str, fields: Dict[str, Any]):
+    _ensure_started()
+    _logger.log(level, msg, extra={"fields": {k: v for k, v in fields.items() if v is not None}})
+
+
+def log_info(msg: str, **fields):
+    _emit(logging.INFO, msg, fields)
 
-logging.basicConfig(
-    filename="scraper.log",
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(message)s"
-)
 
-def log_info(msg: str):
-    print(msg)
-    logging.info(msg)
+def log_error(msg: str, **fields):
+    _emit(logging.ERROR, msg, fields)
 
-def log_error(msg: str):
-    print(msg)
-    logging.error(msg)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""
+页面就绪判定 (替代固定次数滚动 + 固定 sleep)
+
+列表页每次滚动后轮询页面中可解析出的商品数 (与 _rows_from_nodes 相同: 命中列表选择器、
+内部链接以 / 开头, 按去掉 query 的 href 去重), 并跟踪页面的进行中请求:
+- 商品数增长                  立即进入下一次滚动
+- 商品数未增长且网络空闲      观察满 quiet_secs 后判定为一次 "平台期"
+- 单次滚动最多等待 max_wait_secs
+连续 READY_PLATEAU_ROUNDS 次平台期、商品数达到 target、或滚动次数达到 max_scrolls 时停止。
+商品在首屏已足够时不滚动。
+请求跟踪需在 page.goto 之前用 track_inflight(page) 挂上: 导航期间发出的请求若没被计入, 它们完成时
+计数会被压到 0, 网络仍在加载就被判定为空闲。
+"""
+
+import os
+import time
+import threading
+from typing import Any, Dict, List, Optional
+
+READY_POLL_MS = int(os.getenv("READY_POLL_MS", "150"))                 # 商品数轮询间隔
+READY_IDLE_MS = int(os.getenv("READY_IDLE_MS", "400"))                 # 无进行中请求持续多久视为网络空闲
+READY_PLATEAU_ROUNDS = int(os.getenv("READY_PLATEAU_ROUNDS", "1"))     # 连续几次滚动无新增即停止
+
+_COUNT_JS = """
+([listSel, linkSels]) => {
+    const seen = new Set();
+    for (const el of document.querySelectorAll(listSel)) {
+        for (const sel of linkSels) {
+            const a = el.querySelector(sel);
+            if (!a) continue;
+            const href = a.getAttribute('href') || '';
+            if (href.startsWith('/')) seen.add(href.split('?')[0]);
+            break;
+        }
+    }
+    return seen.size;
+}
+"""
+
+
+class _InflightTracker:
+    """通过 request / requestfinished / requestfailed 事件统计进行中请求 (被拦截的请求会触发 requestfailed)。"""
+
+    def __init__(self, page):
+        self._lock = threading.Lock()
+        self.inflight = 0
+        self.last_change = time.monotonic()
+        page.on("request", self._on_start)
+        page.on("requestfinished", self._on_end)
+        page.on("requestfailed", self._on_end)
+
+    def _on_start(self, _request):
+        with self._lock:
+            self.inflight += 1
+            self.last_change = time.monotonic()
+
+    def _on_end(self, _request):
+        with self._lock:
+            self.inflight = max(0, self.inflight - 1)
+            self.last_change = time.monotonic()
+
+    def idle(self) -> bool:
+        with self._lock:
+            return self.inflight == 0 and time.monotonic() - self.last_change >= READY_IDLE_MS / 1000
+
+
+def track_inflight(page) -> _InflightTracker:
+    """在导航前调用, 从第一条请求开始统计进行中请求; 结果传给 scroll_until_ready(tracker=...)。"""
+    return _InflightTracker(page)
+
+
+def count_items(page, list_selectors: List[str], link_selectors: List[str]) -> int:
+    try:
+        return int(page.evaluate(_COUNT_JS, [", ".join(list_selectors), list(link_selectors)]))
+    except Exception:
+        return 0
+
+
+def _wait_growth(page, tracker: _InflightTracker, list_selectors: List[str], link_selectors: List[str],
+                 baseline: int, quiet_secs: float, max_wait_secs: float) -> int:
+    start = time.monotonic()
+    while True:
+        page.wait_for_timeout(READY_POLL_MS)  # 让出给 Playwright 事件循环, 请求事件在此期间分发
+        count = count_items(page, list_selectors, link_selectors)
+        elapsed = time.monotonic() - start
+        if count > baseline or elapsed >= max_wait_secs:
+            return count
+        if elapsed >= quiet_secs and tracker.idle():
+            return count
+
+
+def scroll_until_ready(page, list_selectors: List[str], link_selectors: List[str], target: Optional[int],
+                       max_scrolls: int, quiet_secs: float, max_wait_secs: float,
+                       tracker: Optional[_InflightTracker] = None) -> Dict[str, Any]:
+    """
+    列表页滚动直到就绪, 返回 {"items", "scrolls", "reason", "secs"}。
+    reason: target (达到目标条数) / plateau (不再增长) / max_scrolls。
+    tracker: 导航前由 track_inflight 创建的跟踪器; 不传时从现在开始统计 (导航期间的请求不计入)。
+    """
+    start = time.monotonic()
+    tracker = tracker or _InflightTracker(page)
+    count = count_items(page, list_selectors, link_selectors)
+    scrolls = plateau = 0
+    reason = "max_scrolls"
+    while True:
+        if target and count >= target:
+            reason = "target"
+            break
+        if scrolls >= max_scrolls:
+            break
+        page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+        scrolls += 1
+        grown = _wait_growth(page, tracker, list_selectors, link_selectors, count, quiet_secs, max_wait_secs)
+        if grown > count:
+            plateau = 0
+        else:
+            plateau += 1
+            if plateau >= READY_PLATEAU_ROUNDS:
+                reason = "plateau"
+                break
+        count = grown
+    return {"items": count, "scrolls": scrolls, "reason": reason, "secs": round(time.monotonic() - start, 3)}
@@ -0,0 +1,178 @@
+"""
+商品数据库存储 (storage_mode="sqlite")
+
+基于 SQLAlchemy Core, 默认 data/products.sqlite (PRODUCT_DB_URL, 需为 SQLite URL, upsert 使用其 ON CONFLICT 语法):
+- 每条商品按 key (ASIN, 无 ASIN 时为规范化 detail_url, 与 detail_cache 相同) 唯一, 重复采集时 upsert:
+  更新标题 / 价格 / 描述 / 来源 URL 与 last_seen, 保留 first_seen; 新值为空的标题 / 价格 / 描述保留旧值,
+  详情抓取失败的记录 (含 error) 只插入新商品, 已有商品只刷新 last_seen, 不覆盖之前的完整记录
+- asin 与 source_url 建索引, 便于按商品或按列表页查询
+- 写入先进入内存缓冲, 满 PRODUCT_DB_BATCH 条 (或 flush) 时在一个事务内批量 upsert
+- SQLite 连接打开时设置 WAL + synchronous=NORMAL, 连接池复用连接
+"sqlite:///:memory:" 可用于离线测试: 所有线程共用同一个连接 (StaticPool), 访问由锁串行化,
+否则默认的 SingletonThreadPool 会给每个线程一个独立的空库 (异步详情线程写入时报 no such table)。
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table, Text, create_engine, event,
+                        func, select)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.pool import StaticPool
+
+from .logger import log_info, log_error
+from .detail_cache import cache_key, asin_of
+
+PRODUCT_DB_URL = os.getenv("PRODUCT_DB_URL", "sqlite:///data/products.sqlite")
+PRODUCT_DB_BATCH = int(os.getenv("PRODUCT_DB_BATCH", "200"))
+
+metadata = MetaData()
+products = Table(
+    "products", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("key", String(256), nullable=False, unique=True),
+    Column("asin", String(16)),
+    Column("detail_url", Text, nullable=False),
+    Column("source_url", Text),
+    Column("title", Text),
+    Column("price", String(64)),
+    Column("desc", Text),
+    Column("data", Text),
+    Column("first_seen", Float, nullable=False),
+    Column("last_seen", Float, nullable=False),
+    Index("idx_products_asin", "asin"),
+    Index("idx_products_source", "source_url"),
+)
+
+
+def _sqlite_pragmas(dbapi_conn, _record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+def _row(source_url: str, product: Dict[str, Any], now: float) -> Dict[str, Any]:
+    detail_url = product.get("url") or product.get("detail_url") or ""
+    return {
+        "key": cache_key(detail_url),
+        "asin": asin_of(detail_url),
+        "detail_url": detail_url,
+        "source_url": source_url,
+        "title": product.get("title", ""),
+        "price": product.get("price", ""),
+        "desc": product.get("desc", ""),
+        "data": json.dumps(product, ensure_ascii=False),
+        "first_seen": now,
+        "last_seen": now,
+        "_failed": bool(product.get("error")),  # 写入前移除, 不是表字段
+    }
+
+
+class ProductStore:
+    def __init__(self, url: str = PRODUCT_DB_URL, batch_size: int = PRODUCT_DB_BATCH):
+        self.url = url
+        self.batch_size = batch_size
+        if url.startswith("sqlite:///") and ":memory:" not in url:
+            os.makedirs(os.path.dirname(url[len("sqlite:///"):]) or ".", exist_ok=True)
+        memory = url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") == "sqlite:")
+        if memory:
+            self.engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+        else:
+            self.engine = create_engine(url, pool_pre_ping=True)
+            if self.engine.dialect.name == "sqlite":
+                event.listen(self.engine, "connect", _sqlite_pragmas)
+        metadata.create_all(self.engine)
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock() if memory else nullcontext()  # 单连接不能并发开启事务
+        self._buffer: List[Dict[str, Any]] = []
+
+    def add(self, source_url: str, product: Dict[str, Any]):
+        """缓冲一条商品, 满 batch_size 条时批量写入。"""
+        if not (product.get("url") or product.get("detail_url")):
+            return
+        with self._lock:
+            self._buffer.append(_row(source_url, product, time.time()))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        return self._write(rows)
+
+    def upsert_many(self, source_url: str, items: Iterable[Dict[str, Any]]) -> int:
+        now = time.time()
+        return self._write([_row(source_url, p, now) for p in items if p.get("url") or p.get("detail_url")])
+
+    def _write(self, rows: List[Dict[str, Any]]) -> int:
+        if not rows:
+            return 0
+        # 同一批内重复的 key 只保留最后一条 (ON CONFLICT 不能在一条语句内更新同一行两次), 失败记录不顶替成功记录
+        latest: Dict[str, Dict[str, Any]] = {}
+        for r in rows:
+            prev = latest.get(r["key"])
+            if prev is None or prev["_failed"] or not r["_failed"]:
+                latest[r["key"]] = r
+        rows = list(latest.values())
+        good, failed = [], []
+        for r in rows:
+            (failed if r.pop("_failed") else good).append(r)
+
+        stmt = sqlite_insert(products)
+        set_ = {c: stmt.excluded[c] for c in ("asin", "detail_url", "source_url", "data", "last_seen")}
+        set_.update({c: func.coalesce(func.nullif(stmt.excluded[c], ""), products.c[c]) for c in ("title", "price", "desc")})
+        good_stmt = stmt.on_conflict_do_update(index_elements=[products.c.key], set_=set_)
+        failed_stmt = stmt.on_conflict_do_update(index_elements=[products.c.key],
+                                                 set_={"last_seen": stmt.excluded.last_seen})
+        start = time.time()
+        try:
+            with self._db_lock, self.engine.begin() as conn:
+                for stmt, batch in ((good_stmt, good), (failed_stmt, failed)):
+                    for i in range(0, len(batch), self.batch_size):
+                        conn.execute(stmt, batch[i:i + self.batch_size])
+        except Exception as e:
+            log_error(f"[PRODUCT_DB] 写入失败 rows={len(rows)}: {repr(e)}")
+            raise
+        log_info(f"[PRODUCT_DB] upsert rows={len(rows)} secs={round(time.time() - start, 3)}",
+                 stage="store", items=len(rows), duration=round(time.time() - start, 3))
+        return len(rows)
+
+    def query(self, source_url: Optional[str] = None, asin: Optional[str] = None,
+              limit: int = 100) -> List[Dict[str, Any]]:
+        stmt = select(products).order_by(products.c.last_seen.desc()).limit(limit)
+        if source_url:
+            stmt = stmt.where(products.c.source_url == source_url)
+        if asin:
+            stmt = stmt.where(products.c.asin == asin)
+        with self._db_lock, self.engine.connect() as conn:
+            return [dict(r._mapping) for r in conn.execute(stmt)]
+
+    def count(self, source_url: Optional[str] = None) -> int:
+        stmt = select(func.count()).select_from(products)
+        if source_url:
+            stmt = stmt.where(products.c.source_url == source_url)
+        with self._db_lock, self.engine.connect() as conn:
+            return conn.execute(stmt).scalar_one()
+
+    def close(self):
+        self.flush()
+        self.engine.dispose()
+
+
+_stores: Dict[str, ProductStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_product_store(url: Optional[str] = None) -> ProductStore:
+    url = url or PRODUCT_DB_URL
+    with _stores_lock:
+        store = _stores.get(url)
+        if store is None:
+            store = _stores[url] = ProductStore(url)
+        return store
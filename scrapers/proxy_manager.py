@@ -1,13 +1,212 @@
+"""
+代理池 (按健康分加权选择 + 熔断)
+
+代理来源 (合并去重):
+- 下方 PROXY_LIST
+- 环境变量 PROXY_LIST (逗号分隔)
+- 文件 PROXY_FILE (默认 config/proxies.txt, 每行一个, # 开头为注释)
+
+每个代理记录成功率、验证码率与导航耗时 (p50 / p95), 由页面加载 / HTTP 层在每次请求后上报。
+选择时按健康分加权随机:
+    score = 成功率(平滑) * (1 - 验证码率) / (1 + p50 / PROXY_LATENCY_REF)
+连续失败 (或验证码) PROXY_FAIL_THRESHOLD 次进入隔离, 隔离时长按 PROXY_QUARANTINE_BASE 指数退避
+(上限 PROXY_QUARANTINE_MAX); 隔离结束后重新参与选择, 成功一次即清零。
+统计持久化在 data/state/proxy_stats.json, 跨运行保留 (多进程批量采集时以最后写入为准)。
+"""
+
+import os
+import json
+import time
 import random
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from .logger import log_info, log_error
 
-# 在这里配置你的代理池（可改为从文件或远程服务动态加载）
+# 在这里配置你的代理池（也可通过 PROXY_LIST 环境变量或 PROXY_FILE 文件加载）
 PROXY_LIST = [
     # 示例（需替换为真实可用代理）
     # "http://user:pass@ip:port",
     # "http://ip:port",
 ]
 
-def get_random_proxy():
-    if not PROXY_LIST:
+PROXY_FILE = os.getenv("PROXY_FILE", "config/proxies.txt")
+PROXY_STATE_FILE = os.getenv("PROXY_STATE_FILE", "data/state/proxy_stats.json")
+PROXY_FAIL_THRESHOLD = int(os.getenv("PROXY_FAIL_THRESHOLD", "3"))
+PROXY_QUARANTINE_BASE = float(os.getenv("PROXY_QUARANTINE_BASE", "60"))      # 首次隔离秒数
+PROXY_QUARANTINE_MAX = float(os.getenv("PROXY_QUARANTINE_MAX", "3600"))      # 隔离上限秒数
+PROXY_LATENCY_REF = float(os.getenv("PROXY_LATENCY_REF", "3.0"))             # 延迟惩罚的参考秒数
+_LATENCY_WINDOW = 200
+
+
+def load_proxies() -> List[str]:
+    proxies = list(PROXY_LIST)
+    proxies += [p.strip() for p in os.getenv("PROXY_LIST", "").split(",") if p.strip()]
+    if PROXY_FILE and os.path.exists(PROXY_FILE):
+        try:
+            with open(PROXY_FILE, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        proxies.append(line)
+        except Exception as e:
+            log_error(f"[PROXY] 读取 {PROXY_FILE} 失败: {repr(e)}")
+    return list(dict.fromkeys(proxies))
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
         return None
-    return random.choice(PROXY_LIST)
\ No newline at end of file
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+class _ProxyHealth:
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.ok = state.get("ok", 0)
+        self.fail = state.get("fail", 0)
+        self.captcha = state.get("captcha", 0)
+        self.strikes = state.get("strikes", 0)
+        self.quarantines = state.get("quarantines", 0)
+        self.quarantine_until = state.get("quarantine_until", 0.0)
+        self.latencies = deque(state.get("latencies", []), maxlen=_LATENCY_WINDOW)
+
+    @property
+    def total(self) -> int:
+        return self.ok + self.fail + self.captcha
+
+    def score(self) -> float:
+        success = (self.ok + 1) / (self.total + 2)       # Laplace 平滑, 新代理约 0.5
+        captcha_rate = self.captcha / self.total if self.total else 0.0
+        p50 = _percentile(list(self.latencies), 0.5) or 0.0
+        return max(success * (1 - captcha_rate) / (1 + p50 / PROXY_LATENCY_REF), 0.01)
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok, "fail": self.fail, "captcha": self.captcha, "strikes": self.strikes,
+            "quarantines": self.quarantines, "quarantine_until": self.quarantine_until,
+            "latencies": list(self.latencies),
+        }
+
+
+class ProxyPool:
+    def __init__(self, proxies: Optional[List[str]] = None, state_file: str = PROXY_STATE_FILE):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._dirty = 0
+        saved = self._load()
+        self.proxies = load_proxies() if proxies is None else list(proxies)
+        self.health: Dict[str, _ProxyHealth] = {p: _ProxyHealth(saved.get(p)) for p in self.proxies}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                log_error(f"[PROXY] 读取状态失败: {repr(e)}")
+        return {}
+
+    def pick(self) -> Optional[str]:
+        """按健康分加权随机选择未隔离的代理; 全部隔离时返回最早解除隔离的一个。"""
+        if not self.proxies:
+            return None
+        now = time.time()
+        with self._lock:
+            available = [p for p in self.proxies if self.health[p].quarantine_until <= now]
+            if not available:
+                proxy = min(self.proxies, key=lambda p: self.health[p].quarantine_until)
+                log_error(f"[PROXY] 全部代理处于隔离中, 使用最早解除的 {proxy}")
+                return proxy
+            weights = [self.health[p].score() for p in available]
+        return random.choices(available, weights=weights, k=1)[0]
+
+    def record(self, proxy: Optional[str], ok: bool, latency: Optional[float] = None, captcha: bool = False):
+        """上报一次请求结果; latency 为导航 / HTTP 响应耗时 (秒)。"""
+        if not proxy or proxy not in self.health:
+            return
+        with self._lock:
+            h = self.health[proxy]
+            if captcha:
+                h.captcha += 1
+            elif ok:
+                h.ok += 1
+            else:
+                h.fail += 1
+            if latency is not None and ok and not captcha:
+                h.latencies.append(round(latency, 3))
+            if ok and not captcha:
+                h.strikes = 0
+            else:
+                h.strikes += 1
+                if h.strikes >= PROXY_FAIL_THRESHOLD:
+                    backoff = min(PROXY_QUARANTINE_BASE * (2 ** h.quarantines), PROXY_QUARANTINE_MAX)
+                    h.quarantine_until = time.time() + backoff
+                    h.quarantines += 1
+                    h.strikes = 0
+                    log_error(f"[PROXY] 隔离 {proxy} {int(backoff)}s (第 {h.quarantines} 次)")
+            if ok and not captcha and h.quarantines and h.quarantine_until <= time.time():
+                h.quarantines = 0  # 解除隔离后恢复正常, 退避重新计
+            self._dirty += 1
+            dirty = self._dirty
+        if dirty >= 20:
+            self.flush()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.time()
+        out = {}
+        with self._lock:
+            for p, h in self.health.items():
+                lat = list(h.latencies)
+                out[p] = {
+                    "requests": h.total,
+                    "success_rate": round(h.ok / h.total, 3) if h.total else None,
+                    "captcha_rate": round(h.captcha / h.total, 3) if h.total else None,
+                    "p50": _percentile(lat, 0.5),
+                    "p95": _percentile(lat, 0.95),
+                    "score": round(h.score(), 3),
+                    "quarantined_secs": max(0, int(h.quarantine_until - now)),
+                }
+        return out
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            saved = self._load()
+            saved.update({p: h.to_state() for p, h in self.health.items()})
+            self._dirty = 0
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            log_error(f"[PROXY] 保存状态失败: {repr(e)}")
+
+
+_pool: Optional[ProxyPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool() -> ProxyPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProxyPool()
+            if _pool.proxies:
+                log_info(f"[PROXY] 已加载 {len(_pool.proxies)} 个代理")
+        return _pool
+
+
+def get_random_proxy():
+    """兼容旧入口: 现按健康分加权选择。"""
+    return get_proxy_pool().pick()
+
+
+def report_proxy(proxy: Optional[str], ok: bool, latency: Optional[float] = None, captcha: bool = False):
+    if proxy:
+        get_proxy_pool().record(proxy, ok, latency, captcha)
@@ -0,0 +1,211 @@
+"""
+按域名的自适应限速 (令牌桶 + AIMD)
+
+与页面渲染等待无关: 渲染就绪由 page_readiness 判定, 这里只决定同一域名请求的起始时间。
+每个域名一个令牌桶 (速率 rate 次/秒, 容量 RATE_BURST), HTTP 层、sync 浏览器页面与 async 详情并发
+共享同一个限速器; 请求前预约令牌, 不足时等待 (令牌可为负, 表示排队中的预约)。
+另加 [0, RATE_JITTER] 秒随机抖动 (礼貌间隔, 避免请求呈固定节奏)。
+
+速率按页面反馈调整 (AIMD):
+- 正常页面      rate += RATE_AI_STEP (上限 RATE_MAX)
+- 验证码 / 空列表 / 429 / 503
+                rate *= RATE_MD_FACTOR (下限 RATE_MIN), 并清空已积累的令牌;
+                RATE_MD_HOLD 秒内的多次拦截只降速一次 (并发中的请求往往同时失败), 期间也不加速
+学到的速率持久化在 data/state/rate_limits.json, 下次运行从该速率起步。
+
+跨进程共享: 令牌桶状态保存在 SQLite 文件 RATE_SHARED_DB 中, 每次预约 / 反馈在一个 BEGIN IMMEDIATE
+事务内读改写。批量 worker、并发的后台任务与变体搜索进程 (工作目录相同即共用同一文件) 共同消耗同一个
+域名预算, 任一进程被拦截时所有进程一起降速。RATE_SHARED_DB 留空或文件不可用时退回进程内令牌桶。
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from .logger import log_info, log_error
+
+RATE_INITIAL = float(os.getenv("RATE_INITIAL", "0.6"))         # 初始速率 (次/秒/域名)
+RATE_MIN = float(os.getenv("RATE_MIN", "0.1"))
+RATE_MAX = float(os.getenv("RATE_MAX", "4.0"))
+RATE_BURST = float(os.getenv("RATE_BURST", "2"))               # 令牌桶容量
+RATE_AI_STEP = float(os.getenv("RATE_AI_STEP", "0.05"))        # 每个正常页面的加速量
+RATE_MD_FACTOR = float(os.getenv("RATE_MD_FACTOR", "0.5"))     # 被拦截时的降速倍数
+RATE_MD_HOLD = float(os.getenv("RATE_MD_HOLD", "5"))           # 降速后的保持期 (秒)
+RATE_JITTER = float(os.getenv("RATE_JITTER", "0.3"))           # 每次请求额外随机等待上限 (秒)
+RATE_STATE_FILE = os.getenv("RATE_STATE_FILE", "data/state/rate_limits.json")
+RATE_SHARED_DB = os.getenv("RATE_SHARED_DB", "data/state/rate_buckets.sqlite")  # 留空 = 仅进程内限速
+
+
+class _Bucket:
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = min(1.0, RATE_BURST)
+        self.updated = time.time()  # 墙钟时间: 共享状态需要跨进程可比
+        self.hold_until = 0.0
+        self.blocks = 0
+
+    def refill(self, now: float):
+        self.tokens = min(RATE_BURST, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def row(self, host: str) -> tuple:
+        return host, self.rate, self.tokens, self.updated, self.hold_until, self.blocks
+
+
+class DomainRateLimiter:
+    def __init__(self, state_file: str = RATE_STATE_FILE, shared_db: Optional[str] = RATE_SHARED_DB):
+        self.state_file = state_file
+        self.shared_db = shared_db
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, _Bucket] = {}
+        self._dirty = 0
+        self._learned = self._load()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+
+    def _load(self) -> Dict[str, float]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return {h: float(r) for h, r in json.load(f).items()}
+            except Exception as e:
+                log_error(f"[RATE] 读取状态失败: {repr(e)}")
+        return {}
+
+    def _bucket(self, host: str) -> _Bucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate = min(max(self._learned.get(host, RATE_INITIAL), RATE_MIN), RATE_MAX)
+            bucket = self._buckets[host] = _Bucket(rate)
+        return bucket
+
+    def _shared(self) -> Optional[sqlite3.Connection]:
+        """本进程到共享状态库的连接 (调用方持有 self._lock); 不可用时返回 None。"""
+        if not self.shared_db:
+            return None
+        if self._db is None or self._db_pid != os.getpid():
+            try:
+                os.makedirs(os.path.dirname(self.shared_db) or ".", exist_ok=True)
+                db = sqlite3.connect(self.shared_db, timeout=10, isolation_level=None, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=OFF")
+                db.execute("CREATE TABLE IF NOT EXISTS buckets (host TEXT PRIMARY KEY, rate REAL, tokens REAL, "
+                           "updated REAL, hold_until REAL, blocks INTEGER)")
+            except sqlite3.Error as e:
+                log_error(f"[RATE] 共享限速库不可用, 改为进程内限速: {repr(e)}")
+                self.shared_db = None
+                return None
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+
+    @contextmanager
+    def _locked_bucket(self, host: str):
+        """持锁访问 host 的令牌桶; 启用共享库时在同一事务内载入最新状态, 退出时写回。"""
+        with self._lock:
+            bucket = self._bucket(host)
+            db = self._shared()
+            if db is not None:
+                try:
+                    db.execute("BEGIN IMMEDIATE")
+                    row = db.execute("SELECT rate, tokens, updated, hold_until, blocks FROM buckets WHERE host = ?",
+                                     (host,)).fetchone()
+                except sqlite3.Error as e:
+                    log_error(f"[RATE] 读取共享限速状态失败: {repr(e)}")
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+                    db = None
+                else:
+                    if row is not None:
+                        bucket.rate, bucket.tokens, bucket.updated, bucket.hold_until, bucket.blocks = row
+            try:
+                yield bucket
+            except BaseException:
+                if db is not None:
+                    db.execute("ROLLBACK")
+                raise
+            if db is not None:
+                try:
+                    db.execute("INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?, ?, ?)", bucket.row(host))
+                    db.execute("COMMIT")
+                except sqlite3.Error as e:
+                    log_error(f"[RATE] 写入共享限速状态失败: {repr(e)}")
+                    if db.in_transaction:
+                        db.execute("ROLLBACK")
+
+    def reserve(self, url: str) -> float:
+        """预约一个令牌, 返回调用方还需等待的秒数 (不阻塞)。"""
+        with self._locked_bucket(urlparse(url).netloc) as bucket:
+            bucket.refill(time.time())
+            bucket.tokens -= 1
+            delay = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0.0
+        return delay + random.uniform(0, RATE_JITTER)
+
+    def wait(self, url: str):
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self, url: str):
+        # reserve() 在共享库上 BEGIN IMMEDIATE, 可能等其他进程的锁; 放到线程里, 不阻塞事件循环
+        delay = await asyncio.to_thread(self.reserve, url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def feedback(self, url: str, ok: bool, reason: str = ""):
+        """上报页面结果: ok=False 表示被拦截 (验证码 / 空列表 / 限流状态码)。"""
+        host = urlparse(url).netloc
+        with self._locked_bucket(host) as bucket:
+            now = time.time()
+            if ok:
+                if now < bucket.hold_until or bucket.rate >= RATE_MAX:
+                    return
+                bucket.refill(now)
+                bucket.rate = min(RATE_MAX, bucket.rate + RATE_AI_STEP)
+            else:
+                if now < bucket.hold_until:
+                    return
+                bucket.refill(now)
+                before = bucket.rate
+                bucket.rate = max(RATE_MIN, bucket.rate * RATE_MD_FACTOR)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.hold_until = now + RATE_MD_HOLD
+                bucket.blocks += 1
+                log_info(f"[RATE] {host} 降速 {round(before, 3)} -> {round(bucket.rate, 3)} req/s reason={reason}")
+            self._dirty += 1
+            dirty = self._dirty
+        if dirty >= 20:
+            self.flush()
+
+    def rate(self, url: str) -> float:
+        with self._locked_bucket(urlparse(url).netloc) as bucket:
+            return round(bucket.rate, 3)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {h: {"rate": round(b.rate, 3), "blocks": b.blocks} for h, b in self._buckets.items()}
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._learned.update({h: round(b.rate, 4) for h, b in self._buckets.items()})
+            snapshot = dict(self._learned)
+            self._dirty = 0
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            log_error(f"[RATE] 保存状态失败: {repr(e)}")
+
+
+rate_limiter = DomainRateLimiter()
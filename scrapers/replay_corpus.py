@@ -0,0 +1,175 @@
+"""
+离线录制 / 回放语料库 (沙箱评估用)
+
+录制 (record): 正常抓取, 每个成功获取的列表页 / 详情页 HTML 写入语料库
+回放 (replay): 不访问网络也不启动浏览器, 直接从语料库返回 HTML; 未录制的 URL 抛出 ReplayMiss
+
+目录结构 (默认 data/corpus, REPLAY_CORPUS_DIR):
+  blobs/ab/<sha256>.html.gz   按内容哈希寻址的 gzip 压缩 HTML, 内容相同的页面只存一份
+  index.jsonl                 追加写索引, 每行 {"key", "url", "sha", "kind", "bytes", "ts"}, 同一 key 以最后一行为准
+key 为规范化 URL (去掉 fragment, 查询参数排序), 同一页面不同写法命中同一条记录。
+
+REPLAY_MODE (环境变量): off (默认) / record / replay; 也可用 replay_session(mode, corpus_dir) 在代码中临时切换。
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from .logger import log_info, log_error
+
+REPLAY_MODE = os.getenv("REPLAY_MODE", "off")
+REPLAY_CORPUS_DIR = os.getenv("REPLAY_CORPUS_DIR", "data/corpus")
+
+_MODES = ("off", "record", "replay")
+
+
+class ReplayMiss(RuntimeError):
+    """回放模式下请求了未录制的 URL。"""
+
+    def __init__(self, url: str):
+        super().__init__(f"replay miss: {url}")
+        self.url = url
+
+
+def corpus_key(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", query, ""))
+
+
+class ReplayCorpus:
+    def __init__(self, corpus_dir: str = REPLAY_CORPUS_DIR):
+        self.corpus_dir = corpus_dir
+        self.index_file = os.path.join(corpus_dir, "index.jsonl")
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        index: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self.index_file):
+            return index
+        with open(self.index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # 写了一半的行
+                index[rec["key"]] = rec
+        return index
+
+    def _blob_path(self, sha: str) -> str:
+        return os.path.join(self.corpus_dir, "blobs", sha[:2], sha + ".html.gz")
+
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            rec = self._index.get(corpus_key(url))
+        if rec is not None:
+            try:
+                with gzip.open(self._blob_path(rec["sha"]), "rt", encoding="utf-8") as f:
+                    html = f.read()
+                self.hits += 1
+                return html
+            except OSError as e:
+                log_error(f"[REPLAY] 读取语料失败 {url}: {repr(e)}")
+        self.misses += 1
+        return None
+
+    def put(self, url: str, html: str, kind: str = "page"):
+        if not html:
+            return
+        data = html.encode("utf-8")
+        sha = hashlib.sha256(data).hexdigest()
+        blob = self._blob_path(sha)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            tmp = blob + f".{os.getpid()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp, blob)
+        rec = {"key": corpus_key(url), "url": url, "sha": sha, "kind": kind, "bytes": len(data),
+               "ts": round(time.time(), 3)}
+        with self._lock:
+            os.makedirs(self.corpus_dir, exist_ok=True)
+            with open(self.index_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._index[rec["key"]] = rec
+            self.recorded += 1
+
+    def age(self, url: str) -> Optional[float]:
+        """已录制页面的年龄 (秒), 未录制时返回 None。"""
+        with self._lock:
+            rec = self._index.get(corpus_key(url))
+        return None if rec is None else time.time() - rec["ts"]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pages": len(self._index), "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_mode = REPLAY_MODE if REPLAY_MODE in _MODES else "off"
+_corpus: Optional[ReplayCorpus] = None
+_state_lock = threading.Lock()
+
+
+def _active() -> Optional[ReplayCorpus]:
+    global _corpus
+    if _mode == "off":
+        return None
+    with _state_lock:
+        if _corpus is None:
+            _corpus = ReplayCorpus(REPLAY_CORPUS_DIR)
+        return _corpus
+
+
+def replaying() -> bool:
+    return _mode == "replay"
+
+
+def replay_page(url: str) -> Optional[str]:
+    """回放模式下返回语料中的 HTML (未录制时抛出 ReplayMiss); 其它模式返回 None, 调用方照常抓取。"""
+    if _mode != "replay":
+        return None
+    html = _active().get(url)
+    if html is None:
+        log_error(f"[REPLAY] 未录制: {url}", url=url, stage="replay")
+        raise ReplayMiss(url)
+    return html
+
+
+def record_page(url: str, html: str, kind: str = "page"):
+    """录制模式下保存抓取到的 HTML; 其它模式不做任何事。"""
+    if _mode != "record":
+        return
+    try:
+        _active().put(url, html, kind)
+    except Exception as e:
+        log_error(f"[REPLAY] 录制失败 {url}: {repr(e)}")
+
+
+@contextmanager
+def replay_session(mode: str, corpus_dir: Optional[str] = None):
+    """临时切换模式与语料目录 (沙箱评估用), 退出时恢复并输出统计。"""
+    global _mode, _corpus
+    if mode not in _MODES:
+        raise ValueError(f"unknown replay mode: {mode}")
+    with _state_lock:
+        prev = (_mode, _corpus)
+        _mode = mode
+        _corpus = ReplayCorpus(corpus_dir or REPLAY_CORPUS_DIR) if mode != "off" else None
+        corpus = _corpus
+    try:
+        yield corpus
+    finally:
+        if corpus is not None:
+            log_info(f"[REPLAY] mode={mode} {corpus.stats()}")
+        with _state_lock:
+            _mode, _corpus = prev
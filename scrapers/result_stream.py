@@ -0,0 +1,152 @@
+"""
+采集结果的流式读写
+
+- ResultWriter   按条追加压缩 NDJSON (每行一个 JSON 对象, 无缩进), 不必把整份结果 dump 成一个大 JSON。
+                 写入 <path>.part, close() 时原子替换为正式文件, 读取方不会看到写了一半的压缩流。
+- iter_results   逐行迭代读取 (.ndjson / .ndjson.gz / .ndjson.zst, 以及旧的 .json 列表文件)
+- export_parquet 流式转换为 Parquet 列式文件 (按批写 row group, 需安装 pyarrow)
+
+压缩方式 RESULT_CODEC: gzip (默认) / zstd (需安装 zstandard, 未安装时退回 gzip) / none。
+"""
+
+import io
+import os
+import json
+import gzip
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .logger import log_info, log_error
+
+try:
+    import zstandard  # 可选: 更快、压缩率更高
+except ImportError:
+    zstandard = None
+
+RESULT_CODEC = os.getenv("RESULT_CODEC", "gzip")
+PARQUET_FIELDS = ("title", "url", "price", "desc", "error")
+
+_EXTENSIONS = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst", "none": ".ndjson"}
+
+
+def _resolve_codec(codec: Optional[str]) -> str:
+    codec = (codec or RESULT_CODEC).lower()
+    if codec == "zstd" and zstandard is None:
+        log_error("[RESULT] 未安装 zstandard, 改用 gzip")
+        return "gzip"
+    return codec if codec in _EXTENSIONS else "gzip"
+
+
+class ResultWriter:
+    def __init__(self, base_path: str, codec: Optional[str] = None):
+        self.codec = _resolve_codec(codec)
+        self.path = base_path + _EXTENSIONS[self.codec]
+        self._part = self.path + ".part"
+        self.count = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        raw = open(self._part, "wb")
+        if self.codec == "gzip":
+            self._fh = gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6)
+            self._raw = raw
+        elif self.codec == "zstd":
+            self._fh = zstandard.ZstdCompressor(level=3).stream_writer(raw)
+            self._raw = None  # stream_writer 关闭时一并关闭底层文件
+        else:
+            self._fh, self._raw = raw, None
+
+    def write(self, item: Dict[str, Any]):
+        self._fh.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+        self.count += 1
+
+    def write_many(self, items: Iterable[Dict[str, Any]]):
+        for item in items:
+            self.write(item)
+
+    def close(self) -> Tuple[str, int]:
+        """结束写入并替换正式文件, 返回 (路径, 条数)。"""
+        self._fh.close()
+        if self._raw is not None:
+            self._raw.close()
+        os.replace(self._part, self.path)
+        return self.path, self.count
+
+    def abort(self):
+        try:
+            self._fh.close()
+            if self._raw is not None:
+                self._raw.close()
+        finally:
+            if os.path.exists(self._part):
+                os.remove(self._part)
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def find_results(base_path: str) -> Optional[str]:
+    """返回 base_path 对应的最新结果文件 (任意格式), 不存在时返回 None。"""
+    candidates = [base_path + ext for ext in list(_EXTENSIONS.values()) + [".json"]]
+    existing = [p for p in candidates if os.path.exists(p)]
+    return max(existing, key=os.path.getmtime) if existing else None
+
+
+def iter_results(path: str) -> Iterator[Dict[str, Any]]:
+    """逐条迭代结果文件; 损坏的行 (如异常中断的尾行) 跳过。"""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)  # 旧格式只能整体加载
+        yield from (data if isinstance(data, list) else [])
+        return
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def export_parquet(src: str, dest: Optional[str] = None, batch_size: int = 5000) -> str:
+    """
+    流式导出 Parquet: 固定列 PARQUET_FIELDS (字符串), 其余字段序列化进 extra 列 (JSON)。
+    需安装 pyarrow。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    dest = dest or src.split(".ndjson")[0].rsplit(".json", 1)[0] + ".parquet"
+    schema = pa.schema([(f, pa.string()) for f in PARQUET_FIELDS] + [("extra", pa.string())])
+    writer = pq.ParquetWriter(dest, schema, compression="zstd")
+    total = 0
+    try:
+        batch: List[Dict[str, Any]] = []
+        for item in iter_results(src):
+            batch.append(item)
+            if len(batch) >= batch_size:
+                total += _write_batch(writer, schema, batch)
+                batch = []
+        if batch:
+            total += _write_batch(writer, schema, batch)
+    finally:
+        writer.close()
+    log_info(f"[RESULT] Parquet 导出 {src} -> {dest} rows={total}")
+    return dest
+
+
+def _write_batch(writer, schema, batch: List[Dict[str, Any]]) -> int:
+    import pyarrow as pa
+
+    columns = {f: [None if r.get(f) is None else str(r.get(f)) for r in batch] for f in PARQUET_FIELDS}
+    extras = [{k: v for k, v in r.items() if k not in PARQUET_FIELDS} for r in batch]
+    columns["extra"] = [json.dumps(e, ensure_ascii=False) if e else None for e in extras]
+    writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+    return len(batch)
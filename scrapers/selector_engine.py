@@ -0,0 +1,248 @@
+"""
+列表 / 详情页解析后端
+
+两个实现提供相同接口 (parse / select / select_one / text / attr / dedupe), amazon_scraper 的解析流程
+只写一份, 按 PARSER_BACKEND 选择:
+
+- lxml (默认)  lxml.etree 解析一次, CSS 选择器预编译为 etree.XPath 并缓存, 不再构建 BeautifulSoup 树
+- bs4          原 BeautifulSoup + soupsieve 实现, 作为对照基线 (tools/bench_parser.py 校验两者输出一致)
+
+CSS → XPath 使用内置转换器, 覆盖本项目用到的子集: 标签 / * / #id / .class / [attr] /
+[attr=v] [attr*=v] [attr^=v] [attr$=v] [attr~=v] / 后代组合符 / 逗号分组。
+后代组合符按 soupsieve 语义转换: 在节点内 select_one("h2 a span") 只要求 span 在节点内,
+其祖先 a / h2 可以位于节点之外。其他语法 (>, +, 伪类等) 在安装了 cssselect 时交给它处理。
+"""
+
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lxml import etree
+
+PARSER_BACKEND = os.getenv("PARSER_BACKEND", "lxml")
+
+_CLASS_TEST = "contains(concat(' ', normalize-space(@class), ' '), {})"
+_PART_RE = re.compile(
+    r"#(?P<id>[\w-]+)"
+    r"|\.(?P<cls>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$~]?=)\s*(?P<val>\"[^\"]*\"|'[^']*'|[^\]\s]+)\s*)?\]"
+)
+_TAG_RE = re.compile(r"[a-zA-Z][\w-]*|\*")
+
+
+def _literal(value: str) -> str:
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    return "concat(" + ", \"'\", ".join(f"'{p}'" for p in value.split("'")) + ")"
+
+
+def _split_outside_brackets(text: str, sep: str) -> List[str]:
+    parts, buf, depth, quote = [], [], 0, None
+    for ch in text:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif depth == 0 and (ch == sep or (sep == " " and ch.isspace())):
+            if buf:
+                parts.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    if buf:
+        parts.append("".join(buf))
+    return parts
+
+
+def _compound_to_xpath(compound: str) -> str:
+    """div.a-price[data-x*='y'] -> div[contains(...)][contains(@data-x, 'y')]"""
+    m = _TAG_RE.match(compound)
+    tag = m.group(0).lower() if m else "*"
+    rest = compound[m.end():] if m else compound
+    preds = []
+    pos = 0
+    for pm in _PART_RE.finditer(rest):
+        if pm.start() != pos:
+            raise ValueError(f"unsupported selector: {compound!r}")
+        pos = pm.end()
+        if pm.group("id"):
+            preds.append(f"@id={_literal(pm.group('id'))}")
+        elif pm.group("cls"):
+            preds.append(_CLASS_TEST.format(_literal(" " + pm.group("cls") + " ")))
+        else:
+            attr, op, val = pm.group("attr").lower(), pm.group("op"), pm.group("val")
+            if val and val[0] in "\"'":
+                val = val[1:-1]
+            if not op:
+                preds.append(f"@{attr}")
+            elif op == "=":
+                preds.append(f"@{attr}={_literal(val)}")
+            elif not val:
+                preds.append("false()")  # CSS: 空串的 *= ^= $= ~= 永不匹配
+            elif op == "*=":
+                preds.append(f"contains(@{attr}, {_literal(val)})")
+            elif op == "^=":
+                preds.append(f"starts-with(@{attr}, {_literal(val)})")
+            elif op == "$=":
+                preds.append(f"substring(@{attr}, string-length(@{attr}) - {len(val) - 1})={_literal(val)}")
+            else:
+                preds.append(_CLASS_TEST.format(_literal(" " + val + " ")).replace("@class", f"@{attr}"))
+    if pos != len(rest):
+        raise ValueError(f"unsupported selector: {compound!r}")
+    return tag + "".join(f"[{p}]" for p in preds)
+
+
+def css_to_xpath(selector: str, scoped: bool = False) -> str:
+    """
+    scoped=False: 整个文档 (soup.select);  scoped=True: 上下文节点的后代 (node.select_one)。
+    """
+    prefix = ".//" if scoped else "//"
+    branches = []
+    for group in _split_outside_brackets(selector, ","):
+        group = group.strip()
+        if re.search(r"[>+~:]", re.sub(r"\[[^\]]*\]", "", group)):
+            raise ValueError(f"unsupported selector: {group!r}")
+        compounds = [_compound_to_xpath(c) for c in _split_outside_brackets(group, " ")]
+        expr = compounds[-1]
+        ancestors = ""
+        for comp in compounds[:-1]:
+            ancestors = f"[ancestor::{comp}{ancestors}]"
+        branches.append(prefix + expr + ancestors)
+    return " | ".join(branches)
+
+
+def _compile(selector: str, scoped: bool) -> etree.XPath:
+    try:
+        return etree.XPath(css_to_xpath(selector, scoped))
+    except ValueError:
+        from cssselect import GenericTranslator  # 可选依赖, 仅复杂选择器需要
+        prefix = "descendant::" if scoped else "descendant-or-self::"
+        return etree.XPath(GenericTranslator().css_to_xpath(selector, prefix=prefix))
+
+
+# ================== 后端实现 ==================
+class LxmlEngine:
+    name = "lxml"
+
+    def __init__(self):
+        self._cache: Dict[Tuple[str, bool], etree.XPath] = {}
+        self._parser = etree.HTMLParser()
+
+    def precompile(self, selectors: Iterable[str], scoped: bool):
+        for sel in selectors:
+            self._xpath(sel, scoped)
+
+    def _xpath(self, selector: str, scoped: bool) -> etree.XPath:
+        key = (selector, scoped)
+        xp = self._cache.get(key)
+        if xp is None:
+            xp = self._cache[key] = _compile(selector, scoped)
+        return xp
+
+    def parse(self, html: str):
+        root = None
+        if html and html.strip():
+            try:
+                root = etree.fromstring(html, self._parser)
+            except ValueError:
+                # 带 <?xml encoding=...?> 声明的 str 不能直接解析, 按 UTF-8 字节重试
+                root = etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+            except etree.XMLSyntaxError:
+                root = None
+        return root if root is not None else etree.fromstring("<html></html>", self._parser)
+
+    def select(self, doc, selector: str) -> List[Any]:
+        return self._xpath(selector, False)(doc)
+
+    def select_one(self, node, selector: str):
+        found = self._xpath(selector, True)(node)
+        return found[0] if found else None
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name)
+
+    def text(self, node) -> str:
+        """等价于 bs4 get_text(strip=True): 拼接各段去空白文本, 跳过注释与 script/style/template 内容。"""
+        if node is None:
+            return ""
+        if node.tag == "img":
+            return (node.get("alt") or "").strip()
+        parts: List[str] = []
+        self._collect_text(node, parts)
+        return "".join(parts)
+
+    def _collect_text(self, el, parts: List[str]):
+        if isinstance(el.tag, str) and el.tag not in ("script", "style", "template") and el.text:
+            t = el.text.strip()
+            if t:
+                parts.append(t)
+        for child in el:
+            self._collect_text(child, parts)
+            if child.tail:
+                t = child.tail.strip()
+                if t:
+                    parts.append(t)
+
+    def dedupe(self, nodes: List[Any]) -> List[Any]:
+        # 与 bs4 Tag 的相等语义一致: 序列化结果相同的节点视为同一个
+        seen, out = set(), []
+        for node in nodes:
+            key = etree.tostring(node, with_tail=False)
+            if key not in seen:
+                seen.add(key)
+                out.append(node)
+        return out
+
+
+class SoupEngine:
+    name = "bs4"
+
+    def precompile(self, selectors: Iterable[str], scoped: bool):
+        pass
+
+    def parse(self, html: str):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "lxml")
+
+    def select(self, doc, selector: str) -> List[Any]:
+        return doc.select(selector)
+
+    def select_one(self, node, selector: str):
+        return node.select_one(selector)
+
+    def attr(self, node, name: str) -> Optional[str]:
+        return node.get(name) if node.has_attr(name) else None
+
+    def text(self, node) -> str:
+        if not node:
+            return ""
+        if getattr(node, "name", "") == "img":
+            return node.get("alt", "").strip()
+        return node.get_text(strip=True)
+
+    def dedupe(self, nodes: List[Any]) -> List[Any]:
+        return list(dict.fromkeys(nodes))
+
+
+_engines: Dict[str, Any] = {}
+
+
+def get_engine(backend: Optional[str] = None, list_selectors: Iterable[str] = (),
+               node_selectors: Iterable[str] = ()):
+    """
+    返回解析后端 (进程内单例)。传入选择器时预编译 (已编译过的直接命中缓存),
+    配置区块被替换为新的选择器组合时只会为新增选择器编译一次。
+    """
+    backend = backend or PARSER_BACKEND
+    engine = _engines.get(backend)
+    if engine is None:
+        engine = _engines[backend] = SoupEngine() if backend == "bs4" else LxmlEngine()
+    engine.precompile(list_selectors, scoped=False)
+    engine.precompile(node_selectors, scoped=True)
+    return engine
@@ -1,24 +1,122 @@
 import json
 import os
+import time
+
+from .result_stream import ResultWriter, RESULT_CODEC
+
+# 断点续爬采用 "快照 + 追加日志" 格式:
+#   checkpoint/<key>.json   快照 {"scraped": [...], "results": [...]}, 通过临时文件 + os.replace 原子替换
+#   checkpoint/<key>.jsonl  追加日志, 每采集一条写一行 {"u": detail_url, "r": product}
+# 每追加 CHECKPOINT_COMPACT_EVERY 条合并进快照并清空日志; 读取时快照 + 重放日志 (按 detail_url 去重,
+# 崩溃时写坏的半行直接跳过), 因此合并过程中任意时刻崩溃都不会丢数据。
+CHECKPOINT_COMPACT_EVERY = int(os.getenv("CHECKPOINT_COMPACT_EVERY", "500"))
+
+_journal_counts = {}
 
 def _safe_filename(key: str) -> str:
     return key.replace("/", "_").replace(":", "_").replace("?", "_")
 
+def _checkpoint_paths(key: str):
+    base = f"checkpoint/{_safe_filename(key)}"
+    return base + ".json", base + ".jsonl"
+
+def _atomic_write_json(fname: str, data, **dump_kwargs):
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    tmp = fname + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, fname)
+
+# 每次 save_data 追加一行到 data/_manifest.jsonl ({"file", "key", "items", "ts"}),
+# 指标采集按偏移增量读取, 不必重新加载数据文件来统计条目数。
+MANIFEST_FILE = "data/_manifest.jsonl"
+
+def _append_manifest(fname: str, key: str, items):
+    line = json.dumps({"file": fname, "key": key, "items": items, "ts": round(time.time(), 3)}, ensure_ascii=False)
+    with open(MANIFEST_FILE, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+# 结果文件格式 RESULT_FORMAT: ndjson (默认, data/<key>.ndjson.gz 等, 见 result_stream.py) / json (旧的缩进 JSON 列表)
+RESULT_FORMAT = os.getenv("RESULT_FORMAT", "ndjson")
+
+def result_base_path(key: str) -> str:
+    return f"data/{_safe_filename(key)}"
+
+def open_result_writer(key: str, codec: str = None) -> ResultWriter:
+    """流式写入结果: 逐条 write(item), 结束后调用 commit_results。"""
+    return ResultWriter(result_base_path(key), codec or RESULT_CODEC)
+
+def commit_results(key: str, writer: ResultWriter) -> str:
+    path, count = writer.close()
+    _append_manifest(path, key, count)
+    return path
+
 def save_data(key: str, data):
-    fname = f"data/{_safe_filename(key)}.json"
+    if RESULT_FORMAT != "json" and isinstance(data, list):
+        writer = open_result_writer(key)
+        writer.write_many(data)
+        commit_results(key, writer)
+        return
+    fname = result_base_path(key) + ".json"
     os.makedirs(os.path.dirname(fname), exist_ok=True)
     with open(fname, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+    _append_manifest(fname, key, len(data) if isinstance(data, list) else None)
 
 def load_checkpoint(key: str):
-    fname = f"checkpoint/{_safe_filename(key)}.json"
-    if not os.path.exists(fname):
+    snap_path, journal_path = _checkpoint_paths(key)
+    if not os.path.exists(snap_path) and not os.path.exists(journal_path):
         return None
-    with open(fname, "r", encoding="utf-8") as f:
-        return json.load(f)
+
+    scraped, results = [], []
+    if os.path.exists(snap_path):
+        with open(snap_path, "r", encoding="utf-8") as f:
+            snap = json.load(f)
+        scraped = list(snap.get("scraped", []))
+        results = list(snap.get("results", []))
+
+    seen = set(scraped)
+    replayed = 0
+    if os.path.exists(journal_path):
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # 崩溃时写了一半的行
+                replayed += 1
+                url = rec.get("u")
+                if url in seen:
+                    continue
+                seen.add(url)
+                scraped.append(url)
+                results.append(rec.get("r"))
+    _journal_counts[key] = replayed
+    return {"scraped": scraped, "results": results}
 
 def save_checkpoint(key: str, data):
-    fname = f"checkpoint/{_safe_filename(key)}.json"
-    os.makedirs(os.path.dirname(fname), exist_ok=True)
-    with open(fname, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
\ No newline at end of file
+    """整体写入快照 (原子替换) 并清空追加日志。"""
+    snap_path, journal_path = _checkpoint_paths(key)
+    _atomic_write_json(snap_path, data, separators=(",", ":"))
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+    _journal_counts[key] = 0
+
+def append_checkpoint(key: str, detail_url: str, product):
+    """追加一条采集记录; 累计 CHECKPOINT_COMPACT_EVERY 条后自动合并。"""
+    _, journal_path = _checkpoint_paths(key)
+    os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+    line = json.dumps({"u": detail_url, "r": product}, ensure_ascii=False, separators=(",", ":"))
+    with open(journal_path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+    _journal_counts[key] = _journal_counts.get(key, 0) + 1
+    if _journal_counts[key] >= CHECKPOINT_COMPACT_EVERY:
+        compact_checkpoint(key)
+
+def compact_checkpoint(key: str):
+    """把追加日志合并进快照: 先原子写快照, 再删除日志 (两步之间崩溃时重放会按 URL 去重)。"""
+    data = load_checkpoint(key)
+    if data is not None:
+        save_checkpoint(key, data)
@@ -0,0 +1,226 @@
+"""
+分层抓取 (Tiered Fetcher)
+
+tier 1  http     线程级 keep-alive requests.Session (连接池 + 真实浏览器请求头), 代价约为浏览器的 1/10
+tier 2  browser  Playwright (浏览器池), 仅在 HTTP 结果过短 / 被拦截 / 缺少目标选择器时升级
+
+按 URL 模式 (域名 + 路径形态, 如 www.amazon.com/dp/* 、www.amazon.com/s) 学习哪一层可用:
+- 每个模式维护 HTTP 成功率的指数滑动平均 (EWMA)
+- 样本不足或成功率 >= TIER_HTTP_MIN_RATE 时先走 HTTP
+- 成功率过低时直接走浏览器, 但每 TIER_PROBE_EVERY 次仍用 HTTP 重新探测一次
+统计持久化在 data/state/fetch_tiers.json, 跨运行保留。
+
+FETCH_TIER_MODE (环境变量): auto (默认) / http (仅 HTTP) / browser (始终浏览器, 即旧行为)。
+回放模式 (replay_corpus) 下 fetch_tiered 直接返回语料中的 HTML, http_get 拒绝访问网络。
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .logger import log_info, log_error
+from .rate_limiter import rate_limiter
+from .proxy_manager import report_proxy
+from .block_detector import classify
+from .replay_corpus import ReplayMiss, replaying, replay_page, record_page
+
+FETCH_TIER_MODE = os.getenv("FETCH_TIER_MODE", "auto")
+TIER_STATE_FILE = os.getenv("TIER_STATE_FILE", "data/state/fetch_tiers.json")
+TIER_MIN_BYTES = int(os.getenv("TIER_MIN_BYTES", "5000"))
+TIER_HTTP_MIN_RATE = float(os.getenv("TIER_HTTP_MIN_RATE", "0.5"))
+TIER_MIN_SAMPLES = int(os.getenv("TIER_MIN_SAMPLES", "3"))
+TIER_PROBE_EVERY = int(os.getenv("TIER_PROBE_EVERY", "20"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+_EWMA_ALPHA = 0.2
+
+_THROTTLE_REASONS = ("blocked", "status=429", "status=503")
+
+
+def _browser_headers(ua: str) -> Dict[str, str]:
+    headers = {
+        "User-Agent": ua,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": "gzip, deflate",
+        "Upgrade-Insecure-Requests": "1",
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "none",
+        "Sec-Fetch-User": "?1",
+    }
+    if "Chrome/" in ua:
+        major = re.search(r"Chrome/(\d+)", ua).group(1)
+        headers["sec-ch-ua"] = f'"Chromium";v="{major}", "Google Chrome";v="{major}", "Not?A_Brand";v="99"'
+        headers["sec-ch-ua-mobile"] = "?1" if "Mobile" in ua else "?0"
+    return headers
+
+
+_local = threading.local()
+
+
+def get_http_session() -> requests.Session:
+    """线程级 keep-alive 会话 (requests.Session 非线程安全, 每个线程一个)。"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+
+def http_get(url: str, ua: str, proxy: Optional[str] = None, timeout: float = HTTP_TIMEOUT) -> requests.Response:
+    if replaying():
+        raise ReplayMiss(url)
+    proxies = {"http": proxy, "https": proxy} if proxy else None
+    return get_http_session().get(url, headers=_browser_headers(ua), proxies=proxies, timeout=timeout)
+
+
+def url_pattern(url: str) -> str:
+    """www.amazon.com/dp/B0XXXX?th=1 -> www.amazon.com/dp/*; 搜索页 /s?k=... -> www.amazon.com/s"""
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split("/") if p]
+    if "dp" in parts:
+        return f"{parsed.netloc}/dp/*"
+    if not parts:
+        return parsed.netloc + "/"
+    head = parts[0]
+    return f"{parsed.netloc}/{head}" + ("/*" if len(parts) > 1 else "")
+
+
+class TierLearner:
+    def __init__(self, state_file: str = TIER_STATE_FILE):
+        self.state_file = state_file
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.stats: Dict[str, Dict[str, float]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                log_error(f"[TIER] 读取状态失败: {repr(e)}")
+        return {}
+
+    def choose(self, pattern: str) -> str:
+        if FETCH_TIER_MODE in ("http", "browser"):
+            return FETCH_TIER_MODE
+        with self._lock:
+            st = self.stats.get(pattern)
+            if not st or st.get("http_samples", 0) < TIER_MIN_SAMPLES:
+                return "http"
+            if st.get("http_rate", 1.0) >= TIER_HTTP_MIN_RATE:
+                return "http"
+            st["skipped"] = st.get("skipped", 0) + 1
+            if st["skipped"] % TIER_PROBE_EVERY == 0:
+                return "http"
+            return "browser"
+
+    def record(self, pattern: str, tier: str, ok: bool):
+        with self._lock:
+            st = self.stats.setdefault(pattern, {"http_rate": 1.0, "http_samples": 0, "browser_ok": 0, "browser_fail": 0})
+            if tier == "http":
+                prev = st["http_rate"] if st["http_samples"] else float(ok)
+                st["http_rate"] = round((1 - _EWMA_ALPHA) * prev + _EWMA_ALPHA * float(ok), 4)
+                st["http_samples"] += 1
+            else:
+                st["browser_ok" if ok else "browser_fail"] += 1
+            self._dirty += 1
+            dirty = self._dirty
+        if dirty >= 20:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.loads(json.dumps(self.stats))
+            self._dirty = 0
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            log_error(f"[TIER] 保存状态失败: {repr(e)}")
+
+
+tier_learner = TierLearner()
+
+
+def browser_allowed() -> bool:
+    """FETCH_TIER_MODE=http 时任何环节都不应启动浏览器 (包括二次重试与详情并发阶段)。"""
+    return FETCH_TIER_MODE != "http"
+
+
+def _http_usable(resp: requests.Response, validate: Optional[Callable[[str], bool]]) -> Tuple[bool, str]:
+    outcome = classify(resp.status_code, resp.url, resp.text)
+    if outcome.captcha:
+        return False, "blocked"
+    if resp.status_code != 200:
+        return False, f"status={resp.status_code}"
+    html = resp.text
+    if len(html) < TIER_MIN_BYTES:
+        return False, f"thin len={len(html)}"
+    if validate is not None and not validate(html):
+        return False, "selectors_missing"
+    return True, "ok"
+
+
+def fetch_http_tier(url: str, ua: str, proxy: Optional[str],
+                    validate: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+    """只执行 HTTP 层并记录结果; 不可用时返回 None (由调用方决定是否升级)。"""
+    pattern = url_pattern(url)
+    rate_limiter.wait(url)
+    start = time.time()
+    try:
+        resp = http_get(url, ua, proxy)
+        ok, reason = _http_usable(resp, validate)
+    except Exception as e:
+        ok, reason, resp = False, f"error={type(e).__name__}", None
+    secs = time.time() - start
+    tier_learner.record(pattern, "http", ok)
+    # 页面可用但缺少目标选择器说明代理本身正常, 只是这一层不够用
+    report_proxy(proxy, ok or reason == "selectors_missing", secs, captcha=reason == "blocked")
+    if reason in _THROTTLE_REASONS:
+        rate_limiter.feedback(url, False, reason)
+    elif ok:
+        rate_limiter.feedback(url, True)
+    size = len(resp.content) if resp is not None else 0
+    log_info(f"[TIER] http {pattern} ok={ok} reason={reason} bytes={size} secs={round(secs, 3)}",
+             url=url, stage="http", duration=round(secs, 3), bytes=size, ok=ok, proxy=proxy)
+    if ok:
+        record_page(url, resp.text, pattern)
+    return resp.text if ok else None
+
+
+def fetch_tiered(url: str, ua: str, proxy: Optional[str], browser_fetch: Callable[[], str],
+                 validate: Optional[Callable[[str], bool]] = None) -> Tuple[str, str]:
+    """
+    按学习结果选择起始层, HTTP 不可用时升级到 browser_fetch()。
+    返回 (html, tier)。browser_fetch 的异常原样抛出 (保持原有 RuntimeError → fallback 流程)。
+    """
+    replayed = replay_page(url)
+    if replayed is not None:
+        return replayed, "replay"
+    pattern = url_pattern(url)
+    if tier_learner.choose(pattern) == "http":
+        # 仅 HTTP 模式没有可升级的层, 不足目标的页面也照常返回 (尽力而为)
+        html = fetch_http_tier(url, ua, proxy, validate if browser_allowed() else None)
+        if html is not None or not browser_allowed():
+            return html or "", "http"
+        log_info(f"[TIER] 升级到浏览器: {pattern}")
+    html = browser_fetch()
+    tier_learner.record(pattern, "browser", bool(html) and (validate is None or validate(html)))
+    return html, "browser"
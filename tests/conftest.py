@@ -0,0 +1,27 @@
+"""
+离线测试公共设置: 不联网、不启动浏览器, 所有 data/ 状态文件与日志写入临时目录。
+运行：python -m pytest -q tests
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="scraper-tests-")
+# 各模块在导入时读取配置, 需在导入 scrapers / core 之前设置
+os.environ.setdefault("LOG_FILE", os.path.join(_TMP, "scraper.log"))
+os.environ.setdefault("LOG_JSON_FILE", os.path.join(_TMP, "scraper.jsonl"))
+os.environ.setdefault("LOG_CONSOLE", "0")
+os.environ.setdefault("PROXY_FILE", "")
+os.environ.setdefault("REPLAY_MODE", "off")
+
+
+@pytest.fixture(autouse=True)
+def _workdir(tmp_path, monkeypatch):
+    """每个测试在独立目录中运行 (data/、checkpoint/ 等相对路径都落在这里)。"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,51 @@
+from scrapers import block_detector as bd
+
+URL = "https://www.amazon.com/s?k=usb+hub"
+
+
+class _Response:
+    def __init__(self, status=200, url=URL, headers=None):
+        self.status = status
+        self.url = url
+        self.headers = headers or {}
+
+    def body(self):
+        raise AssertionError("导航阶段不应读取 (并缓冲) 整个响应体")
+
+
+class _Page:
+    url = URL
+
+    def __init__(self, html):
+        self.html = html
+        self.calls = []
+
+    def evaluate(self, script, n):
+        self.calls.append(n)
+        return self.html[:n]
+
+
+def test_navigation_classified_without_body():
+    assert bd.inspect_navigation(_Response(), 0).kind == bd.OK
+    assert bd.inspect_navigation(_Response(503), 0).kind == bd.HTTP_BLOCKED
+    redirected = _Response(url="https://www.amazon.com/errors/validateCaptcha?x=1")
+    assert bd.inspect_navigation(redirected, 0).kind == bd.CAPTCHA_REDIRECT
+    waf = bd.inspect_navigation(_Response(405, headers={"x-amzn-waf-action": "captcha"}), 0)
+    assert waf.captcha and waf.marker == "x-amzn-waf-action=captcha"
+
+
+def test_document_sniff_reads_only_head():
+    ok = bd.inspect_navigation(_Response(), 0)
+    page = _Page("<html><title>Robot Check</title>" + "x" * 100000)
+    outcome = bd.inspect_document(page, ok)
+    assert outcome.kind == bd.CAPTCHA and outcome.marker == "robot check"
+    assert page.calls == [bd.BLOCK_SNIFF_BYTES]
+
+    late = _Page("<html>" + "x" * bd.BLOCK_SNIFF_BYTES + "captcha")  # 关键词在截取范围之外
+    assert bd.inspect_document(late, ok) is ok
+
+
+def test_document_sniff_skipped_when_already_blocked():
+    blocked = bd.inspect_navigation(_Response(429), 0)
+    page = _Page("captcha")
+    assert bd.inspect_document(page, blocked) is blocked and not page.calls
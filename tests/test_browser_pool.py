@@ -0,0 +1,84 @@
+import threading
+
+import scrapers.browser_pool as browser_pool
+
+
+class _Closable(browser_pool.BrowserPool):
+    closed = 0
+
+    def close(self):
+        type(self).closed += 1
+
+
+def _install(monkeypatch):
+    _Closable.closed = 0
+    monkeypatch.setattr(browser_pool, "BrowserPool", _Closable)
+
+
+def test_single_scrape_releases_pool(monkeypatch):
+    _install(monkeypatch)
+
+    def run():
+        browser_pool.get_browser_pool()
+        browser_pool.release_browser_pool()
+        assert browser_pool._local.pool is None
+
+    t = threading.Thread(target=run)  # Streamlit 每次重跑都在新线程中执行
+    t.start()
+    t.join()
+    assert _Closable.closed == 1
+    assert not browser_pool._all_pools
+
+
+def test_keep_scope_reuses_pool_until_exit(monkeypatch):
+    _install(monkeypatch)
+    with browser_pool.keep_browser_pool() as pool:
+        for _ in range(3):
+            assert browser_pool.get_browser_pool() is pool
+            browser_pool.release_browser_pool()
+        assert _Closable.closed == 0
+    assert _Closable.closed == 1
+
+
+class _AsyncBrowser:
+    def __init__(self):
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class _AsyncPool(browser_pool.BrowserPool):
+    async def _launch_async(self, proxy, headless):
+        self.async_launches += 1
+        return _AsyncBrowser()
+
+
+def test_async_browser_reused_until_pool_closed():
+    pool = _AsyncPool(max_pages=100)
+
+    async def use(browser):
+        return browser
+
+    first = pool.run_async(use, None, True, pages=10)
+    assert pool.run_async(use, None, True, pages=10) is first  # 同一 worker 的多次采集共用 async 浏览器
+    assert pool.stats()["async_launches"] == 1
+    thread = pool._athread
+    pool.close()
+    assert first.closed and not thread.is_alive()
+
+
+def test_async_browser_recycled_after_max_pages():
+    pool = _AsyncPool(max_pages=15)
+
+    async def use(browser):
+        return browser
+
+    first = pool.run_async(use, None, True, pages=10)
+    second = pool.run_async(use, None, True, pages=10)
+    assert second is first
+    assert pool.run_async(use, None, True) is not first and first.closed
+    pool.close()
@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+import scrapers.storage_manager as storage
+
+KEY = "https://www.amazon.com/s?k=usb+hub"
+
+
+@pytest.fixture(autouse=True)
+def _fresh_counts(monkeypatch):
+    monkeypatch.setattr(storage, "_journal_counts", {})
+
+
+def product(i: int) -> tuple:
+    url = f"https://www.amazon.com/dp/B{i:09d}"
+    return url, {"url": url, "title": f"Item {i}"}
+
+
+def test_journal_replayed_after_crash_with_torn_line():
+    for i in range(3):
+        storage.append_checkpoint(KEY, *product(i))
+    _, journal = storage._checkpoint_paths(KEY)
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('{"u":"https://www.amazon.com/dp/B0000000')  # 进程在写入中途被杀
+
+    data = storage.load_checkpoint(KEY)
+    assert data["scraped"] == [product(i)[0] for i in range(3)]
+    assert [r["title"] for r in data["results"]] == ["Item 0", "Item 1", "Item 2"]
+
+
+def test_crash_between_snapshot_and_journal_delete(monkeypatch):
+    for i in range(3):
+        storage.append_checkpoint(KEY, *product(i))
+    with monkeypatch.context() as m:  # 模拟合并时快照已替换、日志尚未删除就崩溃
+        m.setattr(os, "remove", lambda path: None)
+        storage.compact_checkpoint(KEY)
+    storage.append_checkpoint(KEY, *product(3))
+
+    data = storage.load_checkpoint(KEY)
+    assert data["scraped"] == [product(i)[0] for i in range(4)]
+    assert len(data["results"]) == 4
+
+
+def test_auto_compaction(monkeypatch):
+    monkeypatch.setattr(storage, "CHECKPOINT_COMPACT_EVERY", 5)
+    for i in range(7):
+        storage.append_checkpoint(KEY, *product(i))
+    snap, journal = storage._checkpoint_paths(KEY)
+    with open(snap, "r", encoding="utf-8") as f:
+        assert len(json.load(f)["scraped"]) == 5
+    with open(journal, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 2
+    assert len(storage.load_checkpoint(KEY)["scraped"]) == 7
+
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import time
+
+from core.crawl import dispatcher
+from core.crawl.process_tree import _alive
+
+TARGET = "test_dispatcher:fake_scrape"
+
+
+def fake_scrape(url, **kwargs):
+    """worker 内的假采集: hang 开头的 URL 启动一个子进程 (模拟 Chromium) 后卡住。"""
+    if "/hang" in url:
+        child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(120)"])
+        with open(url.rsplit("/", 1)[1] + ".pid", "w") as f:
+            f.write(str(child.pid))
+        time.sleep(120)
+    if "/crash" in url:
+        os._exit(3)
+    return [{"url": url}] * 2
+
+
+def test_timeout_kills_worker_tree_and_respawns(tmp_path):
+    urls = ["http://fixture/ok1", "http://fixture/hang", "http://fixture/ok2", "http://fixture/ok3"]
+    seen = []
+    summary = dispatcher.run_batch(urls, workers=2, per_url_timeout=3, scraper=TARGET,
+                                   on_result=lambda outcome, done, total: seen.append((done, total)))
+
+    by_url = {r["url"]: r for r in summary["results"]}
+    assert by_url["http://fixture/hang"]["error"] == "timeout"
+    assert summary["ok"] == 3 and summary["timeouts"] == 1 and summary["items"] == 6
+    assert seen[-1] == (4, 4) and len(seen) == 4
+
+    pid = int((tmp_path / "hang.pid").read_text())
+    deadline = time.time() + 5
+    while _alive(pid) and time.time() < deadline:
+        time.sleep(0.1)
+    assert not _alive(pid), "超时 worker 启动的子进程应一并终止"
+
+
+def test_crashed_worker_is_replaced():
+    summary = dispatcher.run_batch(["http://fixture/crash", "http://fixture/ok"], workers=1,
+                                   per_url_timeout=30, scraper=TARGET)
+    by_url = {r["url"]: r for r in summary["results"]}
+    assert by_url["http://fixture/crash"]["error"].startswith("worker_crash")
+    assert by_url["http://fixture/ok"]["items"] == 2
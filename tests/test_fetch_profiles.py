@@ -0,0 +1,38 @@
+from scrapers.fetch_profiles import FETCH_TYPICAL_BYTES, FetchStats, _PageCounter
+
+
+class _Response:
+    def __init__(self, resource_type: str, size: int):
+        self.headers = {"content-length": str(size)}
+        self.request = type("Req", (), {"resource_type": resource_type})()
+
+
+def lean_page(image_blocks: int = 10) -> _PageCounter:
+    counter = _PageCounter()
+    counter.on_response(_Response("document", 200000))
+    for _ in range(image_blocks):
+        counter.on_block("image")
+    counter.on_block("font")
+    return counter
+
+
+def test_savings_estimated_without_full_baseline():
+    stats = FetchStats()
+    stats.record("lean", "list", lean_page(), 1.0)
+    stats.record("lean", "list", lean_page(), 1.0)
+    row = stats.report()["lean/list"]
+    assert row["blocked_types"] == {"image": 20, "font": 2}
+    assert row["est_bytes_saved_per_page"] == 10 * FETCH_TYPICAL_BYTES["image"] + FETCH_TYPICAL_BYTES["font"]
+    assert "bytes_saved_per_page" not in row
+
+
+def test_typical_size_learned_from_allowed_responses():
+    stats = FetchStats()
+    full = _PageCounter()
+    for size in (10000, 30000):
+        full.on_response(_Response("image", size))
+    stats.record("full", "detail", full, 2.0)
+    stats.record("lean", "detail", lean_page(image_blocks=2), 1.0)
+    row = stats.report()["lean/detail"]
+    assert row["est_bytes_saved_per_page"] == 2 * 20000 + FETCH_TYPICAL_BYTES["font"]
+    assert row["load_time_delta_secs"] == -1.0  # 有 full 基线时仍给出实测差值
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+from core import job_runner
+from core.crawl.process_tree import _alive
+from core.job_runner import JobRunner, get_job
+
+
+def sleepy_job(ctx):
+    """任务进程内启动一个子进程 (模拟批量 worker / Chromium) 后长时间运行。"""
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(120)"])
+    with open("child.pid", "w") as f:
+        f.write(str(child.pid))
+    ctx.progress(0, 1, "运行中")
+    time.sleep(120)
+
+
+def report_workers(ctx):
+    return {"env": os.environ.get("JOB_WORKERS"), "cap": job_runner.job_worker_cap(16)}
+
+
+def _wait(predicate, secs: float = 20):
+    deadline = time.time() + secs
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+
+def test_cancel_kills_job_process_tree(tmp_path):
+    runner = JobRunner(max_concurrent=1)
+    job_id = runner.submit("test_job_runner:sleepy_job")
+    assert _wait(lambda: (tmp_path / "child.pid").exists() and get_job(job_id)["state"] == "running")
+    child = int((tmp_path / "child.pid").read_text())
+    pid = get_job(job_id)["pid"]
+
+    assert runner.cancel(job_id)
+    assert get_job(job_id)["state"] == "cancelled"
+    assert not _alive(pid)
+    assert _wait(lambda: not _alive(child), 5), "任务进程启动的子进程应一并终止"
+    assert runner.stats()["running"] == 0
+
+
+def test_worker_budget_split_across_slots():
+    runner = JobRunner(max_concurrent=2, worker_budget=5)
+    assert runner.stats()["job_workers"] == 2
+    job_id = runner.submit("test_job_runner:report_workers")
+    assert _wait(lambda: get_job(job_id)["state"] == "done")
+    assert get_job(job_id)["result"] == {"env": "2", "cap": 2}
+
+
+def test_worker_cap_outside_jobs(monkeypatch):
+    monkeypatch.delenv("JOB_WORKERS", raising=False)
+    assert job_runner.job_worker_cap(8) == 8
+    monkeypatch.setenv("JOB_WORKERS", "3")
+    assert job_runner.job_worker_cap(8) == 3 and job_runner.job_worker_cap(1) == 1
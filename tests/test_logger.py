@@ -0,0 +1,68 @@
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import time
+from multiprocessing.connection import Client
+
+import scrapers.logger as logger
+
+
+def child_logs(n: int):
+    from scrapers.logger import log_info
+    for i in range(n):
+        log_info(f"[CHILD] line {i}", stage="test", items=i)
+
+
+def _json_lines():
+    try:
+        with open(logger.LOG_JSON_FILE, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _wait_rows(predicate, count: int):
+    deadline = time.time() + 10
+    rows = []
+    while time.time() < deadline:
+        rows = [r for r in _json_lines() if predicate(r)]
+        if len(rows) >= count:
+            break
+        time.sleep(0.1)
+    return rows
+
+
+def test_import_has_no_side_effects():
+    env = {k: v for k, v in os.environ.items() if not k.startswith("LOG_SERVER")}
+    code = "import scrapers.logger as l; print(l._server is None and l._listener is None)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.dirname(logger.__file__)),
+                         env=env, capture_output=True, text=True, timeout=30)
+    assert out.stdout.strip() == "True"
+
+
+def test_child_process_logs_forwarded_to_parent():
+    logger.share_logging()
+    assert os.environ["LOG_SERVER"] == logger._server.address
+
+    proc = mp.get_context("spawn").Process(target=child_logs, args=(20,))
+    proc.start()
+    proc.join(30)
+    assert proc.exitcode == 0
+
+    rows = _wait_rows(lambda r: r.get("tag") == "CHILD" and r["pid"] == proc.pid, 20)
+    assert [r["items"] for r in rows] == list(range(20))
+    # 子进程不自己打开 / 轮转日志文件
+    root, ext = os.path.splitext(logger.LOG_JSON_FILE)
+    assert not os.path.exists(f"{root}.{proc.pid}{ext}")
+
+
+def test_malformed_record_does_not_stop_receiver():
+    logger.share_logging()
+    host, _, port = os.environ["LOG_SERVER"].rpartition(":")
+    with Client((host, int(port)), authkey=bytes.fromhex(os.environ["LOG_SERVER_KEY"])) as conn:
+        conn.send(42)  # 不是 LogRecord 字典
+        conn.send({"name": "scrapers", "levelno": 20, "levelname": "INFO", "msg": "[AFTER_BAD] ok"})
+    assert _wait_rows(lambda r: r.get("tag") == "AFTER_BAD", 1)
+    assert _wait_rows(lambda r: "丢弃无法解析" in r["msg"], 1)
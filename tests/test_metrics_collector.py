@@ -0,0 +1,37 @@
+import json
+import time
+
+from core.auto_crawler_iter.metrics_collector import MetricsCollector
+
+URL = "https://www.amazon.com/s?k=usb+hub"
+
+
+def _write(path, *records):
+    with open(path, "a", encoding="utf-8") as f:
+        for rec in records:
+            f.write(json.dumps({"ts": time.time(), **rec}, ensure_ascii=False) + "\n")
+
+
+def block_event():
+    """一次列表页拦截在日志中留下的全部记录。"""
+    return [
+        {"tag": "BLOCKED", "msg": "[BLOCKED] kind=captcha status=200 marker=captcha url=" + URL,
+         "url": URL, "stage": "nav", "kind": "captcha", "blocked": True},
+        {"tag": "RATE", "msg": "[RATE] www.amazon.com 降速 0.6 -> 0.3 req/s reason=captcha"},
+        {"tag": "CAPTCHA", "msg": "[CAPTCHA] 列表页被拦截 (captcha)。请启用 headless=False 或更换代理。",
+         "url": URL, "stage": "list"},
+        {"tag": "PROXY_STATS", "msg": "[PROXY_STATS] http://p {'captcha': 1}"},
+    ]
+
+
+def test_block_counted_once(tmp_path):
+    log = tmp_path / "scraper.jsonl"
+    collector = MetricsCollector(data_dir=str(tmp_path / "data"), log_file=str(log))
+    _write(log, *block_event())
+    assert collector.collect()["captcha_hits"] == 1
+
+    _write(log, {"tag": "CAPTCHA", "msg": "[CAPTCHA] 检测到验证码/人机验证页面。", "stage": "list", "blocked": True},
+           *block_event())
+    metrics = collector.collect()  # 增量读取: 之前的记录不重复计数
+    assert metrics["captcha_hits"] == 3
+    assert metrics["windows"]["5m"]["captcha_hits"] == 3
@@ -0,0 +1,55 @@
+import pytest
+
+import scrapers.page_readiness as pr
+
+
+class _Page:
+    """只模拟事件注册与 evaluate: 导航期间的请求在 goto() 中触发, 一个请求在滚动后才完成。"""
+
+    def __init__(self):
+        self.handlers = {}
+        self.items = 5
+
+    def on(self, event, fn):
+        self.handlers.setdefault(event, []).append(fn)
+
+    def emit(self, event):
+        for fn in self.handlers.get(event, []):
+            fn(object())
+
+    def goto(self):
+        for _ in range(3):
+            self.emit("request")
+        self.emit("requestfinished")
+        self.emit("requestfinished")  # 第三个请求 (懒加载数据) 仍在进行中
+
+    def evaluate(self, script, arg=None):
+        return self.items
+
+    def wait_for_timeout(self, ms):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def _fast(monkeypatch):
+    monkeypatch.setattr(pr, "READY_IDLE_MS", 0)
+
+
+def test_tracker_attached_before_goto_counts_navigation_requests():
+    page = _Page()
+    tracker = pr.track_inflight(page)
+    page.goto()
+    assert tracker.inflight == 1 and not tracker.idle()
+    page.emit("requestfinished")
+    assert tracker.idle()
+
+
+def test_scroll_reuses_tracker_from_navigation():
+    page = _Page()
+    tracker = pr.track_inflight(page)
+    page.goto()
+    ready = pr.scroll_until_ready(page, ["div"], ["a"], target=None, max_scrolls=3, quiet_secs=0,
+                                  max_wait_secs=0.05, tracker=tracker)
+    # 导航期间的请求仍在进行中: 不因 "网络空闲" 提前判定平台期, 只在等满 max_wait_secs 后才算一次
+    assert ready["reason"] == "plateau" and ready["scrolls"] == 1 and ready["secs"] >= 0.05
+    assert len(page.handlers["request"]) == 1
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from scrapers.product_store import ProductStore
+
+SOURCE = "https://www.amazon.com/s?k=usb+hub"
+
+
+def product(i: int, price: str = "9.99") -> dict:
+    return {"url": f"https://www.amazon.com/dp/B{i:09d}", "title": f"Item {i}", "price": price}
+
+
+@pytest.fixture(params=["memory", "file"])
+def store(request, tmp_path):
+    url = "sqlite:///:memory:" if request.param == "memory" else f"sqlite:///{tmp_path / 'products.sqlite'}"
+    store = ProductStore(url, batch_size=7)
+    yield store
+    store.close()
+
+
+def test_writes_from_other_threads_visible(store):
+    """异步详情线程写入的商品, 主线程能查到 (内存库不能每个线程一个独立库)。"""
+    errors = []
+
+    def worker(start):
+        try:
+            for i in range(start, start + 20):
+                store.add(SOURCE, product(i))
+            store.flush()
+        except Exception as e:  # pragma: no cover - 失败时由断言报告
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n * 20,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert store.count(SOURCE) == 80
+
+
+def test_upsert_keeps_first_seen(store):
+    store.upsert_many(SOURCE, [product(1)])
+    first = store.query(asin="B000000001")[0]
+    store.upsert_many(SOURCE, [product(1, price="5.00")])
+    rows = store.query(asin="B000000001")
+    assert len(rows) == 1
+    assert rows[0]["price"] == "5.00"
+    assert rows[0]["first_seen"] == first["first_seen"] and rows[0]["last_seen"] >= first["last_seen"]
+
+
+def test_failed_refetch_keeps_stored_row(store):
+    good = dict(product(1), desc="USB-C hub with 7 ports")
+    store.upsert_many(SOURCE, [good])
+    store.upsert_many(SOURCE, [{"url": good["url"], "title": "Item 1", "price": "", "error": "timeout"}])
+    row = store.query(asin="B000000001")[0]
+    assert row["desc"] == "USB-C hub with 7 ports" and row["price"] == "9.99"
+    assert "error" not in row["data"]
+
+    store.upsert_many(SOURCE, [dict(product(1, price="8.00"), desc="")])  # 空描述不覆盖
+    row = store.query(asin="B000000001")[0]
+    assert row["price"] == "8.00" and row["desc"] == "USB-C hub with 7 ports"
+
+
+def test_new_failed_record_inserted(store):
+    store.add(SOURCE, {"url": "https://www.amazon.com/dp/B000000009", "title": "List title", "error": "blocked"})
+    store.flush()
+    assert store.query(asin="B000000009")[0]["title"] == "List title"
+
+
+def test_scrape_failure_flushes_buffered_products(monkeypatch):
+    """数据库模式没有 checkpoint: 详情阶段中途失败时, 已采集的缓冲条目也要写入。"""
+    import scrapers.amazon_scraper as az
+    import scrapers.product_store as product_store
+    from test_tiered_fetcher import list_html
+
+    store = ProductStore("sqlite:///:memory:", batch_size=50)
+    monkeypatch.setattr(product_store, "get_product_store", lambda url=None: store)
+    monkeypatch.setattr(az, "fetch_tiered", lambda url, *a, **k: (list_html(5), "http"))
+    monkeypatch.setattr(az, "get_detail_cache", lambda: None)
+    monkeypatch.setattr(az, "_fallback_fetch", lambda url: "")
+    monkeypatch.setattr(az.rate_limiter, "feedback", lambda *a, **k: None)
+
+    def partial_details(rows, proxy, headless, on_item, fetch_profile=None):
+        for raw in rows[:3]:
+            on_item(raw, {"url": raw["detail_url"], "title": raw["title"], "price": raw["price"], "desc": "d"})
+        raise RuntimeError("browser crashed")
+
+    monkeypatch.setattr(az, "_scrape_details", partial_details)
+    assert az.scrape_amazon(SOURCE, max_items=5, use_proxy=False, storage_mode="sqlite") == []
+    assert store.count(SOURCE) == 3
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+
+import pytest
+
+import scrapers.amazon_scraper as amazon_scraper
+import scrapers.proxy_manager as proxy_manager
+from scrapers.proxy_manager import ProxyPool
+
+PROXY = "http://127.0.0.1:9"
+
+
+@pytest.fixture
+def pool(monkeypatch, tmp_path):
+    pool = ProxyPool([PROXY], state_file=str(tmp_path / "proxy_stats.json"))
+    monkeypatch.setattr(proxy_manager, "_pool", pool)
+    monkeypatch.setattr(proxy_manager, "PROXY_FAIL_THRESHOLD", 3)
+    return pool
+
+
+def _quarantined(pool) -> bool:
+    return pool.stats()[PROXY]["quarantined_secs"] > 0
+
+
+def test_quarantine_after_threshold_failures(pool):
+    pool.record(PROXY, False)
+    pool.record(PROXY, False)
+    assert not _quarantined(pool)
+    pool.record(PROXY, False)
+    assert _quarantined(pool)
+    assert pool.health[PROXY].quarantines == 1
+
+
+def test_success_resets_strikes(pool):
+    pool.record(PROXY, False)
+    pool.record(PROXY, False)
+    pool.record(PROXY, True, 0.5)
+    pool.record(PROXY, False)
+    pool.record(PROXY, False)
+    assert not _quarantined(pool)
+
+
+def test_captcha_counts_as_strike(pool):
+    for _ in range(3):
+        pool.record(PROXY, True, 0.5, captcha=True)
+    assert _quarantined(pool)
+
+
+def test_quarantined_proxy_not_picked(pool, tmp_path):
+    other = "http://127.0.0.1:10"
+    two = ProxyPool([PROXY, other], state_file=str(tmp_path / "two.json"))
+    for _ in range(3):
+        two.record(PROXY, False)
+    assert {two.pick() for _ in range(50)} == {other}
+
+
+class _FailingPage:
+    def on(self, *args):
+        pass
+
+    def route(self, *args):
+        pass
+
+    def goto(self, url, **kwargs):
+        raise ConnectionError("net::ERR_PROXY_CONNECTION_FAILED")
+
+
+class _FakeBrowserPool:
+    @contextmanager
+    def lease_page(self, proxy, ua, headless=True, **kwargs):
+        yield _FailingPage()
+
+
+def test_failed_navigation_reported_once(pool, monkeypatch):
+    """一次 goto 失败只计一次失败: 阈值 3 时两次真实失败不应触发隔离。"""
+    monkeypatch.setattr(amazon_scraper, "get_browser_pool", lambda: _FakeBrowserPool())
+    monkeypatch.setattr(amazon_scraper.rate_limiter, "wait", lambda url: None)
+
+    for attempt in range(2):
+        with pytest.raises(RuntimeError):
+            amazon_scraper._load_page("https://www.amazon.com/s?k=x", PROXY, "ua", True)
+        assert pool.health[PROXY].fail == attempt + 1
+    assert not _quarantined(pool)
+
+    with pytest.raises(RuntimeError):
+        amazon_scraper._load_page("https://www.amazon.com/s?k=x", PROXY, "ua", True)
+    assert _quarantined(pool)
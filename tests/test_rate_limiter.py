@@ -0,0 +1,85 @@
+import pytest
+
+import scrapers.rate_limiter as rl
+from scrapers.rate_limiter import DomainRateLimiter
+
+URL = "https://www.amazon.com/s?k=usb+hub"
+
+
+@pytest.fixture(autouse=True)
+def _no_jitter(monkeypatch):
+    monkeypatch.setattr(rl, "RATE_JITTER", 0.0)
+    monkeypatch.setattr(rl, "RATE_INITIAL", 1.0)
+    monkeypatch.setattr(rl, "RATE_BURST", 2.0)
+
+
+def limiter(tmp_path, shared: bool = True) -> DomainRateLimiter:
+    return DomainRateLimiter(str(tmp_path / "rate_limits.json"),
+                             str(tmp_path / "rate_buckets.sqlite") if shared else None)
+
+
+@pytest.mark.parametrize("shared", [True, False])
+def test_token_bucket_queues_reservations(tmp_path, shared):
+    lim = limiter(tmp_path, shared)
+    delays = [lim.reserve(URL) for _ in range(4)]
+    # 初始 1 个令牌: 第一次立即放行, 之后按 1 次/秒排队
+    assert delays[0] == 0
+    assert delays[1:] == pytest.approx([1.0, 2.0, 3.0], abs=0.05)
+
+
+def test_block_halves_rate_once_within_hold(tmp_path):
+    lim = limiter(tmp_path)
+    lim.feedback(URL, False, "blocked")
+    lim.feedback(URL, False, "blocked")  # 保持期内的重复拦截不叠加降速
+    assert lim.rate(URL) == pytest.approx(0.5)
+    lim.feedback(URL, True)  # 保持期内也不加速
+    assert lim.rate(URL) == pytest.approx(0.5)
+
+
+def test_success_increases_rate_additively(tmp_path):
+    lim = limiter(tmp_path)
+    for _ in range(4):
+        lim.feedback(URL, True)
+    assert lim.rate(URL) == pytest.approx(1.0 + 4 * rl.RATE_AI_STEP)
+
+
+def test_budget_shared_between_processes(tmp_path):
+    """两个限速器实例 (各自的 SQLite 连接, 相当于两个进程) 消耗同一个域名预算。"""
+    a, b = limiter(tmp_path), limiter(tmp_path)
+    assert a.reserve(URL) == 0
+    assert b.reserve(URL) == pytest.approx(1.0, abs=0.05)
+    a.feedback(URL, False, "status=429")
+    assert b.rate(URL) == pytest.approx(0.5)
+    assert a.reserve(URL) > 1.0
+
+
+def test_wait_async_does_not_block_event_loop(tmp_path):
+    """另一进程持有共享库写锁时, wait_async 等锁期间事件循环仍可运行其他协程。"""
+    import asyncio
+    import sqlite3
+    import threading
+
+    lim = limiter(tmp_path)
+    lim.reserve("https://other.example/")  # 建库建表; URL 的桶仍有令牌, 拿到锁后无需再等
+    other = sqlite3.connect(str(tmp_path / "rate_buckets.sqlite"), isolation_level=None, check_same_thread=False)
+    other.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.5, other.execute, ("ROLLBACK",)).start()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.02)
+
+        task = asyncio.create_task(ticker())
+        await lim.wait_async(URL)
+        task.cancel()
+        return ticks
+
+    try:
+        assert asyncio.run(main()) >= 10
+    finally:
+        other.close()
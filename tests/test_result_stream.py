@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+from scrapers.result_stream import ResultWriter, export_parquet, find_results, iter_results
+
+
+def test_unfinished_result_stream_not_visible(tmp_path):
+    base = str(tmp_path / "data" / "run")
+    done = ResultWriter(base, "none")
+    done.write_many([{"i": 0}, {"i": 1}])
+    done.close()
+    with open(done.path, "a", encoding="utf-8") as f:
+        f.write('{"i": 2')  # 被截断的尾行
+
+    crashed = ResultWriter(base, "gzip")  # 写到一半崩溃: 只留下 .part
+    crashed.write({"i": 9})
+    assert find_results(base) == done.path
+    assert list(iter_results(done.path)) == [{"i": 0}, {"i": 1}]
+    crashed.abort()
+    assert not os.path.exists(crashed.path + ".part")
+
+
+def test_gzip_round_trip_and_parquet_export(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    items = [{"title": f"Item {i}", "url": f"https://www.amazon.com/dp/B{i:09d}", "price": i, "rank": i}
+             for i in range(12)]
+    writer = ResultWriter(str(tmp_path / "run"), "gzip")
+    writer.write_many(items)
+    path, count = writer.close()
+    assert path.endswith(".ndjson.gz") and count == 12
+    assert list(iter_results(path)) == items
+
+    table = pq.read_table(export_parquet(path, batch_size=5))
+    assert table.num_rows == 12
+    assert table.column("price").to_pylist()[3] == "3"
+    assert json.loads(table.column("extra").to_pylist()[3]) == {"rank": 3}
@@ -0,0 +1,66 @@
+import pytest
+
+import scrapers.amazon_scraper as az
+from scrapers.selector_engine import get_engine
+
+LIST_PAGE = """<html><body>
+<div class="s-result-item s-asin" data-asin="B000000001">
+  <h2><a class="a-link-normal s-link" href="/Usb-Hub/dp/B000000001?ref=sr_1_1">
+    <span class="a-size-medium">  USB-C   Hub <!-- 广告 --> 7-in-1 </span></a></h2>
+  <span class="a-price"><span class="a-offscreen">$19.99</span><span class="a-price-whole">19<span>.</span></span></span>
+</div>
+<div class="zg-grid-general-faceout">
+  <div class="p13n-sc-uncoverable-faceout" data-asin="B000000002">
+    <a class="a-link-normal" href="/gp/help">help</a>
+    <a class="a-link-normal" href="/Hub/dp/B000000002"><div class="p13n-sc-truncated">Hub &amp; Dock</div></a>
+    <span class="p13n-sc-price">$9.50</span>
+  </div>
+</div>
+<div class="a-section a-spacing-none p13n-asin" data-asin="B000000003">
+  <a class="a-link-normal" href="/x/dp/B000000003"><img alt="Image title" src="x.jpg"></a>
+  <script>var price = "$1";</script><span class="a-offscreen">$5</span>
+</div>
+<div data-asin=""><a class="a-link-normal" href="https://example.com/dp/B000000004">external</a></div>
+</body></html>"""
+
+DETAIL_PAGE = """<html><body>
+<h1>Page heading</h1>
+<span id="productTitle">
+   Anker USB-C Hub,   7-in-1
+</span>
+<span class="a-price"><span class="a-offscreen">$29.99</span><span class="a-price-whole">29<span class="a-price-decimal">.</span></span></span>
+<div id="productDescription"><p>Fast <b>charging</b></p><style>p{}</style><template>hidden</template><p>4K HDMI</p></div>
+</body></html>"""
+
+
+def engines():
+    return [get_engine(backend, az.LIST_SELECTORS, az.LINK_SELECTORS + az.TITLE_SELECTORS + az.PRICE_SELECTORS)
+            for backend in ("bs4", "lxml")]
+
+
+def parse_page(engine, html: str):
+    rows = az._rows_from_nodes(engine, az._select_list_nodes(engine, engine.parse(html), tag=None))
+    return rows, az._extract_detail_fields(engine, html, "https://www.amazon.com/dp/B000000001")
+
+
+@pytest.mark.parametrize("html", [LIST_PAGE, DETAIL_PAGE], ids=["list", "detail"])
+def test_backends_produce_identical_output(html):
+    soup, lxml = engines()
+    assert parse_page(lxml, html) == parse_page(soup, html)
+
+
+@pytest.mark.parametrize("selector", az.LIST_SELECTORS + az.DETAIL_TITLE_SELECTORS + az.DETAIL_PRICE_SELECTORS
+                         + az.DETAIL_DESC_SELECTORS + az.LINK_SELECTORS + [", ".join(az.LIST_SELECTORS)])
+def test_selector_match_counts(selector):
+    soup, lxml = engines()
+    for html in (LIST_PAGE, DETAIL_PAGE):
+        assert len(lxml.select(lxml.parse(html), selector)) == len(soup.select(soup.parse(html), selector))
+
+
+def test_list_rows():
+    rows, _ = parse_page(engines()[1], LIST_PAGE)
+    # 外链 (非站内相对路径) 跳过; 详情 URL 去掉查询串
+    assert {r["detail_url"] for r in rows} == {f"https://www.amazon.com/{p}/dp/B00000000{i}"
+                                               for i, p in ((1, "Usb-Hub"), (2, "Hub"), (3, "x"))}
+    # 与 get_text(strip=True) 一致: 各段去空白后拼接, 跳过注释
+    assert rows[0]["title"] == "USB-C   Hub7-in-1" and rows[0]["price"] == "19."
@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.collectors.spider_engine import SpiderEngine
+
+ETAG = '"v1"'
+BODY = b"<html><body>policy text</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = SpiderEngine(retries=0)
+    yield engine
+    engine.close()
+
+
+def test_default_fetch_always_returns_body(engine, url):
+    """默认不发条件请求: 重复抓取同一 URL 仍拿到正文 (原型测试页预览依赖正文)。"""
+    for _ in range(2):
+        res = list(engine.iter_collect([url]))[0]
+        assert res.status == 200 and not res.not_modified
+        assert res.text == BODY.decode()
+
+
+def test_conditional_fetch_uses_caller_validators(engine, url):
+    first = engine.collect([url])[0]
+    assert first.status == 200 and first.etag == ETAG
+    second = engine.collect([url], validators={url: {"etag": first.etag}})[0]
+    assert second.not_modified and second.ok and second.text is None
+    assert not hasattr(engine, "validators")  # 引擎不保存任何调用方的校验头
+
+
+def test_policy_scan_does_not_leak_validators(url, monkeypatch):
+    """政策扫描的条件请求不影响共享引擎上的其他调用方 (原型测试页抓同一 URL)。"""
+    from core.collectors import policy_collector, spider_engine
+
+    monkeypatch.setattr(policy_collector, "POLICY_SNAPSHOT_FILE", "state/policy_snapshot.json")
+    monkeypatch.setattr(policy_collector, "POLICY_CHANGES_FILE", "policy_changes.jsonl")
+    monkeypatch.setattr(spider_engine, "_engine", SpiderEngine(retries=0))
+    sources = [{"country": "US", "agency": "test", "endpoint": url}]
+    try:
+        assert policy_collector.refresh_policies(sources)["changed"] == 1
+        assert policy_collector.refresh_policies(sources)["not_modified"] == 1
+        res = list(spider_engine.get_spider_engine().iter_collect([url]))[0]
+        assert res.status == 200 and res.text == BODY.decode()
+    finally:
+        spider_engine.get_spider_engine().close()
@@ -0,0 +1,77 @@
+import pytest
+
+import scrapers.amazon_scraper as amazon_scraper
+import scrapers.tiered_fetcher as tiered_fetcher
+
+URL = "https://www.amazon.com/s?k=usb+hub"
+
+
+def list_html(rows: int) -> str:
+    items = "".join(
+        f'<div class="s-result-item" data-asin="B{i:09d}">'
+        f'<a class="a-link-normal" href="/dp/B{i:09d}"><span class="a-size-medium">Item {i}</span></a>'
+        f'<span class="a-price-whole">{i}</span></div>'
+        for i in range(rows)
+    )
+    return f"<html><body>{items}<!-- {'x' * 6000} --></body></html>"
+
+
+class _Response:
+    def __init__(self, text: str):
+        self.status_code = 200
+        self.url = URL
+        self.text = text
+        self.content = text.encode()
+
+
+@pytest.fixture
+def http_page(monkeypatch):
+    """HTTP 层返回服务端渲染了 rows 行的列表页。"""
+    box = {"rows": 0}
+    monkeypatch.setattr(tiered_fetcher, "http_get", lambda url, ua, proxy=None: _Response(list_html(box["rows"])))
+    monkeypatch.setattr(tiered_fetcher.rate_limiter, "wait", lambda url: None)
+    monkeypatch.setattr(tiered_fetcher, "tier_learner", tiered_fetcher.TierLearner("data/state/tiers.json"))
+    return box
+
+
+def _browser_fetch(calls):
+    def fetch():
+        calls.append(1)
+        return list_html(50)
+    return fetch
+
+
+def test_http_tier_accepted_when_target_reached(http_page):
+    http_page["rows"] = 50
+    calls = []
+    html, tier = tiered_fetcher.fetch_tiered(URL, "ua", None, _browser_fetch(calls),
+                                             validate=amazon_scraper._list_validator(50))
+    assert tier == "http" and not calls
+
+
+def test_first_screen_only_escalates_to_browser(http_page):
+    http_page["rows"] = 16
+    calls = []
+    html, tier = tiered_fetcher.fetch_tiered(URL, "ua", None, _browser_fetch(calls),
+                                             validate=amazon_scraper._list_validator(50))
+    assert tier == "browser" and calls == [1]
+
+
+def test_http_only_mode_returns_partial_page_without_browser(http_page, monkeypatch):
+    monkeypatch.setattr(tiered_fetcher, "FETCH_TIER_MODE", "http")
+    http_page["rows"] = 16
+    calls = []
+    html, tier = tiered_fetcher.fetch_tiered(URL, "ua", None, _browser_fetch(calls),
+                                             validate=amazon_scraper._list_validator(50))
+    assert tier == "http" and not calls
+    assert len(amazon_scraper._parse_list(html, URL, None, "ua", True, True)) == 16
+
+
+def test_http_only_mode_skips_second_pass(monkeypatch):
+    monkeypatch.setattr(tiered_fetcher, "FETCH_TIER_MODE", "http")
+
+    def no_browser(*args, **kwargs):
+        raise AssertionError("仅 HTTP 模式不应启动浏览器")
+
+    monkeypatch.setattr(amazon_scraper, "_load_page", no_browser)
+    assert amazon_scraper._parse_list("", URL, None, "ua", True, second_pass=True) == []
@@ -0,0 +1,79 @@
+"""
+解析吞吐基准: 对保存的 debug_*.html 页面分别用 bs4 与 lxml 后端解析, 比较速度并校验输出一致。
+运行：python tools/bench_parser.py [文件 ...] [--repeat 5] [--json bench_parser.json]
+未指定文件时使用当前目录下的 debug_*.html 与 fallback_list.html。
+输出不一致时退出码为 1。
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import amazon_scraper as az
+from scrapers.selector_engine import get_engine
+
+
+def parse_page(engine, html: str):
+    doc = engine.parse(html)
+    rows = az._rows_from_nodes(engine, az._select_list_nodes(engine, doc, tag=None))
+    detail = az._extract_detail_fields(engine, html, "")
+    return rows, detail
+
+
+def bench_file(path: str, repeat: int):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        html = f.read()
+    out = {"file": path, "bytes": len(html)}
+    outputs = {}
+    for backend in ("bs4", "lxml"):
+        engine = get_engine(backend, az.LIST_SELECTORS, az.LINK_SELECTORS + az.TITLE_SELECTORS + az.PRICE_SELECTORS)
+        rows, detail = parse_page(engine, html)  # 预热 + 记录输出
+        outputs[backend] = (rows, detail)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse_page(engine, html)
+        secs = (time.perf_counter() - start) / repeat
+        out[backend] = {
+            "rows": len(rows),
+            "secs_per_page": round(secs, 5),
+            "rows_per_sec": round(len(rows) / secs, 1) if secs else None,
+        }
+    out["identical"] = outputs["bs4"] == outputs["lxml"]
+    if out["lxml"]["secs_per_page"]:
+        out["speedup"] = round(out["bs4"]["secs_per_page"] / out["lxml"]["secs_per_page"], 2)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("files", nargs="*")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    files = args.files or sorted(glob.glob("debug_*.html") + glob.glob("fallback_list.html"))
+    if not files:
+        print("[WARN] 未找到 debug_*.html，请先运行一次爬虫或手动指定文件。")
+        return 0
+
+    results = [bench_file(f, args.repeat) for f in files]
+    for r in results:
+        print(f"{r['file']}: {r['bytes']}B rows={r['lxml']['rows']} "
+              f"bs4={r['bs4']['secs_per_page']}s lxml={r['lxml']['secs_per_page']}s "
+              f"speedup=x{r.get('speedup')} identical={r['identical']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    mismatched = [r["file"] for r in results if not r["identical"]]
+    if mismatched:
+        print(f"[FAIL] 输出不一致: {mismatched}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+"""
+采集流水线基准: 本地 HTTP 服务器提供仿 Amazon 的列表页 / 详情页, 离线测量
+- 解析吞吐     列表页 / 详情页解析速度 (rows/s, pages/s, 当前解析后端)
+- 端到端       scrape_amazon 的 items/s、页面请求延迟 p50 / p95 (取自结构化日志的 [TIER] 记录)
+- 资源         峰值 RSS、写入的数据字节数 (data/ 与 checkpoint/)
+结果保存为 JSON, 可与基线比较, 任一指标劣化超过阈值时退出码为 1。
+
+运行：python tools/bench_pipeline.py [--items 60] [--runs 3] [--json bench_pipeline.json]
+      [--baseline bench_baseline.json] [--save-baseline] [--threshold 0.15]
+      [--list-html saved_list.html --detail-html saved_detail.html] [--delay-ms 0] [--browser]
+默认使用脚本生成的固定页面; 指定 --list-html / --detail-html 时改用保存的页面 (链接替换为本地 /dp/ 地址)。
+采集在临时目录中进行 (data/、checkpoint/、日志与状态文件均不影响仓库), 默认只走 HTTP 层;
+--browser 时允许升级到 Playwright 并使用并发详情阶段。
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 指标: (是否越大越好, 绝对容差) — 变化小于绝对容差时不算劣化 (毫秒级延迟与 RSS 的测量抖动)
+METRICS = {
+    "parse_list_rows_per_sec": (True, 0),
+    "parse_detail_pages_per_sec": (True, 0),
+    "items_per_sec": (True, 0),
+    "page_p50_ms": (False, 2.0),
+    "page_p95_ms": (False, 2.0),
+    "peak_rss_kb": (False, 2048),
+    "bytes_written": (False, 0),
+}
+_PARSE_ROUNDS = 5  # 解析基准取多轮中最快的一轮, 减少调度噪声
+
+
+# ================== 固定页面 ==================
+def _asin(i: int) -> str:
+    return f"B0{i:08d}"
+
+
+def make_list_html(n: int) -> str:
+    cards = []
+    for i in range(n):
+        cards.append(
+            f'<div class="s-result-item" data-asin="{_asin(i)}" data-component-type="s-search-result">'
+            f'<div class="a-section"><a class="a-link-normal" href="/dp/{_asin(i)}?ref=sr_1_{i}">'
+            f'<img src="/img/{i}.jpg" alt="Bench Product {i}"></a>'
+            f'<h2><a class="a-link-normal" href="/dp/{_asin(i)}"><span class="a-size-medium">'
+            f'Bench Product {i} USB-C Hub 7-in-1 Adapter</span></a></h2>'
+            f'<span class="a-price"><span class="a-offscreen">${10 + i % 40}.99</span>'
+            f'<span class="a-price-whole">{10 + i % 40}</span></span>'
+            f'<div class="a-row a-size-small"><span>4.{i % 10} out of 5 stars</span></div></div></div>'
+        )
+    return ("<!doctype html><html><head><title>Amazon.com : bench</title></head><body>"
+            '<div id="search"><div class="s-main-slot">' + "".join(cards) + "</div></div></body></html>")
+
+
+def make_detail_html(asin: str) -> str:
+    bullets = "".join(f"<li><span>Feature {k} of {asin}: aluminium shell, 4K HDMI, 100W PD.</span></li>"
+                      for k in range(12))
+    return ("<!doctype html><html><head><title>Amazon.com: " + asin + "</title></head><body>"
+            f'<div id="title_feature_div"><h1 id="title"><span id="productTitle">Bench Product {asin} '
+            "USB-C Hub 7-in-1 Adapter</span></h1></div>"
+            '<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">$24.99</span>'
+            '<span class="a-price-whole">24</span></span></div>'
+            f'<div id="featurebullets_feature_div"><ul>{bullets}</ul></div>'
+            f'<div id="productDescription"><p>{"Long description text. " * 200}</p></div>'
+            "</body></html>")
+
+
+class FixtureSite:
+    """本地固定页面服务器: /s?k=...&n=N 列表页, /dp/<ASIN> 详情页。"""
+
+    def __init__(self, items: int, delay_ms: float = 0.0, list_html: Optional[str] = None,
+                 detail_html: Optional[str] = None):
+        self.items = items
+        self.delay = delay_ms / 1000.0
+        self.list_html = list_html
+        self.detail_html = detail_html
+        self.requests = 0
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                if site.delay:
+                    time.sleep(site.delay)
+                parsed = urlparse(self.path)
+                if parsed.path.startswith("/dp/"):
+                    asin = parsed.path.split("/")[2]
+                    body = site.detail_html or make_detail_html(asin)
+                elif parsed.path == "/s":
+                    n = int(parse_qs(parsed.query).get("n", [site.items])[0])
+                    body = site.list_html or make_list_html(n)
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, name="bench-site", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _localize_links(html: str) -> str:
+    """保存的真实页面中的绝对商品链接改为相对路径, 使详情请求落到本地服务器。"""
+    return re.sub(r'href="https?://[^/"]+(/[^"]*)"', r'href="\1"', html)
+
+
+# ================== 测量 ==================
+def peak_rss_kb() -> Optional[int]:
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return int(rss / 1024) if sys.platform == "darwin" else int(rss)  # macOS 单位为字节
+    except ImportError:
+        try:
+            import psutil  # Windows
+            return int(psutil.Process().memory_info().peak_wset / 1024)
+        except Exception:
+            return None
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, int(round(pct / 100.0 * (len(values) - 1)))))
+    return values[k]
+
+
+def _dir_bytes(*dirs: str) -> int:
+    total = 0
+    for d in dirs:
+        for root, _, files in os.walk(d):
+            total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def bench_parse(az, list_html: str, detail_html: str, repeat: int) -> Dict[str, Any]:
+    engine = az._engine()
+    rows = az._rows_from_nodes(engine, az._select_list_nodes(engine, engine.parse(list_html), tag=None))
+
+    def best_secs(fn) -> float:
+        best = float("inf")
+        for _ in range(_PARSE_ROUNDS):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn()
+            best = min(best, (time.perf_counter() - start) / repeat)
+        return best
+
+    list_secs = best_secs(lambda: az._rows_from_nodes(
+        engine, az._select_list_nodes(engine, engine.parse(list_html), tag=None)))
+    detail_secs = best_secs(lambda: az._extract_detail_fields(engine, detail_html, ""))
+    return {
+        "parser_backend": type(engine).__name__,
+        "list_rows": len(rows),
+        "parse_list_rows_per_sec": round(len(rows) / list_secs, 1) if list_secs else None,
+        "parse_detail_pages_per_sec": round(1 / detail_secs, 1) if detail_secs else None,
+    }
+
+
+def bench_scrape(az, site: FixtureSite, items: int, runs: int) -> Dict[str, Any]:
+    from scrapers.logger import shutdown_logging, LOG_JSON_FILE
+    from scrapers.browser_pool import keep_browser_pool
+
+    collected, secs = 0, 0.0
+    with keep_browser_pool():  # 多轮共用浏览器 (--browser 时), 与批量 worker 一致
+        for r in range(runs):
+            url = f"{site.url}/s?k=bench{r}&n={items}"
+            start = time.perf_counter()
+            data = az.scrape_amazon(url, max_items=items, resume=True, use_proxy=False, deep_detail=True,
+                                    storage_mode="local", headless=True)
+            secs += time.perf_counter() - start
+            collected += len(data)
+    shutdown_logging()  # 写出队列中的日志后读取请求延迟
+
+    latencies = []
+    if os.path.exists(LOG_JSON_FILE):
+        with open(LOG_JSON_FILE, "r", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                if rec.get("stage") == "http" and rec.get("duration") is not None:
+                    latencies.append(rec["duration"] * 1000)
+    p50, p95 = _percentile(latencies, 50), _percentile(latencies, 95)
+    return {
+        "runs": runs,
+        "items": collected,
+        "requests": site.requests,
+        "scrape_secs": round(secs, 3),
+        "items_per_sec": round(collected / secs, 2) if secs else None,
+        "page_p50_ms": round(p50, 2) if p50 is not None else None,
+        "page_p95_ms": round(p95, 2) if p95 is not None else None,
+        "bytes_written": _dir_bytes("data", "checkpoint"),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """返回劣化超过阈值的指标说明。"""
+    regressions = []
+    for name, (higher_better, tolerance) in METRICS.items():
+        cur, base = result.get(name), baseline.get(name)
+        if cur is None or not base or abs(cur - base) <= tolerance:
+            continue
+        change = (cur - base) / base
+        worse = -change if higher_better else change
+        if worse > threshold:
+            regressions.append(f"{name}: {base} -> {cur} ({round(change * 100, 1)}%)")
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=60)
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--repeat", type=int, default=20, help="解析基准重复次数")
+    ap.add_argument("--delay-ms", type=float, default=0.0, help="服务器端每个请求的模拟延迟")
+    ap.add_argument("--list-html", default="")
+    ap.add_argument("--detail-html", default="")
+    ap.add_argument("--browser", action="store_true", help="允许升级到 Playwright (需安装浏览器)")
+    ap.add_argument("--json", default="bench_pipeline.json")
+    ap.add_argument("--baseline", default="bench_baseline.json")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--threshold", type=float, default=0.15, help="相对基线的最大允许劣化比例")
+    args = ap.parse_args()
+
+    out_json = os.path.abspath(args.json)
+    baseline_path = os.path.abspath(args.baseline)
+    list_html = _localize_links(open(args.list_html, encoding="utf-8", errors="ignore").read()) \
+        if args.list_html else None
+    detail_html = open(args.detail_html, encoding="utf-8", errors="ignore").read() if args.detail_html else None
+
+    # 在导入 scrapers 之前切换到临时目录并设置环境: 相对路径 (data/ 日志 / 状态文件) 都落在临时目录
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    os.chdir(workdir)
+    os.environ.update({
+        "LOG_CONSOLE": "0",
+        "FETCH_TIER_MODE": "auto" if args.browser else "http",
+        "DETAIL_CACHE_ENABLED": "0",
+        "RATE_INITIAL": "1000", "RATE_MAX": "1000", "RATE_BURST": "1000", "RATE_JITTER": "0",
+    })
+    if not args.browser:
+        os.environ["MAX_CONCURRENT_DETAIL"] = "1"
+
+    from scrapers import amazon_scraper as az
+
+    try:
+        with FixtureSite(args.items, args.delay_ms, list_html, detail_html) as site:
+            result: Dict[str, Any] = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "items_target": args.items,
+                                      "browser": args.browser, "delay_ms": args.delay_ms}
+            result.update(bench_parse(az, list_html or make_list_html(args.items),
+                                      detail_html or make_detail_html(_asin(0)), args.repeat))
+            result.update(bench_scrape(az, site, args.items, args.runs))
+            result["peak_rss_kb"] = peak_rss_kb()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name in METRICS:
+        print(f"{name:28s} {result.get(name)}")
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"[BASELINE] 已保存 {baseline_path}")
+        return 0
+    if os.path.exists(baseline_path):
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.threshold)
+        if regressions:
+            print(f"[FAIL] 超过阈值 {args.threshold} 的劣化:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"[OK] 与基线相比无超过 {args.threshold} 的劣化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
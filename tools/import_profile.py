@@ -0,0 +1,112 @@
+"""
+导入耗时分析: 在全新子进程中用 python -X importtime 测量
+- 启动        import run_launcher (每次冷启动都要付出的成本)
+- 各页面      在启动基础上再导入 ui/page_registry.py 中每个页面模块的增量成本
+输出每项的总耗时与自身耗时最高的模块, 可与预算比较, 超出预算时退出码为 1。
+
+运行：python tools/import_profile.py [--pages 主页,政策中心] [--top 10] [--runs 3]
+      [--budget-ms 1500] [--page-budget-ms 3000] [--json import_profile.json]
+每项取 --runs 次中的最小值以降低磁盘缓存 / 调度抖动; 导入失败的页面单独列出, 不计入预算。
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# "import time: self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def _importtime(code: str) -> Dict[str, Any]:
+    """执行 code 并解析 -X importtime 输出; 只统计最后一个 import 语句新导入的模块。"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, env=dict(os.environ, PYTHONPATH=ROOT))
+    lines = proc.stderr.splitlines()
+    marker = next((i for i, l in enumerate(lines) if l.startswith("--MARK--")), None)
+    if marker is None:  # 分隔行之前的基础导入已失败, 增量无意义
+        error = (lines or ["exit %d" % proc.returncode])[-1]
+        return {"total_ms": 0.0, "modules": [], "error": f"基础导入失败: {error}"}
+    modules = []
+    for line in lines[marker + 1:]:
+        m = _LINE_RE.match(line)
+        if m:
+            modules.append({"module": m.group(4), "self_ms": int(m.group(1)) / 1000,
+                            "cum_ms": int(m.group(2)) / 1000, "depth": len(m.group(3)) // 2})
+    top_level = [m for m in modules if m["depth"] == 0]
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["exit %d" % proc.returncode])[-1]
+    return {"total_ms": round(sum(m["cum_ms"] for m in top_level), 1), "modules": modules, "error": error}
+
+
+def profile(target: str, base: Optional[str], runs: int) -> Dict[str, Any]:
+    # 先导入 base (不计入), 打印分隔行后再导入 target, 只统计增量
+    pre = f"import {base}; " if base else ""
+    code = f"{pre}import sys; print('--MARK--', file=sys.stderr, flush=True); import {target}"
+    best = None
+    for _ in range(max(1, runs)):
+        res = _importtime(code)
+        if best is None or (res["error"] is None and res["total_ms"] < best["total_ms"]):
+            best = res
+    return best
+
+
+def main():
+    from ui.page_registry import PAGES
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", default="", help="逗号分隔的菜单名, 默认全部")
+    ap.add_argument("--top", type=int, default=10, help="每项展示自身耗时最高的模块数")
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "0")),
+                    help="启动导入预算 (0 不检查)")
+    ap.add_argument("--page-budget-ms", type=float, default=float(os.getenv("IMPORT_PAGE_BUDGET_MS", "0")),
+                    help="单个页面增量导入预算 (0 不检查)")
+    ap.add_argument("--json", default="")
+    args = ap.parse_args()
+
+    names = [n.strip() for n in args.pages.split(",") if n.strip()] or list(PAGES)
+    report: Dict[str, Any] = {"startup": profile("run_launcher", None, args.runs), "pages": {}}
+    modules_seen: Dict[str, List[str]] = {}
+    for name in names:
+        module = PAGES[name].partition(":")[0]
+        if module in modules_seen:            # 多个菜单共用同一页面模块
+            modules_seen[module].append(name)
+            continue
+        modules_seen[module] = [name]
+        report["pages"][module] = profile(module, "run_launcher", args.runs)
+
+    failed = []
+
+    def show(title: str, res: Dict[str, Any], budget: float):
+        over = budget and res["error"] is None and res["total_ms"] > budget
+        flag = "  OVER BUDGET" if over else ""
+        print(f"\n== {title}: {res['total_ms']} ms, {len(res['modules'])} modules{flag}")
+        if res["error"]:
+            print(f"   导入失败: {res['error']}")
+        for m in sorted(res["modules"], key=lambda m: -m["self_ms"])[:args.top]:
+            print(f"   {m['self_ms']:9.1f} self {m['cum_ms']:9.1f} cum  {m['module']}")
+        if over:
+            failed.append(title)
+
+    show("startup (run_launcher)", report["startup"], args.budget_ms)
+    for module, res in report["pages"].items():
+        show(f"{module} [{', '.join(modules_seen[module])}]", res, args.page_budget_ms)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if failed:
+        print(f"\n超出预算: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
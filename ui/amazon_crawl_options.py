@@ -1,54 +1,70 @@
 import streamlit as st
-from core.data_fetcher import get_platform_data
+from core.job_runner import submit_job
+from ui.job_panel import render_job, render_recent_jobs
 
-import streamlit as st
-from core.data_fetcher import get_platform_data
-from core.crawl.dispatcher import run_batch
-from scrapers.logger import log_info
-
-st.header("Amazon采集工具（全量增强版）")
-
-mode = st.radio("模式选择", ["单页采集", "批量URL采集"], horizontal=True)
-
-storage_mode = st.selectbox("存储模式", ["local", "mongo", "mysql", "cloud"], index=0)
-deep_detail = st.checkbox("采集详情页", value=True)
-max_items = st.slider("单页最大商品数", 10, 200, 50, 10)
-
-if mode == "单页采集":
-    pattern = st.radio("页面类型", ["Bestseller", "关键词搜索", "分类URL"], horizontal=True)
-    keyword = ""
-    category_url = ""
-    if pattern == "关键词搜索":
-        keyword = st.text_input("关键词", value="laptop")
-    elif pattern == "分类URL":
-        category_url = st.text_input("分类URL", value="https://www.amazon.com/bestsellers")
-
-    if st.button("开始单页采集 🚀"):
-        with st.spinner("采集中..."):
-            data = get_platform_data(
+JOB_TARGETS = ("core.job_runner:crawl_single", "core.job_runner:crawl_batch")
+
+
+def render_amazon_crawl():
+    """Amazon 采集页面: 采集在后台任务进程中执行, 本页只提交任务并轮询进度。"""
+    st.header("Amazon采集工具（全量增强版）")
+
+    mode = st.radio("模式选择", ["单页采集", "批量URL采集"], horizontal=True)
+
+    storage_mode = st.selectbox("存储模式", ["local", "sqlite", "mongo", "mysql", "cloud"], index=0)
+    deep_detail = st.checkbox("采集详情页", value=True)
+    max_items = st.slider("单页最大商品数", 10, 200, 50, 10)
+
+    if mode == "单页采集":
+        pattern = st.radio("页面类型", ["Bestseller", "关键词搜索", "分类URL"], horizontal=True)
+        keyword = ""
+        category_url = ""
+        if pattern == "关键词搜索":
+            keyword = st.text_input("关键词", value="laptop")
+        elif pattern == "分类URL":
+            category_url = st.text_input("分类URL", value="https://www.amazon.com/bestsellers")
+
+        if st.button("开始单页采集 🚀"):
+            st.session_state["amazon_job"] = submit_job(
+                JOB_TARGETS[0], label=f"单页采集 {keyword or category_url or 'Bestseller'}",
                 platform_name="Amazon",
                 keyword=keyword,
                 category_url=category_url,
                 max_items=max_items,
                 deep_detail=deep_detail
             )
-        if data:
-            st.success(f"完成，采集 {len(data)} 条。前10条预览：")
-            st.json(data[:10])
-        else:
-            st.error("未采集到数据。请尝试更换模式或查看日志。")
-
-else:
-    st.write("批量模式：输入多个 URL（每行一个）")
-    urls_text = st.text_area("URL 列表", value="https://www.amazon.com/bestsellers\nhttps://www.amazon.com/s?k=usb+hub")
-    if st.button("开始批量采集 🧩"):
-        urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
-        if not urls:
-            st.error("请提供至少一个 URL。")
-        else:
-            st.info(f"共 {len(urls)} 个任务，开始调度...")
-            run_batch(urls, storage_mode=storage_mode)
-            st.success("批量任务已完成（查看 data/ 或数据库中结果）。")
-
-st.divider()
-st.markdown("**日志提示：** 请查看根目录 scraper.log 或数据库内容。")
\ No newline at end of file
+
+    else:
+        st.write("批量模式：输入多个 URL（每行一个）")
+        urls_text = st.text_area("URL 列表", value="https://www.amazon.com/bestsellers\nhttps://www.amazon.com/s?k=usb+hub")
+        if st.button("开始批量采集 🧩"):
+            urls = [u.strip() for u in urls_text.splitlines() if u.strip()]
+            if not urls:
+                st.error("请提供至少一个 URL。")
+            else:
+                st.session_state["amazon_job"] = submit_job(
+                    JOB_TARGETS[1], label=f"批量采集 {len(urls)} 个 URL",
+                    urls=urls, storage_mode=storage_mode, max_items=max_items, deep_detail=deep_detail
+                )
+
+    job_id = st.session_state.get("amazon_job")
+    if job_id:
+        st.divider()
+        job = render_job(job_id)
+        result = (job or {}).get("result")
+        if job and job["state"] == "done" and result:
+            if job["target"] == JOB_TARGETS[1]:
+                st.success(
+                    f"批量任务已完成：成功 {result['ok']} / 失败 {result['failed']} / 超时 {result['timeouts']}，"
+                    f"共 {result['items']} 条，{result['items_per_sec']} 条/秒（查看 data/ 或数据库中结果）。"
+                )
+                st.dataframe(result["results"], use_container_width=True)
+            elif result["items"]:
+                st.success(f"完成，采集 {result['items']} 条。前10条预览：")
+                st.json(result["preview"])
+            else:
+                st.error("未采集到数据。请尝试更换模式或查看日志。")
+
+    st.divider()
+    render_recent_jobs(JOB_TARGETS)
+    st.markdown("**日志提示：** 请查看根目录 scraper.log、data/jobs/<任务ID>/log.txt 或数据库内容。")
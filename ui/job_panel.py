@@ -0,0 +1,73 @@
+import streamlit as st
+from core.job_runner import TERMINAL, get_job, get_job_runner, list_jobs, read_log, read_partial
+
+STATE_LABELS = {"queued": "排队中", "running": "运行中", "done": "已完成", "failed": "失败", "cancelled": "已取消"}
+
+
+def _render_snapshot(job_id: str) -> dict:
+    """展示一次任务状态 / 进度 / 部分结果 / 日志 (日志按会话记录的 offset 增量读取)。"""
+    job = get_job(job_id) or {"state": "failed", "error": "status.json 丢失"}
+    prog = job.get("progress") or {}
+    line = f"**任务 {job_id}**（{job.get('label')}）：{STATE_LABELS.get(job['state'], job['state'])}"
+    st.markdown(line + ("  \n" + prog["message"] if prog.get("message") else ""))
+    if prog.get("total"):
+        st.progress(min(1.0, prog["done"] / prog["total"]), text=f"{prog['done']}/{prog['total']}")
+    partial = read_partial(job_id, 50)
+    if partial:
+        st.dataframe(partial, use_container_width=True)
+    key = f"job-log-{job_id}"
+    log_text, offset = st.session_state.get(key, ("", 0))
+    chunk, offset = read_log(job_id, offset)
+    log_text = (log_text + chunk)[-8000:]
+    st.session_state[key] = (log_text, offset)
+    if log_text:
+        st.code(log_text, language="log")
+    return job
+
+
+def _live_snapshot(job_id: str):
+    # 作为 fragment 定时重跑, 只刷新本区域; 任务结束后整页重跑一次, 让调用方展示最终结果
+    if _render_snapshot(job_id)["state"] in TERMINAL:
+        st.rerun()
+
+
+def render_job(job_id: str, poll_secs: float = 1.0):
+    """
+    展示任务状态 / 进度 / 部分结果 / 日志。不阻塞页面脚本:
+    任务未结束时用 st.fragment(run_every=poll_secs) 定时刷新该区域; 旧版 Streamlit 无 fragment 时只展示当前快照 + 刷新按钮。
+    返回本次脚本运行时读到的任务状态。
+    """
+    job = get_job(job_id)
+    if job is None:
+        st.warning(f"任务 {job_id} 不存在或已被清理。")
+        return None
+
+    if job["state"] in TERMINAL:
+        job = _render_snapshot(job_id)
+        if job["state"] == "failed":
+            st.error(f"任务失败：{job.get('error')}")
+        return job
+
+    if st.button("取消任务", key=f"cancel-{job_id}"):
+        get_job_runner().cancel(job_id)
+        return _render_snapshot(job_id)
+    fragment = getattr(st, "fragment", None)
+    if fragment is not None:
+        fragment(run_every=poll_secs)(_live_snapshot)(job_id)
+    else:
+        _render_snapshot(job_id)
+        st.button("刷新进度", key=f"refresh-{job_id}")
+        st.info("任务仍在后台运行，可稍后回到本页查看。")
+    return job
+
+
+def render_recent_jobs(targets=(), limit: int = 10):
+    """最近任务列表 + 运行器并发占用。"""
+    stats = get_job_runner().stats()
+    st.caption(f"后台任务：运行 {stats['running']} / 上限 {stats['max_concurrent']}，排队 {stats['queued']}"
+               f"，worker 预算 {stats['worker_budget']}")
+    jobs = [j for j in list_jobs(limit * 3) if not targets or j.get("target") in targets][:limit]
+    if jobs:
+        st.dataframe([{"id": j["id"], "任务": j.get("label"), "状态": STATE_LABELS.get(j["state"], j["state"]),
+                       "进度": (j.get("progress") or {}).get("message"), "错误": j.get("error")} for j in jobs],
+                     use_container_width=True)
@@ -0,0 +1,77 @@
+import socket
+import platform
+from datetime import datetime
+
+import streamlit as st
+
+# 原 run_launcher.py 内联的页面; 采集模块在各页面函数内导入, 只在选中该页面时加载
+
+
+def render_overview():
+    st.header("系统概览")
+    st.metric("主机", socket.gethostname())
+    st.metric("系统", platform.platform())
+    st.metric("时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+
+def render_trends():
+    from core.collectors.market_collector import fetch_all_trends
+
+    st.header("权威数据中心")
+    st.info("数据来自：1688 / QuestMobile / 艾瑞 / 易观 等（示例）")
+    for d in fetch_all_trends():
+        st.markdown(
+            f"**来源**：[{d.get('source')}]({d.get('url')})  \n"
+            f"- 时间：{d.get('fetched_at')}（缓存 {d.get('cache', {}).get('age')} 秒）  \n"
+            f"- 内容：{d.get('metric', d.get('data',''))}  \n"
+            f"- 权威度：{d.get('credibility','N/A')}"
+        )
+
+
+def render_youtube():
+    from core.collectors.youtube_collector import fetch_channel_stats
+
+    st.header("YouTube 频道查询")
+    cid = st.text_input("频道 ID")
+    if st.button("获取频道统计"):
+        try:
+            res = fetch_channel_stats(cid)
+            st.json(res)
+        except Exception as e:
+            st.error(str(e))
+
+
+def render_tiktok():
+    st.header("TikTok 趋势（占位）")
+    st.write("当前使用公共占位源，正式接入请在 API 管理中添加接口。")
+
+
+def render_policy_center():
+    from core.collectors.policy_collector import fetch_latest_policies, refresh_policies, recent_changes, load_snapshot
+
+    st.header("政策中心")
+    if st.button("立即扫描全部来源"):
+        with st.spinner("正在并发扫描政策来源..."):
+            summary = refresh_policies()
+        st.success(f"扫描 {summary['scanned']} 个来源：变更 {summary['changed']}，"
+                   f"未变化 {summary['unchanged'] + summary['not_modified']}，失败 {summary['errors']}，"
+                   f"耗时 {summary['secs']}s")
+    lst = fetch_latest_policies()
+    st.caption(f"快照时间：{load_snapshot().get('scanned_at')}（UTC），页面只读取快照，定时刷新由调度器执行")
+    for p in lst:
+        st.markdown(
+            f"**{p.get('source',{}).get('agency','未知')}** - {p.get('fetched_at')}"
+            f"{'（最近变更 ' + p['changed_at'] + '）' if p.get('changed_at') else ''}  \n"
+            f"{p.get('snippet', p.get('error', ''))}"
+        )
+    changes = recent_changes(10)
+    if changes:
+        st.subheader("最近变更")
+        for c in changes:
+            with st.expander(f"{c.get('agency')} - {c.get('changed_at')}"):
+                st.code("\n".join(c.get("diff", [])), language="diff")
+
+
+def render_settings():
+    st.header("日志与设置")
+    st.write("请在 config/config.json 中管理邮箱、调度等设置。")
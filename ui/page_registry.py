@@ -0,0 +1,58 @@
+"""
+页面注册表: 菜单名 -> "模块:函数", 选中页面时才导入对应模块
+(run_launcher 启动与每次重跑不再为未打开的页面导入 pandas / openai / 采集模块)。
+某个页面导入失败 (缺少依赖或模块) 只影响该页面。
+
+IMPORT_PROFILE=1 时记录每次页面加载的导入耗时及新导入的模块数, 并在侧边栏展示;
+逐模块的导入开销 (python -X importtime) 与启动预算检查见 tools/import_profile.py。
+"""
+import os
+import sys
+import time
+import importlib
+from typing import Callable, Dict, Tuple
+
+from scrapers.logger import log_info, log_error
+
+IMPORT_PROFILE = os.getenv("IMPORT_PROFILE", "0") == "1"
+
+PAGES: Dict[str, str] = {
+    "主页": "ui.dashboard:render_dashboard",
+    "智能分析": "ui.analytics:render_analytics",
+    "原型测试": "ui.prototype_view:render_prototype",
+    "权威数据中心": "ui.launcher_pages:render_trends",
+    "数据来源追踪": "ui.source_attribution:render_sources",
+    "YouTube": "ui.launcher_pages:render_youtube",
+    "TikTok": "ui.launcher_pages:render_tiktok",
+    "Amazon采集工具": "ui.amazon_crawl_options:render_amazon_crawl",
+    "爬虫自迭代": "ui.auto_evolution_crawler:render_auto_evolution_crawler",
+    "AI 学习中心": "ui.ai_learning_center:render_ai_learning_center",
+    "AI 自主迭代": "ui.auto_evolution:render_auto_evolution",
+    "AI 自动修复": "ui.auto_patch_view:render_auto_patch",
+    "API 管理": "ui.api_admin:render_api_admin",
+    "政策中心": "ui.launcher_pages:render_policy_center",
+    "系统概览": "ui.launcher_pages:render_overview",
+    "日志与设置": "ui.launcher_pages:render_settings",
+}
+
+# 菜单名 -> (首次加载耗时 ms, 新导入的模块数)
+import_stats: Dict[str, Tuple[float, int]] = {}
+
+
+def load_page(name: str) -> Callable[[], None]:
+    """导入并返回页面渲染函数; 模块已导入时 (sys.modules 缓存) 几乎无开销。"""
+    module, _, func = PAGES[name].partition(":")
+    before = len(sys.modules)
+    start = time.perf_counter()
+    try:
+        fn = getattr(importlib.import_module(module), func)
+    except Exception as e:
+        log_error(f"[IMPORT] 页面 {name} ({module}) 导入失败: {repr(e)}", stage="import")
+        raise
+    ms = round((time.perf_counter() - start) * 1000, 1)
+    if name not in import_stats:
+        import_stats[name] = (ms, len(sys.modules) - before)
+        if IMPORT_PROFILE:
+            log_info(f"[IMPORT] 页面 {name} ({module}) {ms}ms new_modules={len(sys.modules) - before}",
+                     stage="import", duration=ms / 1000)
+    return fn
@@ -1,7 +1,9 @@
 import streamlit as st
-from core.collectors.spider_engine import SpiderEngine
+from core.collectors.spider_engine import get_spider_engine
 from core.processing.recommender import ai_recommendation
 
+PREVIEW_RESULTS = 20   # 最多展开显示前 N 个结果的正文, 其余只进入汇总表
+
 def render_prototype():
     """
     Renders the prototype testing page in the Streamlit UI.
@@ -16,16 +18,27 @@ def render_prototype():
         st.subheader("采集验证")
         urls = st.text_area("输入URL，每行一个", "https://www.cbp.gov\nhttps://www.gov.uk", key="prototype_urls")
         if st.button("开始采集"):
-            with st.spinner("正在采集数据..."):
-                urls_list = [u.strip() for u in urls.splitlines() if u.strip()]
-                if not urls_list:
-                    st.warning("请输入有效的URL。")
-                else:
-                    se = SpiderEngine()
-                    results = se.collect(urls_list)
-                    st.success(f"采集完成！共 {len(results)} 个结果。")
-                    for i, r in enumerate(results):
-                        st.text_area(f"结果 {i+1}", r[:1000] if isinstance(r, str) else str(r), height=200, key=f"res_{i}")
+            urls_list = [u.strip() for u in urls.splitlines() if u.strip()]
+            if not urls_list:
+                st.warning("请输入有效的URL。")
+            else:
+                # 按完成顺序逐个渲染, 正文只保留预览所需部分
+                progress = st.progress(0.0)
+                status = st.empty()
+                table = st.empty()
+                rows, ok = [], 0
+                for i, r in enumerate(get_spider_engine().iter_collect(urls_list), 1):
+                    ok += r.ok
+                    rows.append({"url": r.url, "status": r.status, "bytes": r.bytes, "secs": r.elapsed,
+                                 "attempts": r.attempts, "error": r.error})
+                    progress.progress(i / len(urls_list))
+                    status.text(f"已完成 {i}/{len(urls_list)}，成功 {ok}")
+                    if i <= PREVIEW_RESULTS:
+                        with st.expander(f"结果 {i}: {r.url} · 状态 {r.status} · {r.bytes} 字节 · {r.elapsed}s"):
+                            st.text((r.text or "")[:1000] if r.ok else str(r.error))
+                    if i % 10 == 0 or i == len(urls_list):
+                        table.dataframe(rows, use_container_width=True)
+                st.success(f"采集完成！共 {len(rows)} 个结果，成功 {ok} 个。")
 
     with tab2:
         st.subheader("AI分析验证")
@@ -42,11 +55,10 @@ def render_prototype():
         if st.button("运行完整流程示例"):
             with st.spinner("正在执行完整流程..."):
                 urls = ["https://www.cbp.gov", "https://www.gov.uk"]
-                se = SpiderEngine()
-                results = se.collect(urls)
                 st.write("---")
                 st.write("**第一步：数据采集结果（摘要）**")
-                st.json([res[:200] + "..." if isinstance(res, str) else str(res) for res in results])
+                for res in get_spider_engine().iter_collect(urls):
+                    st.json(dict(res.to_dict(), snippet=(res.text or "")[:200] + "..."))
                 
                 st.write("---")
                 st.write("**第二步：调用AI进行分析**")
@@ -6,16 +6,18 @@ def render_sources():
     st.header("🔍 数据来源追踪与验证")
     st.info("此处展示系统当前数据来源、更新时间及权威度评分。")
 
-    if st.button("刷新数据来源"):
-        st.rerun()
+    force = st.button("刷新数据来源")
 
     with st.spinner("正在获取最新数据源信息..."):
-        data = fetch_all_trends()
+        data = fetch_all_trends(force=force)
         st.markdown("### 当前权威数据节点")
         for d in data:
+            cache = d.get("cache", {})
+            state = "后台刷新中" if cache.get("refreshing") else ("已过期" if cache.get("stale") else "最新")
             st.markdown(f"""
             **来源：** [{d['source']}]({d.get('url', '#')})  
             **时间：** {d.get('fetched_at', 'N/A')}  
+            **缓存：** {cache.get('age', 'N/A')} 秒前获取（{state}）  
             **摘要：** {d.get('metric', d.get('data', ''))}  
             **权威度：** {d.get('credibility', '未知')}
             <hr>